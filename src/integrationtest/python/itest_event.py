@@ -12,6 +12,7 @@ from integration_test_support import RedisTemporaryInstance
 STATES = 'states.json'
 CLUSTERS = 'clusters.json'
 AGENT_NAME = 'agent_12345'
+ANOTHER_AGENT_NAME = 'agent_67890'
 CLUSTER_NAME = 'cluster0'
 EVENT_QUEUE = 'event_queue'
 ANOTHER_EVENT_QUEUE = 'another_event_queue'
@@ -109,6 +110,57 @@ class TestEvent(unittest.TestCase):
             for name, cluster in ev['clusters'].items():
                 self.assertTrue(Cluster.validate(json.loads(cluster)), "State is not valid")
 
+    def test_read_all_states_events(self):
+        """Write TEST_QUEUE_NUMBER states to redis and read all of them in one go"""
+        with integrationtest_utils.readfile(STATES, __file__) as f:
+            j = json.load(f)
+            state = State(j)
+
+            power_factors = []
+            for i in range(TEST_QUEUE_NUMBER):
+                state.power_factor += i
+                power_factors.append(state.power_factor)
+                self.event_queue.write_states(states={'states': {AGENT_NAME: state.dump()}})
+
+        events = self.event_queue.read_all_states()
+        self.assertEqual(len(events), TEST_QUEUE_NUMBER, "Number of read events is different")
+        self.assertEqual([json.loads(ev['states'][AGENT_NAME])['power_factor'] for ev in events], power_factors,
+                         "Events are not read in order")
+        self.assertEqual(self.redis.llen(EVENT_QUEUE), 0, "Events are not removed from Redis")
+        self.assertEqual(self.event_queue.read_all_states(), [], "Events are read twice")
+
+    def test_coalesce_states_events(self):
+        """Write TEST_QUEUE_NUMBER states of two agents and read only the last value of each field"""
+        event_queue = EventQueue(redis=self.redis, coalesce=True)
+        for i in range(TEST_QUEUE_NUMBER):
+            event_queue.write_states(states={'states': {AGENT_NAME: {'power_factor': float(i)},
+                                                        ANOTHER_AGENT_NAME: {'battery': {'status': float(i)}}}})
+        event_queue.write_states(states={'states': {AGENT_NAME: {'battery': {'active': 0}}}})
+        event_queue.write_states(states={'states': {AGENT_NAME: {'battery': {'status': 1.0}}}})
+
+        self.assertEqual(self.redis.llen(EVENT_QUEUE), 0, "State events are queued")
+        events = event_queue.read_all_states()
+        self.assertEqual(events, [{'states': {
+            AGENT_NAME: {'power_factor': TEST_QUEUE_NUMBER - 1.0, 'battery': {'active': 0, 'status': 1.0}},
+            ANOTHER_AGENT_NAME: {'battery': {'status': TEST_QUEUE_NUMBER - 1.0}}}}], "Coalesced states are different")
+        self.assertTrue(State.validate(events[0]['states'][AGENT_NAME]), "State is not valid")
+        self.assertEqual(event_queue.read_all_states(), [], "States are read twice")
+
+    def test_coalesce_dumped_states_events(self):
+        """Write states dumped to json string and read them coalesced"""
+        event_queue = EventQueue(redis=self.redis, coalesce=True)
+        with integrationtest_utils.readfile(STATES, __file__) as f:
+            j = json.load(f)
+            state = State(j)
+
+            for i in range(TEST_QUEUE_NUMBER):
+                state.power_factor += i
+                event_queue.write_states(states={'states': {AGENT_NAME: state.dump()}})
+
+        events = event_queue.read_all_states()
+        self.assertEqual(len(events), 1, "States are not coalesced")
+        self.assertEqual(events[0]['states'][AGENT_NAME], json.loads(state.dump()), "Coalesced state is different")
+
     def test_cleanup(self):
         """Test cleanup method"""
         with integrationtest_utils.readfile(STATES, __file__) as f:
@@ -50,7 +50,63 @@ class TestMongoDB(unittest.TestCase):
         db = self.client[DATABASE]
         coll = db[AGENTS]
         stored_agent_obj = coll.find_one({'name': "AGENT1"})
-        self.assertTrue(Agent.validate(json.loads(stored_agent_obj["agent"])), "Agent is not valid")
+        self.assertTrue(Agent.validate(stored_agent_obj["agent"]), "Agent is not valid")
+
+    def test_if_agents_is_stored_in_step_layout(self):
+        """Store agents of simulation step in one document and read them back as one document per agent"""
+        storage = MongoDB(client=self.client, layout=STEP_LAYOUT)
+        simulation_id = storage.write_simulation(agents=self.agents, lines=self.lines, paths={}, nodes={},
+                                                 solver=SOLVER)
+        storage.write_agents(self.agents, SIMULATION_STEP_ID, simulation_id)
+        self.assertEqual(self.client[DATABASE][AGENTS_STEP].count_documents({}), 1,
+                         'Agents are not stored in one document')
+        self.assertEqual(self.client[DATABASE][AGENTS].count_documents({}), 0,
+                         'Agents are stored in one document per agent')
+
+        agents = list(self.storage.get_agents_by_simulation_step(SIMULATION_STEP_ID))
+        self.assertEqual(len(agents), len(self.agents), 'Number of agents is not correct')
+        for agent in agents:
+            self.assertTrue(Agent.validate(agent['agent']), "Agent is not valid")
+        self.assertEqual(len(list(self.storage.get_agents_by_simulation(simulation_id))), len(self.agents),
+                         'Number of agents is not correct')
+
+        self.storage.clear_agents(simulation_id=simulation_id)
+        self.assertEqual(self.client[DATABASE][AGENTS_STEP].count_documents({}), 0,
+                         'Clear agents does not work properly')
+
+    def test_if_agents_is_rebuilt_from_keyframes(self):
+        """Store agents as keyframes and deltas and rebuild them at every simulation step"""
+        storage = MongoDB(client=self.client, keyframe_interval=4)
+        simulation_id = storage.write_simulation(agents=self.agents, lines=self.lines, paths={}, nodes={},
+                                                 solver=SOLVER)
+        agent_name = next(iter(self.agents))
+        expected_agents = []
+        for simulation_step in range(10):
+            for agent in self.agents.values():
+                agent.battery.status = float(simulation_step % 3)
+            expected_agents.append(self.agents[agent_name].to_dict())
+            simulation_step_id = storage.write_simulation_step(
+                simulation_step=simulation_step, simulation_id=simulation_id, simulation_result={},
+                agents_states={}, total_pv_power=TOTAL_PV_POWER)
+            storage.write_agents(self.agents, simulation_step_id, simulation_id, simulation_step=simulation_step)
+
+        self.assertEqual(self.client[DATABASE][AGENTS].count_documents({'keyframe': True}), 3 * len(self.agents),
+                         'Number of keyframes is not correct')
+        for simulation_step, expected_agent in enumerate(expected_agents):
+            agent = storage.get_agent_by_simulation_step_number(simulation_id, agent_name, simulation_step)
+            self.assertEqual(agent, expected_agent, 'Agent is not rebuilt properly')
+        agents = [agent['agent'] for agent in self.storage.get_agents_by_simulation(simulation_id)
+                  if agent['name'] == agent_name]
+        self.assertEqual(agents, expected_agents, 'Agents of simulation are not rebuilt properly')
+
+    def test_if_step_timings_are_stored(self):
+        """Store summary of step timings to simulation and read it back"""
+        simulation_id = self.storage.write_simulation(agents=self.agents, lines=self.lines, paths={}, nodes={},
+                                                      solver=SOLVER)
+        self.assertIsNone(self.storage.get_step_timings(simulation_id), "Step timings are stored")
+        step_timings = {'solver': {'count': 1, 'total': 0.5}}
+        self.storage.write_step_timings(simulation_id, step_timings)
+        self.assertEqual(self.storage.get_step_timings(simulation_id), step_timings, "Step timings are different")
 
     def test_if_simulation_step_is_stored(self):
         """Store agent object to DB and read it"""
@@ -361,16 +417,16 @@ class TestMongoDB(unittest.TestCase):
         simulation = coll.find_one({"_id": simulation_id})
 
         for name, agent in simulation['agents'].items():
-            self.assertTrue(Agent.validate(json.loads(agent)), "Agent is not valid")
+            self.assertTrue(Agent.validate(agent), "Agent is not valid")
 
         for name, node in simulation['lines'].items():
-            self.assertTrue(Line.validate(json.loads(node)), "Line is not valid")
+            self.assertTrue(Line.validate(node), "Line is not valid")
 
         for name, path in simulation['paths'].items():
-            self.assertTrue(Path.validate_list(json.loads(path)), "Path is not valid")
+            self.assertTrue(Path.validate_list(path), "Path is not valid")
 
         for name, node in simulation['nodes'].items():
-            self.assertTrue(Node.validate(json.loads(node)), "Node is not valid")
+            self.assertTrue(Node.validate(node), "Node is not valid")
 
         self.assertEqual(simulation['solver'], SOLVER, "Solver is not valid")
 
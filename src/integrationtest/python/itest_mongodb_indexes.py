@@ -0,0 +1,104 @@
+import json
+import unittest
+
+import integrationtest_utils
+from integration_test_support import MongoTemporaryInstance
+from aries.core.db.mongodb import *
+from aries.core.grid import grid_utils
+
+GRID_ELEMENT_FILE = "grid_elements.json"
+SOLVER = "linear_solver"
+NUMBER_OF_SIMULATIONS = 3
+NUMBER_OF_STEPS = 20
+
+
+def plan_stages(plan):
+    """All stages of query plan"""
+    stages = [plan['stage']]
+    for input_plan in plan.get('inputStages', []) + ([plan['inputStage']] if 'inputStage' in plan else []):
+        stages.extend(plan_stages(input_plan))
+    return stages
+
+
+class TestMongoDBIndexes(unittest.TestCase):
+    """Check query plans of storage queries, none of them should scan the whole collection"""
+
+    def setUp(self):
+        self.client = MongoTemporaryInstance.get_instance().client
+        self.storage = MongoDB(client=self.client, keyframe_interval=5)
+        self.storage.create_indexes()
+        with integrationtest_utils.readfile(GRID_ELEMENT_FILE, __file__) as f:
+            j = json.load(f)
+            self.agents, self.lines = grid_utils.create_grid_elements(j)
+
+        self.simulation_ids = []
+        self.simulation_step_ids = []
+        for _ in range(NUMBER_OF_SIMULATIONS):
+            simulation_id = self.storage.write_simulation(agents=self.agents, lines=self.lines, paths={}, nodes={},
+                                                          solver=SOLVER)
+            for simulation_step in range(NUMBER_OF_STEPS):
+                simulation_step_id = self.storage.write_simulation_step(
+                    simulation_step=simulation_step, simulation_id=simulation_id, simulation_result={},
+                    agents_states={}, total_pv_power=0)
+                self.storage.write_agents(self.agents, simulation_step_id, simulation_id,
+                                          simulation_step=simulation_step)
+                self.storage.write_states({}, simulation_id=simulation_id, simulation_step=simulation_step,
+                                          is_applied=True)
+                self.storage.write_clusters({}, simulation_id=simulation_id, simulation_step=simulation_step,
+                                            is_applied=True)
+                self.simulation_step_ids.append(simulation_step_id)
+            self.simulation_ids.append(simulation_id)
+
+    def tearDown(self):
+        self.storage.clear_agents()
+        self.storage.clear_clusters()
+        self.storage.clear_states()
+        self.storage.clear_simulation_step()
+        self.storage.clear_simulation()
+
+    def assert_no_collection_scan(self, cursor, name):
+        explain = cursor.explain()
+        stages = plan_stages(explain['queryPlanner']['winningPlan'])
+        self.assertNotIn('COLLSCAN', stages, "Query {} scans the whole collection".format(name))
+        return explain
+
+    def test_query_plans(self):
+        """Test if all storage queries use indexes"""
+        simulation_id = self.simulation_ids[-1]
+        simulation_step_id = self.simulation_step_ids[-1]
+        cursors = {
+            'get_active_simulation': self.storage.get_active_simulation(),
+            'get_active_simulation_step': self.storage.get_active_simulation_step(),
+            'get_last_active_sumulation_step': self.storage.get_last_active_sumulation_step(simulation_id, 5),
+            'get_simulation_step_by_simulation': self.storage.get_simulation_step_by_simulation(simulation_id),
+            'get_agents_by_simulation_step': self.client[DATABASE][AGENTS].find(
+                {'simulation_step_id': simulation_step_id}),
+            'get_agents_by_simulation': self.client[DATABASE][AGENTS].find({'simulation_id': simulation_id}),
+            'get_agent_by_simulation_step_number': self.client[DATABASE][AGENTS].find(
+                {'simulation_id': simulation_id, 'name': 'AGENT0', 'simulation_step': {'$lte': 10}}).sort(
+                'simulation_step', -1),
+            'get_agents_by_simulation_step_number': self.client[DATABASE][AGENTS].find(
+                {'simulation_id': simulation_id, 'keyframe': True, 'simulation_step': {'$lte': 10}}).sort(
+                'simulation_step', -1).limit(1),
+            'agents_step': self.client[DATABASE][AGENTS_STEP].find({'simulation_id': simulation_id}),
+            'read_states': self.storage.read_states(simulation_id, simulation_step=3),
+            'read_clusters': self.storage.read_clusters(simulation_id, simulation_step=3),
+            'read_applied_clusters': self.storage.read_clusters(simulation_id, is_applied=True),
+            'get_last_cluster_for_simulation_id': self.storage.get_last_cluster_for_simulation_id(simulation_id),
+            'get_last_cluster': self.storage.get_last_cluster(),
+        }
+        for name, cursor in cursors.items():
+            self.assert_no_collection_scan(cursor, name)
+
+    def test_agents_of_simulation_step_are_examined_only(self):
+        """Test if reading agents of simulation step does not examine agents of other steps"""
+        explain = self.assert_no_collection_scan(self.client[DATABASE][AGENTS].find(
+            {'simulation_step_id': self.simulation_step_ids[0]}), 'get_agents_by_simulation_step')
+        execution_stats = explain['executionStats']
+        self.assertEqual(execution_stats['totalDocsExamined'], execution_stats['nReturned'],
+                         "Agents of other simulation steps are examined")
+
+
+if __name__ == '__main__':
+    if integrationtest_utils.is_storage_exists():
+        unittest.main()
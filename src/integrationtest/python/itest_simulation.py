@@ -364,7 +364,7 @@ def test_simulation_with_activate_things_in_agents(server):
             agents = server.storage.get_agents_by_simulation(simulation_id=simulation_id)
             with open('agents.csv', 'w') as f:
                 for a in agents:
-                    ag = Agent.load(a['name'], json.loads(a['agent']))
+                    ag = Agent.load(a['name'], a['agent'])
                     f.write('{},{},{},{},{},{},{}\n'.format(ag.name, a['simulation_step_id'], ag.battery.active,
                                                             ag.electrical_vehicle.active, ag.pv_panel.active,
                                                             ag.water_tank.active,
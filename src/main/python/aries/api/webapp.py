@@ -2,14 +2,16 @@ import json
 import os
 
 import jsend
-from bson.json_util import dumps, loads
+from bson.json_util import dumps
 from flask import Flask, render_template, Response, request
 
 from aries.api.utils.objectid_converter import ObjectIdConverter
 from aries.core import utils
 from aries.core.config.config import Config
-from aries.core.db.mongodb import MongoDB
-from aries.core.event.event_queue import EventQueue
+from aries.core.constants import IN_PROCESS_TRANSPORT
+from aries.core.db.mongodb import MongoDB, from_document
+from aries.core.event import event_utils
+from aries.core.exceptions import ValidationError
 
 API_URL = '/api/aries/'
 
@@ -18,14 +20,23 @@ def load_config():
     with open(os.environ['ARIES_CONF'], 'rt') as f:
         j = json.load(f)
         config = Config.load(j)
+    # Queues of in-process transport are private to simulation process, events of webapp would never reach it
+    if config.event_transport == IN_PROCESS_TRANSPORT:
+        raise ValidationError("Event transport {} can not be used by webapp, use redis or unix_socket".format(
+            IN_PROCESS_TRANSPORT))
 
     mongo_client = utils.check_if_mongodb_is_running(config.mongodb_uri)
     storage = MongoDB(client=mongo_client)
-    redis_client = utils.check_if_redis_is_running(host=config.redis_host, port=config.redis_port)
-    event_queue = EventQueue(redis=redis_client)
+    storage.create_indexes()
+    event_queue = event_utils.create_event_queue(config)
     return storage, event_queue
 
 
+def agent_to_json(agent):
+    """Agents are stored as subdocuments, agents stored before as JSON strings are streamed as they are"""
+    return agent if isinstance(agent, str) else dumps(agent)
+
+
 def create_app():
     storage, event_queue = load_config()
 
@@ -41,20 +52,28 @@ def create_app():
             if simulation is not None:
                 simulation['_id'] = str(simulation['_id'])
                 simulation['start_time'] = str(simulation['start_time'])
+                # Simulations stored before elements were subdocuments keep them as JSON strings
                 for name, agent in simulation['agents'].items():
-                    simulation['agents'][name] = loads(agent)
+                    simulation['agents'][name] = from_document(agent)
                 for name, line in simulation['lines'].items():
-                    simulation['lines'][name] = loads(line)
+                    simulation['lines'][name] = from_document(line)
                 for name, node in simulation['nodes'].items():
-                    simulation['nodes'][name] = loads(node)
+                    simulation['nodes'][name] = from_document(node)
                 for name, path in simulation['paths'].items():
-                    simulation['paths'][name] = loads(path)
+                    simulation['paths'][name] = from_document(path)
                 if 'clusters' in simulation and simulation['clusters']:
                     for name, cluster in simulation['clusters'].items():
-                        simulation['clusters'][name] = loads(cluster)
+                        simulation['clusters'][name] = from_document(cluster)
                 return Response(jsend.success(simulation).stringify(), mimetype='application/json')
         return Response(jsend.fail({}).stringify(), mimetype='application/json')
 
+    @app.route(API_URL + 'simulation/<ObjectId:simulation_id>/timings')
+    def get_step_timings(simulation_id):
+        step_timings = storage.get_step_timings(simulation_id)
+        if step_timings is not None:
+            return Response(jsend.success(step_timings).stringify(), mimetype='application/json')
+        return Response(jsend.fail({}).stringify(), mimetype='application/json')
+
     @app.route(API_URL + 'simulationstep/active')
     def get_active_simulation_step():
         simulation_steps = storage.get_active_simulation_step()
@@ -98,7 +117,7 @@ def create_app():
                         yield ','
                     else:
                         add_comma = True
-                    yield agent['agent']
+                    yield agent_to_json(agent['agent'])
             yield ']}}'
 
         return Response(generate(), mimetype='application/json')
@@ -116,7 +135,7 @@ def create_app():
                         yield ','
                     else:
                         add_comma = True
-                    yield agent['agent']
+                    yield agent_to_json(agent['agent'])
             yield ']}}'
 
         return Response(generate(), mimetype='application/json')
@@ -125,7 +144,12 @@ def create_app():
     def write_states():
         try:
             states = request.get_json()
-            event_queue.write_states({'states': states})
+            event = {'states': states}
+            # States are applied by simulation at step apply_at_step if it is given
+            apply_at_step = request.args.get('apply_at_step', type=int)
+            if apply_at_step is not None:
+                event['apply_at_step'] = apply_at_step
+            event_queue.write_states(event)
         except Exception as e:
             return Response(jsend.fail({'message': str(e)}).stringify())
         return Response(jsend.success({}).stringify(), mimetype='application/json')
@@ -7,6 +7,7 @@ import numpy as np
 from bson import json_util
 
 from aries.core import utils
+from aries.core.grid.record import Record
 from aries.simulation import simulation_utils
 
 # Schema for cluster validation
@@ -21,18 +22,10 @@ cluster_validator = cerberus.Validator(cluster_schema)
 cluster_validator.ignore_none_values = True
 
 
-class Cluster(object):
+class Cluster(Record):
     """Representation of cluster in simulation"""
-    name = None
-    # List of agents name belonging to the cluster
-    cluster_agents = None
-    priority = None
-    controller = None
-    delay = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+    # cluster_agents is list of agents name belonging to the cluster
+    __slots__ = ('name', 'cluster_agents', 'priority', 'controller', 'delay')
 
     @classmethod
     def from_properties(cls, name, cluster_agents, controller, priority, delay):
@@ -49,6 +42,10 @@ class Cluster(object):
         """Dump object to json string"""
         return json_util.dumps(self, cls=ClusterEncoder)
 
+    def to_dict(self):
+        """Dump object to dictionary of native types, e.g. for BSON document"""
+        return ClusterEncoder().default(self)
+
     @staticmethod
     def validate(data):
         """Validate object according to agent_schema"""
@@ -63,13 +60,14 @@ class ClusterEncoder(json.JSONEncoder):
     """Cluster Encoder for JSON serialization"""
 
     def default(self, o):
-        cluster_dict = dict(o.__dict__)
+        cluster_dict = o.properties()
         del cluster_dict['name']
         return cluster_dict
 
 
 class LoadSharingCluster(Cluster):
     """LoadSharingCluster ..."""
+    __slots__ = ()
 
     def run(self, agents, lines, nodes, paths):
         total_active_power = 0
@@ -129,6 +127,7 @@ class LoadSharingCluster(Cluster):
 
 class StayingAliveCluster(Cluster):
     """StayingAliveCluster ..."""
+    __slots__ = ()
 
     def run(self, agents, lines, nodes, paths):
         print('StayingAliveCluster')
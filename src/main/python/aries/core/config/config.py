@@ -4,7 +4,9 @@ import cerberus
 from bson import json_util
 
 import aries.core.utils
-from aries.core.constants import LINEAR_SOLVER, NON_LINEAR_SOLVER, CUSTOM_SOLVER
+from aries.core.constants import LINEAR_SOLVER, NON_LINEAR_SOLVER, SWEEP_SOLVER, CUSTOM_SOLVER, AGENT_LAYOUT, \
+    STEP_LAYOUT, MONGODB_STORAGE, LOCAL_STORAGE, REDIS_TRANSPORT, IN_PROCESS_TRANSPORT, UNIX_SOCKET_TRANSPORT, \
+    CATCH_UP_POLICY, SKIP_POLICY
 
 config_schema = {
     "topology": {'type': 'string', 'required': True},
@@ -15,8 +17,26 @@ config_schema = {
     "redis_host": {'type': 'string', 'required': True, 'default': "localhost"},
     "redis_port": {'type': 'integer', 'required': True, 'default': 6379},
     "solver_type": {'type': 'string', 'required': True, 'default': LINEAR_SOLVER,
-                    'allowed': [LINEAR_SOLVER, NON_LINEAR_SOLVER, CUSTOM_SOLVER]},
+                    'allowed': [LINEAR_SOLVER, NON_LINEAR_SOLVER, SWEEP_SOLVER, CUSTOM_SOLVER]},
     "clusters": {'type': 'string', 'required': False, 'default': '', "empty": True},
+    "vectorized": {'type': 'boolean', 'required': False, 'default': False},
+    "warm_start": {'type': 'boolean', 'required': False, 'default': False},
+    "storage_batch_size": {'type': 'integer', 'required': False, 'default': 0, 'min': 0},
+    "storage_layout": {'type': 'string', 'required': False, 'default': AGENT_LAYOUT,
+                       'allowed': [AGENT_LAYOUT, STEP_LAYOUT]},
+    "storage": {'type': 'string', 'required': False, 'default': MONGODB_STORAGE,
+                'allowed': [MONGODB_STORAGE, LOCAL_STORAGE]},
+    "storage_path": {'type': 'string', 'required': False, 'default': 'results'},
+    "keyframe_interval": {'type': 'integer', 'required': False, 'default': 0, 'min': 0},
+    "coalesce_states": {'type': 'boolean', 'required': False, 'default': False},
+    "event_transport": {'type': 'string', 'required': False, 'default': REDIS_TRANSPORT,
+                        'allowed': [REDIS_TRANSPORT, IN_PROCESS_TRANSPORT, UNIX_SOCKET_TRANSPORT]},
+    "event_socket_path": {'type': 'string', 'required': False, 'default': 'aries.sock'},
+    "states": {'type': 'string', 'required': False, 'default': '', "empty": True},
+    "poll_events": {'type': 'boolean', 'required': False, 'default': True},
+    "real_time_factor": {'type': 'float', 'required': False, 'default': 0.0, 'min': 0},
+    "overrun_policy": {'type': 'string', 'required': False, 'default': CATCH_UP_POLICY,
+                       'allowed': [CATCH_UP_POLICY, SKIP_POLICY]},
 }
 config_validator = cerberus.Validator(config_schema)
 
@@ -32,13 +52,31 @@ class Config(object):
     redis_port = None
     solver_type = None
     clusters = None
+    vectorized = None
+    warm_start = None
+    storage_batch_size = None
+    storage_layout = None
+    storage = None
+    storage_path = None
+    keyframe_interval = None
+    coalesce_states = None
+    event_transport = None
+    event_socket_path = None
+    states = None
+    poll_events = None
+    real_time_factor = None
+    overrun_policy = None
 
     def __init__(self, params_dict):
         self.__dict__ = params_dict
 
     @classmethod
     def from_properties(cls, topology, grid_elements, simulation_steps, latency, mongodb_uri,
-                        redis_host, redis_port, solver_type, clusters=None):
+                        redis_host, redis_port, solver_type, clusters=None, vectorized=False,
+                        warm_start=False, storage_batch_size=0, storage_layout=AGENT_LAYOUT,
+                        storage=MONGODB_STORAGE, storage_path='results', keyframe_interval=0,
+                        coalesce_states=False, event_transport=REDIS_TRANSPORT, event_socket_path='aries.sock',
+                        states='', poll_events=True, real_time_factor=0.0, overrun_policy=CATCH_UP_POLICY):
         """Initialization from parameters"""
         return cls({"topology": topology,
                     "grid_elements": grid_elements,
@@ -48,7 +86,21 @@ class Config(object):
                     "redis_host": redis_host,
                     "redis_port": redis_port,
                     "solver_type": solver_type,
-                    "clusters": clusters})
+                    "clusters": clusters,
+                    "vectorized": vectorized,
+                    "warm_start": warm_start,
+                    "storage_batch_size": storage_batch_size,
+                    "storage_layout": storage_layout,
+                    "storage": storage,
+                    "storage_path": storage_path,
+                    "keyframe_interval": keyframe_interval,
+                    "coalesce_states": coalesce_states,
+                    "event_transport": event_transport,
+                    "event_socket_path": event_socket_path,
+                    "states": states,
+                    "poll_events": poll_events,
+                    "real_time_factor": real_time_factor,
+                    "overrun_policy": overrun_policy})
 
     @classmethod
     def load(cls, j):
@@ -63,7 +115,21 @@ class Config(object):
                                    redis_host=j["redis_host"],
                                    redis_port=j['redis_port'],
                                    solver_type=j['solver_type'],
-                                   clusters=j['clusters'])
+                                   clusters=j['clusters'],
+                                   vectorized=j['vectorized'],
+                                   warm_start=j['warm_start'],
+                                   storage_batch_size=j['storage_batch_size'],
+                                   storage_layout=j['storage_layout'],
+                                   storage=j['storage'],
+                                   storage_path=j['storage_path'],
+                                   keyframe_interval=j['keyframe_interval'],
+                                   coalesce_states=j['coalesce_states'],
+                                   event_transport=j['event_transport'],
+                                   event_socket_path=j['event_socket_path'],
+                                   states=j['states'],
+                                   poll_events=j['poll_events'],
+                                   real_time_factor=j['real_time_factor'],
+                                   overrun_policy=j['overrun_policy'])
 
     def dump(self):
         """Dump object to json string"""
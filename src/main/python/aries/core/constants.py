@@ -11,4 +11,22 @@ TIME_SCALE = 1  # 1 step of simulation is 1 second
 # Solver types
 LINEAR_SOLVER = "linear"
 NON_LINEAR_SOLVER = "non_linear"
+SWEEP_SOLVER = "sweep"  # Backward/forward sweep for radial grids
 CUSTOM_SOLVER = "custom"  # Provided by user
+
+# Storage layouts of agents
+AGENT_LAYOUT = "agent"  # One document per agent per step
+STEP_LAYOUT = "step"  # One document per step with all agents embedded
+
+# Storage types
+MONGODB_STORAGE = "mongodb"
+LOCAL_STORAGE = "local"  # Columnar files in local directory
+
+# Event transports
+REDIS_TRANSPORT = "redis"
+IN_PROCESS_TRANSPORT = "in_process"  # Controllers run in simulation process
+UNIX_SOCKET_TRANSPORT = "unix_socket"  # Controllers run on the same machine
+
+# Policies of real-time pacing for steps which overrun their period
+CATCH_UP_POLICY = "catch_up"  # Missed steps are run back to back until simulation is on time again
+SKIP_POLICY = "skip"  # Missed steps are skipped, simulation time jumps to wall clock
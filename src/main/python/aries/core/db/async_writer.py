@@ -0,0 +1,111 @@
+"""Background writer of simulation results, simulation steps are batched and written in order"""
+import collections
+import logging
+import queue
+import threading
+
+from aries.core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of results in the queue
+_STOP = object()
+
+# Summary of step timings in the queue, it is written after results put before it
+StepTimings = collections.namedtuple('StepTimings', ['simulation_id', 'step_timings'])
+
+
+class AsyncWriter(object):
+    """Write simulation results to storage in background thread.
+
+    Results are put into bounded queue, so simulation is blocked if storage can not keep up (backpressure). Writer
+    thread takes up to batch_size results from queue and writes them with storage.write_simulation_results.
+    """
+    storage = None
+    batch_size = None
+    queue = None
+    thread = None
+    error = None
+
+    def __init__(self, storage, batch_size=16, max_queue_size=None):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size if max_queue_size is not None else 4 * batch_size)
+        self.thread = threading.Thread(target=self.run, name='aries-storage-writer', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Write results from queue until it is closed"""
+        stopped = False
+        while not stopped:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                stopped = True
+                batch.pop()
+            try:
+                if batch and self.error is None:
+                    self.write_batch(batch)
+            except Exception as e:
+                logger.exception(e)
+                self.error = e
+            finally:
+                for _ in range(len(batch) + (1 if stopped else 0)):
+                    self.queue.task_done()
+
+    def write_batch(self, batch):
+        """Write results of batch in bulk and step timings in between them in order"""
+        results = []
+        for item in batch:
+            if isinstance(item, StepTimings):
+                if results:
+                    self.storage.write_simulation_results(results)
+                    results = []
+                self.storage.write_step_timings(item.simulation_id, item.step_timings)
+            else:
+                results.append(item)
+        if results:
+            self.storage.write_simulation_results(results)
+
+    def check_error(self):
+        """Raise error of writer thread, results after it are not written"""
+        if self.error is not None:
+            raise StorageError("Writing of simulation results failed") from self.error
+
+    def write_simulation_result(self, simulation_step, simulation_id, simulation_result, agents_states,
+                                total_pv_power, agents):
+        """Put simulation result into queue, agents are dumped now because they change during next steps"""
+        self.check_error()
+        if not self.thread.is_alive():
+            raise StorageError("Writer is closed")
+        self.queue.put({
+            'simulation_step': simulation_step,
+            'simulation_id': simulation_id,
+            'simulation_result': simulation_result,
+            'agents_states': agents_states,
+            'total_pv_power': total_pv_power,
+            'agents': {name: agent.to_dict() for name, agent in agents.items()}
+        })
+
+    def write_step_timings(self, simulation_id, step_timings):
+        """Put summary of step timings into queue"""
+        self.check_error()
+        if not self.thread.is_alive():
+            raise StorageError("Writer is closed")
+        self.queue.put(StepTimings(simulation_id, step_timings))
+
+    def flush(self):
+        """Wait until all results in queue are written"""
+        self.queue.join()
+        self.check_error()
+
+    def close(self):
+        """Write all results in queue and stop writer thread"""
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        self.check_error()
@@ -10,7 +10,7 @@ class DB(object):
     def write_simulation(self, agents, lines, paths, nodes, solver):
         pass
 
-    def write_agents(self, agents, simulation_step_id, simulation_id):
+    def write_agents(self, agents, simulation_step_id, simulation_id, simulation_step=None):
         pass
 
     def write_lines(self, lines):
@@ -18,3 +18,21 @@ class DB(object):
 
     def write_simulation_step(self, simulation_step, simulation_id, simulation_result):
         pass
+
+    def write_simulation_results(self, simulation_results):
+        pass
+
+    def finalize_simulation_step(self, simulation_step_id):
+        pass
+
+    def write_states(self, states, simulation_id, simulation_step, is_applied):
+        pass
+
+    def write_clusters(self, clusters, simulation_id, simulation_step, is_applied):
+        pass
+
+    def write_step_timings(self, simulation_id, step_timings):
+        pass
+
+    def close(self):
+        pass
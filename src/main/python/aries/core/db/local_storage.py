@@ -0,0 +1,241 @@
+"""Local columnar storage, simulation results are appended to raw float64 array files which are memory-mapped back"""
+import json
+import numbers
+import os
+
+import numpy as np
+from bson import ObjectId, json_util
+
+from aries.core.db.db import DB
+from aries.core.exceptions import StorageError
+from aries.core.grid.grid_utils import dict_to_documents
+
+METADATA_FILE = 'metadata.json'
+SIMULATION_FILE = 'simulation.json'
+EVENTS_FILE = 'events.json'
+STEP_TIMINGS_FILE = 'step_timings.json'
+TABLE_FILE = '{}.f8'
+
+# Tables of simulation step, every row is one simulation step
+SIMULATION_STEP = 'simulation_step'
+SIMULATION_RESULT = 'simulation_result'
+AGENTS_STATES = 'agents_states'
+AGENTS = 'agents'
+TABLES = [SIMULATION_STEP, SIMULATION_RESULT, AGENTS_STATES, AGENTS]
+FIELD_SEPARATOR = '/'
+
+
+def flatten(obj, prefix='', result=None):
+    """Flatten nested dictionary into {'key/nested_key': value}, only numeric values are kept"""
+    if result is None:
+        result = {}
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            flatten(value, prefix=prefix + FIELD_SEPARATOR + str(key) if prefix else str(key), result=result)
+    elif isinstance(obj, numbers.Complex) and not isinstance(obj, numbers.Real):
+        result[prefix + FIELD_SEPARATOR + 'real'] = float(obj.real)
+        result[prefix + FIELD_SEPARATOR + 'imag'] = float(obj.imag)
+    elif isinstance(obj, numbers.Number):
+        result[prefix] = float(obj)
+    return result
+
+
+class LocalStorage(DB):
+    """Storage of simulation in local directory, one subdirectory per simulation.
+
+    Each table is a raw row-major float64 file with one row per simulation step, its fields are stored in metadata.
+    Fields appearing after the first step are appended as new columns, earlier steps get NaN. Rows are kept in memory
+    and appended in chunks of chunk_size steps.
+    """
+
+    def __init__(self, path, chunk_size=1000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.simulation_path = None
+        self.metadata = None
+        self.rows = None
+        self.step_rows = None
+        # Fields of tables as sets and number of columns of table files
+        self.known_fields = None
+        self.stored_widths = None
+
+    def write_simulation(self, agents, lines, paths, nodes, solver, clusters=None):
+        """Create directory of simulation and store its grid"""
+        self.close()
+        simulation_id = ObjectId()
+        self.simulation_path = os.path.join(self.path, str(simulation_id))
+        os.makedirs(self.simulation_path)
+        simulation = {
+            '_id': simulation_id,
+            'agents': dict_to_documents(agents),
+            'lines': dict_to_documents(lines),
+            'paths': dict_to_documents(paths),
+            'nodes': dict_to_documents(nodes),
+            'solver': solver,
+            'clusters': dict_to_documents(clusters) if clusters else None
+        }
+        with open(os.path.join(self.simulation_path, SIMULATION_FILE), 'w') as f:
+            f.write(json_util.dumps(simulation))
+        self.metadata = {'simulation_id': str(simulation_id), 'steps': 0, 'fields': {}}
+        self.rows = {table: [] for table in TABLES}
+        self.step_rows = {}
+        self.known_fields = {table: set() for table in TABLES}
+        self.stored_widths = {table: 0 for table in TABLES}
+        self.write_metadata()
+        return simulation_id
+
+    def write_metadata(self):
+        with open(os.path.join(self.simulation_path, METADATA_FILE), 'w') as f:
+            json.dump(self.metadata, f)
+
+    def check_simulation(self):
+        if self.simulation_path is None:
+            raise StorageError("Simulation is not written to local storage")
+
+    def write_simulation_step(self, simulation_step, simulation_id, simulation_result, agents_states, total_pv_power):
+        """Keep simulation step until its agents are written"""
+        self.check_simulation()
+        simulation_step_id = ObjectId()
+        self.step_rows[simulation_step_id] = {
+            SIMULATION_STEP: {'simulation_step': simulation_step, 'total_pv_power': total_pv_power},
+            SIMULATION_RESULT: flatten(simulation_result),
+            AGENTS_STATES: flatten(agents_states),
+            AGENTS: {}
+        }
+        return simulation_step_id
+
+    def write_agents(self, agents, simulation_step_id, simulation_id, simulation_step=None):
+        """Keep agents of simulation step"""
+        self.step_rows[simulation_step_id][AGENTS] = flatten({name: agent.to_dict() for name, agent in agents.items()})
+
+    def finalize_simulation_step(self, simulation_step_id):
+        self.append_step(self.step_rows.pop(simulation_step_id))
+
+    def write_simulation_results(self, simulation_results):
+        """Append several simulation steps, agents are already dumped to dictionaries"""
+        self.check_simulation()
+        for result in simulation_results:
+            self.append_step({
+                SIMULATION_STEP: {'simulation_step': result['simulation_step'],
+                                  'total_pv_power': result['total_pv_power']},
+                SIMULATION_RESULT: flatten(result['simulation_result']),
+                AGENTS_STATES: flatten(result['agents_states']),
+                AGENTS: flatten(result['agents'])
+            })
+
+    def append_step(self, step_rows):
+        """Append row of every table, new fields of the table are added after the known ones"""
+        for table, row in step_rows.items():
+            fields = self.metadata['fields'].setdefault(table, [])
+            known = self.known_fields[table]
+            if not known.issuperset(row):
+                fields.extend(field for field in row if field not in known)
+                known.update(row)
+            self.rows[table].append([row.get(field, np.nan) for field in fields])
+        if len(self.rows[SIMULATION_STEP]) >= self.chunk_size:
+            self.flush()
+
+    def widen_table(self, table, width):
+        """Rewrite table file with NaN columns of fields which appeared after its steps were stored"""
+        table_path = os.path.join(self.simulation_path, TABLE_FILE.format(table))
+        steps = self.metadata['steps']
+        stored = np.full((steps, width), np.nan)
+        if self.stored_widths[table] > 0 and steps > 0:
+            stored[:, :self.stored_widths[table]] = np.fromfile(table_path, dtype=np.float64).reshape(steps, -1)
+        stored.tofile(table_path)
+
+    def flush(self):
+        """Append kept rows to table files"""
+        if self.simulation_path is None or not self.rows[SIMULATION_STEP]:
+            return
+        for table, rows in self.rows.items():
+            width = len(self.metadata['fields'].get(table, []))
+            if width == 0:
+                continue
+            if self.stored_widths[table] < width:
+                self.widen_table(table, width)
+                self.stored_widths[table] = width
+            with open(os.path.join(self.simulation_path, TABLE_FILE.format(table)), 'ab') as f:
+                for row in rows:
+                    row.extend([np.nan] * (width - len(row)))
+                np.asarray(rows, dtype=np.float64).reshape(len(rows), width).tofile(f)
+        self.metadata['steps'] += len(self.rows[SIMULATION_STEP])
+        self.rows = {table: [] for table in TABLES}
+        self.write_metadata()
+
+    def write_events(self, event_type, events, simulation_id, simulation_step, is_applied):
+        self.check_simulation()
+        with open(os.path.join(self.simulation_path, EVENTS_FILE), 'a') as f:
+            f.write(json_util.dumps({'type': event_type, event_type: events, 'simulation_step': simulation_step,
+                                     'is_applied': is_applied}) + '\n')
+
+    def write_states(self, states, simulation_id, simulation_step, is_applied):
+        """Append state's events to events file"""
+        self.write_events('states', states, simulation_id, simulation_step, is_applied)
+
+    def write_clusters(self, clusters, simulation_id, simulation_step, is_applied):
+        """Append cluster's events to events file"""
+        self.write_events('clusters', clusters, simulation_id, simulation_step, is_applied)
+
+    def write_step_timings(self, simulation_id, step_timings):
+        """Replace summary of step timings"""
+        self.check_simulation()
+        with open(os.path.join(self.simulation_path, STEP_TIMINGS_FILE), 'w') as f:
+            json.dump(step_timings, f)
+
+    def close(self):
+        """Write rest of rows of current simulation"""
+        self.flush()
+
+
+class LocalStorageReader(object):
+    """Read simulation stored by LocalStorage, tables are memory-mapped"""
+
+    def __init__(self, simulation_path):
+        self.simulation_path = simulation_path
+        with open(os.path.join(simulation_path, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+
+    @property
+    def steps(self):
+        return self.metadata['steps']
+
+    def fields(self, table):
+        """Names of the fields (columns) of table"""
+        return self.metadata['fields'].get(table, [])
+
+    def read_simulation(self):
+        """Read grid of simulation"""
+        with open(os.path.join(self.simulation_path, SIMULATION_FILE)) as f:
+            return json_util.loads(f.read())
+
+    def read_events(self):
+        """Read state's and cluster's events"""
+        events_path = os.path.join(self.simulation_path, EVENTS_FILE)
+        if not os.path.isfile(events_path):
+            return []
+        with open(events_path) as f:
+            return [json_util.loads(line) for line in f]
+
+    def read_step_timings(self):
+        """Read summary of step timings"""
+        step_timings_path = os.path.join(self.simulation_path, STEP_TIMINGS_FILE)
+        if not os.path.isfile(step_timings_path):
+            return None
+        with open(step_timings_path) as f:
+            return json.load(f)
+
+    def read_table(self, table):
+        """Memory-map table as array of shape (steps, fields)"""
+        fields = self.fields(table)
+        if self.steps == 0 or not fields:
+            return np.zeros((self.steps, len(fields)))
+        return np.memmap(os.path.join(self.simulation_path, TABLE_FILE.format(table)), dtype=np.float64, mode='r',
+                         shape=(self.steps, len(fields)))
+
+    def read_field(self, table, field):
+        """Values of field over all simulation steps"""
+        fields = self.fields(table)
+        if field not in fields:
+            raise StorageError("Field {} is not stored in table {}".format(field, table))
+        return self.read_table(table)[:, fields.index(field)]
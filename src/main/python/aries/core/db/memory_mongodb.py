@@ -0,0 +1,206 @@
+"""In-process stand-in of MongoDB client, implements the subset of pymongo used by MongoDB storage"""
+import collections
+import copy
+import threading
+import time
+
+import pymongo
+from bson import ObjectId
+
+InsertOneResult = collections.namedtuple('InsertOneResult', ['inserted_id'])
+InsertManyResult = collections.namedtuple('InsertManyResult', ['inserted_ids'])
+UpdateResult = collections.namedtuple('UpdateResult', ['matched_count', 'modified_count'])
+DeleteResult = collections.namedtuple('DeleteResult', ['deleted_count'])
+
+
+def matches(document, query):
+    """Check if document matches query of equalities and $in, $ne, $lt, $lte, $gt and $gte operators"""
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict) and any(operator.startswith('$') for operator in condition):
+            for operator, operand in condition.items():
+                if operator == '$in':
+                    if value not in operand:
+                        return False
+                elif operator == '$ne':
+                    if value == operand:
+                        return False
+                elif value is None:
+                    return False
+                elif operator == '$lt':
+                    if not value < operand:
+                        return False
+                elif operator == '$lte':
+                    if not value <= operand:
+                        return False
+                elif operator == '$gt':
+                    if not value > operand:
+                        return False
+                elif operator == '$gte':
+                    if not value >= operand:
+                        return False
+                else:
+                    raise ValueError("Query operator {} is not supported".format(operator))
+        elif value != condition:
+            return False
+    return True
+
+
+def project(document, projection):
+    """Copy of document with fields of projection {field: 1} and _id, whole document if projection is None"""
+    if projection is None:
+        return copy.deepcopy(document)
+    return {key: copy.deepcopy(value) for key, value in document.items()
+            if key == '_id' or projection.get(key)}
+
+
+class MemoryCursor(object):
+    """Cursor of find, query is run with the first read, after sort and limit are set"""
+
+    def __init__(self, collection, query, projection):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self.sort_keys = []
+        self.limit_count = 0
+        self.documents = None
+
+    def sort(self, key, direction=pymongo.ASCENDING):
+        """Sort by key and direction, or by list of (key, direction)"""
+        self.sort_keys = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def limit(self, limit_count):
+        self.limit_count = limit_count
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.documents is None:
+            self.documents = iter(self.collection.find_documents(self.query, self.projection, self.sort_keys,
+                                                                 self.limit_count))
+        return next(self.documents)
+
+
+class MemoryCollection(object):
+    """Documents of one collection in insertion order"""
+
+    def __init__(self, client):
+        self.client = client
+        self.documents = []
+        self.indexes = []
+
+    def create_index(self, keys):
+        """Indexes are only recorded, every query scans the collection"""
+        with self.client.round_trip():
+            if keys not in self.indexes:
+                self.indexes.append(keys)
+        return '_'.join('{}_{}'.format(key, direction) for key, direction in keys)
+
+    def insert_one(self, document):
+        """Insert copy of document, _id is set on document if it is missing like in pymongo"""
+        with self.client.round_trip():
+            document.setdefault('_id', ObjectId())
+            self.documents.append(copy.deepcopy(document))
+        return InsertOneResult(document['_id'])
+
+    def insert_many(self, documents):
+        with self.client.round_trip():
+            for document in documents:
+                document.setdefault('_id', ObjectId())
+                self.documents.append(copy.deepcopy(document))
+        return InsertManyResult([document['_id'] for document in documents])
+
+    def find(self, query=None, projection=None):
+        return MemoryCursor(self, query or {}, projection)
+
+    def find_one(self, query=None, projection=None):
+        documents = self.find_documents(query or {}, projection, limit_count=1)
+        return documents[0] if documents else None
+
+    def find_documents(self, query, projection, sort_keys=(), limit_count=0):
+        """Copies of matching documents, sorted and limited"""
+        with self.client.round_trip():
+            documents = [document for document in self.documents if matches(document, query)]
+        # Sort by the last key first, stable sort keeps order of the previous keys
+        for key, direction in reversed(sort_keys):
+            documents.sort(key=lambda document: document.get(key), reverse=direction == pymongo.DESCENDING)
+        if limit_count:
+            documents = documents[:limit_count]
+        return [project(document, projection) for document in documents]
+
+    def update_one(self, query, update):
+        return self.update_documents(query, update, multi=False)
+
+    def update_many(self, query, update):
+        return self.update_documents(query, update, multi=True)
+
+    def update(self, query, update, multi=False):
+        """Legacy update of pymongo"""
+        return self.update_documents(query, update, multi=multi)
+
+    def update_documents(self, query, update, multi):
+        """Apply $set of update to matching documents"""
+        if set(update) - {'$set'}:
+            raise ValueError("Update operators {} are not supported".format(set(update) - {'$set'}))
+        matched = 0
+        with self.client.round_trip():
+            for document in self.documents:
+                if not matches(document, query):
+                    continue
+                matched += 1
+                document.update(copy.deepcopy(update.get('$set', {})))
+                if not multi:
+                    break
+        return UpdateResult(matched, matched)
+
+    def delete_many(self, query):
+        with self.client.round_trip():
+            kept = [document for document in self.documents if not matches(document, query)]
+            deleted = len(self.documents) - len(kept)
+            self.documents = kept
+        return DeleteResult(deleted)
+
+
+class MemoryDatabase(object):
+    """Collections of one database, created on first access"""
+
+    def __init__(self, client):
+        self.client = client
+        self.collections = {}
+
+    def __getitem__(self, name):
+        with self.client.lock:
+            if name not in self.collections:
+                self.collections[name] = MemoryCollection(self.client)
+            return self.collections[name]
+
+
+class MemoryMongoClient(object):
+    """Stand-in of pymongo.MongoClient keeping documents in this process.
+
+    Every operation is one round trip, which is delayed by latency seconds to model the network and the server.
+    Documents are copied in and out, so they are not shared with the caller like in pymongo.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.databases = {}
+        self.round_trips = 0
+
+    def __getitem__(self, name):
+        with self.lock:
+            if name not in self.databases:
+                self.databases[name] = MemoryDatabase(self)
+            return self.databases[name]
+
+    def round_trip(self):
+        """Count round trip, wait for latency and return lock of documents"""
+        with self.lock:
+            self.round_trips += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return self.lock
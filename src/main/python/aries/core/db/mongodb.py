@@ -1,56 +1,114 @@
 """MongoDB implementation of storage"""
+import copy
 import datetime
 
 import pymongo
+from bson import ObjectId, json_util
 
+from aries.core import utils
+from aries.core.constants import AGENT_LAYOUT, STEP_LAYOUT
 from aries.core.db.db import DB
-from aries.core.grid.grid_utils import dict_to_json
+from aries.core.grid.grid_utils import dict_to_documents
 
 DATABASE = 'aries'
 SIMULATION = 'simulation'
 SIMULATION_STEP = 'simulation_step'
 AGENTS = 'agents'
+AGENTS_STEP = 'agents_step'
 STATE_QUEUE = 'state_queue'
 CLUSTER_QUEUE = 'cluster_queue'
 
 
+# Indexes of the queries of storage and webapp, (collection, keys)
+INDEXES = [
+    (SIMULATION, [('start_time', pymongo.DESCENDING)]),
+    (SIMULATION_STEP, [('simulation_id', pymongo.ASCENDING), ('simulation_step', pymongo.ASCENDING)]),
+    (AGENTS, [('simulation_step_id', pymongo.ASCENDING)]),
+    # Agents of simulation are found by prefix of this index too
+    (AGENTS, [('simulation_id', pymongo.ASCENDING), ('name', pymongo.ASCENDING),
+              ('simulation_step', pymongo.ASCENDING)]),
+    (AGENTS_STEP, [('simulation_id', pymongo.ASCENDING)]),
+    (STATE_QUEUE, [('simulation_id', pymongo.ASCENDING), ('simulation_step', pymongo.ASCENDING)]),
+    (CLUSTER_QUEUE, [('simulation_id', pymongo.ASCENDING), ('is_applied', pymongo.ASCENDING),
+                     ('_id', pymongo.ASCENDING)]),
+    (CLUSTER_QUEUE, [('is_applied', pymongo.ASCENDING)]),
+]
+# Indexes of rebuilding delta encoded agents, agents are written with them only if keyframe_interval > 0
+DELTA_INDEXES = [
+    (AGENTS, [('simulation_id', pymongo.ASCENDING), ('keyframe', pymongo.ASCENDING),
+              ('simulation_step', pymongo.ASCENDING)]),
+    (AGENTS, [('simulation_id', pymongo.ASCENDING), ('simulation_step', pymongo.ASCENDING)]),
+]
+
+
+def from_document(value):
+    """Elements were stored as JSON strings before they were stored as subdocuments"""
+    return json_util.loads(value) if isinstance(value, str) else value
+
+
 class MongoDB(DB):
     """MongoDB storage"""
 
-    def __init__(self, url=None, client=None):
+    def __init__(self, url=None, client=None, layout=AGENT_LAYOUT, keyframe_interval=0):
         if url is not None:
             self.client = pymongo.MongoClient(url)
         else:
             self.client = client
+        # Layout of written agents, both layouts are read
+        self.layout = layout
+        # In agent layout full agents are written every keyframe_interval steps and only changed fields in between
+        self.keyframe_interval = keyframe_interval
+        self.last_agents = {}
+        self.agents_steps = 0
+
+    def create_indexes(self):
+        """Create indexes of INDEXES (and DELTA_INDEXES with delta encoding), already existing indexes are kept"""
+        indexes = INDEXES + DELTA_INDEXES if self.keyframe_interval > 0 else INDEXES
+        for collection, keys in indexes:
+            self.client[DATABASE][collection].create_index(keys)
 
     def get_active_simulation(self):
-        return self.client[DATABASE][SIMULATION].find({}).sort('$natural', -1).limit(1)
+        return self.client[DATABASE][SIMULATION].find({}).sort('start_time', pymongo.DESCENDING).limit(1)
 
     def write_simulation(self, agents, lines, paths, nodes, solver, clusters=None):
         """Store simulation start step"""
         simulation = {
-            'agents': dict_to_json(agents),
-            'lines': dict_to_json(lines),
-            'paths': dict_to_json(paths),
-            'nodes': dict_to_json(nodes),
+            'agents': dict_to_documents(agents),
+            'lines': dict_to_documents(lines),
+            'paths': dict_to_documents(paths),
+            'nodes': dict_to_documents(nodes),
             'start_time': datetime.datetime.utcnow(),
             'solver': solver,
-            'clusters': dict_to_json(clusters) if clusters else None
+            'clusters': dict_to_documents(clusters) if clusters else None,
+            'layout': self.layout,
+            'keyframe_interval': self.keyframe_interval
         }
+        self.last_agents = {}
+        self.agents_steps = 0
         return self.client[DATABASE][SIMULATION].insert_one(simulation).inserted_id
 
     def get_active_simulation_step(self):
         """Get current simulation_step by simulation id"""
-        return self.client[DATABASE][SIMULATION_STEP].find().sort('$natural', -1).limit(1)
+        return self.client[DATABASE][SIMULATION_STEP].find().sort('_id', pymongo.DESCENDING).limit(1)
 
     def get_last_active_sumulation_step(self, simulation_id, number_of_steps):
         """Get current simulation_step by simulation id"""
-        return self.client[DATABASE][SIMULATION_STEP].find({'simulation_id': simulation_id}).sort('$natural', -1).limit(
-            number_of_steps)
+        return self.client[DATABASE][SIMULATION_STEP].find({'simulation_id': simulation_id}).sort(
+            'simulation_step', pymongo.DESCENDING).limit(number_of_steps)
 
     def get_simulation_step_by_simulation(self, simulation_id):
         """Get simulation step by simulation id"""
-        return self.client[DATABASE][SIMULATION_STEP].find({'simulation_id': simulation_id})
+        return self.client[DATABASE][SIMULATION_STEP].find({'simulation_id': simulation_id}).sort(
+            'simulation_step', pymongo.ASCENDING)
+
+    def write_step_timings(self, simulation_id, step_timings):
+        """Replace summary of step timings of simulation"""
+        self.client[DATABASE][SIMULATION].update_one({'_id': simulation_id}, {'$set': {'step_timings': step_timings}})
+
+    def get_step_timings(self, simulation_id):
+        """Get summary of step timings of simulation, None if it is not stored"""
+        simulation = self.client[DATABASE][SIMULATION].find_one({'_id': simulation_id}, {'step_timings': 1})
+        return simulation.get('step_timings') if simulation is not None else None
 
     def write_simulation_step(self, simulation_step, simulation_id, simulation_result, agents_states, total_pv_power):
         """Store simulation step"""
@@ -59,15 +117,138 @@ class MongoDB(DB):
              'simulation_result': simulation_result, 'agents_states': agents_states, 'total_pv_power': total_pv_power,
              'valid': False}).inserted_id
 
+    def write_simulation_results(self, simulation_results):
+        """Store several simulation steps with their agents in bulk, agents are already dumped to dictionaries"""
+        simulation_steps = []
+        agents_to_db = []
+        agents_steps = []
+        for result in simulation_results:
+            simulation_step_id = ObjectId()
+            simulation_steps.append(
+                {'_id': simulation_step_id, 'simulation_step': result['simulation_step'],
+                 'simulation_id': result['simulation_id'], 'simulation_result': result['simulation_result'],
+                 'agents_states': result['agents_states'], 'total_pv_power': result['total_pv_power'],
+                 'valid': False})
+            if self.layout == STEP_LAYOUT:
+                agents_steps.append(self.agents_step_document(
+                    result['agents'], simulation_step_id=simulation_step_id, simulation_id=result['simulation_id']))
+                continue
+            agents_to_db.extend(self.agents_documents(result['agents'], simulation_step_id=simulation_step_id,
+                                                      simulation_id=result['simulation_id'],
+                                                      simulation_step=result['simulation_step']))
+        simulation_step_ids = [simulation_step['_id'] for simulation_step in simulation_steps]
+        if not simulation_steps:
+            return simulation_step_ids
+        self.client[DATABASE][SIMULATION_STEP].insert_many(simulation_steps)
+        if agents_to_db:
+            self.client[DATABASE][AGENTS].insert_many(agents_to_db)
+        if agents_steps:
+            self.client[DATABASE][AGENTS_STEP].insert_many(agents_steps)
+        self.client[DATABASE][SIMULATION_STEP].update_many({'_id': {'$in': simulation_step_ids}},
+                                                           {'$set': {'valid': True}})
+        return simulation_step_ids
+
     def finalize_simulation_step(self, simulation_step_id):
         self.client[DATABASE][SIMULATION_STEP].update({'_id': simulation_step_id}, {'$set': {'valid': True}})
 
     def get_agents_by_simulation_step(self, simulation_step_id):
+        """Get agents of simulation step in one document per agent form, whatever layout they are stored in"""
+        agents_step = self.client[DATABASE][AGENTS_STEP].find_one({'_id': simulation_step_id})
+        if agents_step is not None:
+            return self.expand_agents_step(agents_step)
+        simulation_step = self.client[DATABASE][SIMULATION_STEP].find_one({'_id': simulation_step_id},
+                                                                          {'simulation_id': 1, 'simulation_step': 1})
+        if simulation_step is not None and self.is_delta_encoded(simulation_step['simulation_id']):
+            return self.get_agents_by_simulation_step_number(simulation_id=simulation_step['simulation_id'],
+                                                             simulation_step=simulation_step['simulation_step'])
         return self.client[DATABASE][AGENTS].find({'simulation_step_id': simulation_step_id})
 
     def get_agents_by_simulation(self, simulation_id):
+        """Get agents of all simulation steps in one document per agent form, whatever layout they are stored in"""
+        simulation = self.client[DATABASE][SIMULATION].find_one({'_id': simulation_id},
+                                                                {'layout': 1, 'keyframe_interval': 1})
+        if simulation is not None and simulation.get('layout') == STEP_LAYOUT:
+            agents_steps = self.client[DATABASE][AGENTS_STEP].find({'simulation_id': simulation_id})
+            return (agent for agents_step in agents_steps for agent in self.expand_agents_step(agents_step))
+        if simulation is not None and simulation.get('keyframe_interval'):
+            return self.rebuild_agents(simulation_id=simulation_id)
         return self.client[DATABASE][AGENTS].find({'simulation_id': simulation_id})
 
+    def is_delta_encoded(self, simulation_id):
+        simulation = self.client[DATABASE][SIMULATION].find_one({'_id': simulation_id}, {'keyframe_interval': 1})
+        return simulation is not None and bool(simulation.get('keyframe_interval'))
+
+    def get_agents_by_simulation_step_number(self, simulation_id, simulation_step):
+        """Rebuild full agents at simulation step from the last keyframe and following deltas"""
+        keyframes = self.client[DATABASE][AGENTS].find(
+            {'simulation_id': simulation_id, 'keyframe': True, 'simulation_step': {'$lte': simulation_step}},
+            {'simulation_step': 1}).sort('simulation_step', -1).limit(1)
+        keyframe = next(keyframes, None)
+        if keyframe is None:
+            return []
+        agents = self.rebuild_agents(simulation_id=simulation_id, from_step=keyframe['simulation_step'],
+                                     to_step=simulation_step)
+        return [agent for agent in agents if agent['simulation_step'] == simulation_step]
+
+    def get_agent_by_simulation_step_number(self, simulation_id, name, simulation_step):
+        """Rebuild full agent (dictionary) at simulation step from the last keyframe and following deltas"""
+        deltas = []
+        agents = self.client[DATABASE][AGENTS].find(
+            {'simulation_id': simulation_id, 'name': name, 'simulation_step': {'$lte': simulation_step}})
+        for agent in agents.sort('simulation_step', -1):
+            deltas.append(from_document(agent['agent']))
+            if agent.get('keyframe', True):
+                break
+        else:
+            return None
+        agent = deltas.pop()
+        for delta in reversed(deltas):
+            utils.merge_dict(agent, delta)
+        return agent
+
+    def rebuild_agents(self, simulation_id, from_step=None, to_step=None):
+        """Yield full agents of every simulation step, from_step has to be keyframe"""
+        step_range = {}
+        if from_step is not None:
+            step_range['$gte'] = from_step
+        if to_step is not None:
+            step_range['$lte'] = to_step
+        search_dict = {'simulation_id': simulation_id}
+        if step_range:
+            search_dict['simulation_step'] = step_range
+        simulation_steps = self.client[DATABASE][SIMULATION_STEP].find(
+            search_dict, {'simulation_step': 1}).sort('simulation_step', 1)
+        agents_to_db = self.client[DATABASE][AGENTS].find(search_dict).sort('simulation_step', 1)
+
+        agents = {}
+        agent = next(agents_to_db, None)
+        for simulation_step in simulation_steps:
+            while agent is not None and agent['simulation_step'] <= simulation_step['simulation_step']:
+                agent_dict = from_document(agent['agent'])
+                if agent.get('keyframe', True) or agent['name'] not in agents:
+                    agents[agent['name']] = agent_dict
+                else:
+                    utils.merge_dict(agents[agent['name']], agent_dict)
+                agent = next(agents_to_db, None)
+            for name, agent_dict in agents.items():
+                yield {'name': name, 'agent': copy.deepcopy(agent_dict), 'simulation_step_id': simulation_step['_id'],
+                       'simulation_id': simulation_id, 'simulation_step': simulation_step['simulation_step']}
+
+    @staticmethod
+    def agents_step_document(agents, simulation_step_id, simulation_id):
+        """Document with all agents of simulation step, agents are dictionaries"""
+        return {
+            '_id': simulation_step_id,
+            'simulation_id': simulation_id,
+            'agents': [{'name': name, 'agent': agent} for name, agent in agents.items()]
+        }
+
+    @staticmethod
+    def expand_agents_step(agents_step):
+        """Split document of simulation step into one document per agent"""
+        return [{'name': agent['name'], 'agent': agent['agent'], 'simulation_step_id': agents_step['_id'],
+                 'simulation_id': agents_step['simulation_id']} for agent in agents_step['agents']]
+
     def get_agents_by_active_simulation(self):
         simulation_cursor = self.get_active_simulation()
         if simulation_cursor is not None:
@@ -76,17 +257,41 @@ class MongoDB(DB):
                 return self.get_agents_by_simulation(simulation_id=simulation['_id'])
         return None
 
-    def write_agents(self, agents, simulation_step_id, simulation_id):
+    def write_agents(self, agents, simulation_step_id, simulation_id, simulation_step=None):
         """Store agents for each simulation step"""
+        if self.layout == STEP_LAYOUT:
+            agents_step = self.agents_step_document(
+                {name: agent.to_dict() for name, agent in agents.items()},
+                simulation_step_id=simulation_step_id, simulation_id=simulation_id)
+            return self.client[DATABASE][AGENTS_STEP].insert_one(agents_step)
+        agents_to_db = self.agents_documents({name: agent.to_dict() for name, agent in agents.items()},
+                                             simulation_step_id=simulation_step_id, simulation_id=simulation_id,
+                                             simulation_step=simulation_step)
+        if not agents_to_db:
+            return None
+        return self.client[DATABASE][AGENTS].insert_many(agents_to_db)
+
+    def agents_documents(self, agents, simulation_step_id, simulation_id, simulation_step):
+        """One document per agent dictionary, in delta steps only changed fields of changed agents are kept"""
+        keyframe = self.keyframe_interval <= 0 or self.agents_steps % self.keyframe_interval == 0
+        self.agents_steps += 1
         agents_to_db = []
         for name, agent in agents.items():
-            agents_to_db.append({
-                'name': name,
-                'agent': agent.dump(),
-                'simulation_step_id': simulation_step_id,
-                'simulation_id': simulation_id
-            })
-        return self.client[DATABASE][AGENTS].insert_many(agents_to_db)
+            if self.keyframe_interval > 0:
+                last_agent = self.last_agents.get(name)
+                self.last_agents[name] = agent
+                if not keyframe and last_agent is not None:
+                    delta = utils.diff_dict(last_agent, agent)
+                    if not delta:
+                        continue
+                    agents_to_db.append({'name': name, 'agent': delta, 'keyframe': False,
+                                         'simulation_step_id': simulation_step_id, 'simulation_id': simulation_id,
+                                         'simulation_step': simulation_step})
+                    continue
+            agents_to_db.append({'name': name, 'agent': agent, 'keyframe': True,
+                                 'simulation_step_id': simulation_step_id, 'simulation_id': simulation_id,
+                                 'simulation_step': simulation_step})
+        return agents_to_db
 
     def write_states(self, states, simulation_id, simulation_step, is_applied):
         """Store state's events"""
@@ -133,16 +338,16 @@ class MongoDB(DB):
     def get_last_cluster_for_simulation_id(self, simulation_id):
         """Store cluster's events"""
         search_dict = {'simulation_id': simulation_id, 'is_applied': True}
-        return self.client[DATABASE][CLUSTER_QUEUE].find(search_dict).sort('$natural', -1).limit(1)
+        return self.client[DATABASE][CLUSTER_QUEUE].find(search_dict).sort('_id', pymongo.DESCENDING).limit(1)
 
     def get_last_cluster(self):
         """Store cluster's events"""
-        simulations = self.client[DATABASE][SIMULATION].find({}).sort('$natural', -1).limit(1)
+        simulations = self.get_active_simulation()
         if simulations:
             simulation = next(simulations)
             simulation_id = simulation['_id']
             search_dict = {'simulation_id': simulation_id, 'is_applied': True}
-            return self.client[DATABASE][CLUSTER_QUEUE].find(search_dict).sort('$natural', -1).limit(1)
+            return self.client[DATABASE][CLUSTER_QUEUE].find(search_dict).sort('_id', pymongo.DESCENDING).limit(1)
         return None
 
     def clear_clusters(self, simulation_id=None):
@@ -166,6 +371,8 @@ class MongoDB(DB):
             search_dict['simulation_id'] = simulation_id
         if simulation_step_id:
             search_dict['simulation_step_id'] = simulation_step_id
+        agents_step_search_dict = {'_id' if k == 'simulation_step_id' else k: v for k, v in search_dict.items()}
+        self.client[DATABASE][AGENTS_STEP].delete_many(agents_step_search_dict)
         return self.client[DATABASE][AGENTS].delete_many(search_dict)
 
     def clear_simulation_step(self, simulation_step_id=None, simulation_id=None):
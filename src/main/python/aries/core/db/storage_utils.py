@@ -0,0 +1,16 @@
+"""Helpers for creating storage from config"""
+from aries.core import utils
+from aries.core.constants import LOCAL_STORAGE
+from aries.core.db.local_storage import LocalStorage
+from aries.core.db.mongodb import MongoDB
+
+
+def create_storage(config, mongodb_client=None):
+    """Create storage of config, MongoDB is checked only if it is used"""
+    if config.storage == LOCAL_STORAGE:
+        return LocalStorage(path=config.storage_path)
+    if mongodb_client is None:
+        mongodb_client = utils.check_if_mongodb_is_running(config.mongodb_uri)
+    storage = MongoDB(client=mongodb_client, layout=config.storage_layout, keyframe_interval=config.keyframe_interval)
+    storage.create_indexes()
+    return storage
@@ -1,40 +1,96 @@
 import json
 
+from aries.core.event.transport import RedisTransport
+
 CLUSTER_QUEUE = 'cluster_queue'
 EVENT_QUEUE = 'event_queue'
+EVENT_STATES = 'event_states'
+
+
+def state_fields(states, path=()):
+    """Yield (path, value) of every leaf of states, path starts with agent name"""
+    for key, value in states.items():
+        if isinstance(value, str) and not path:
+            # State dumped to json string by State.dump()
+            value = json.loads(value)
+        if isinstance(value, dict):
+            yield from state_fields(value, path + (key,))
+        else:
+            yield path + (key,), value
 
 
 class EventQueue(object):
     redis = None
+    transport = None
+    cluster_queue = None
+    event_queue = None
+    event_states = None
+    coalesce = None
 
-    def __init__(self, redis):
+    def __init__(self, redis=None, name=None, coalesce=False, transport=None):
+        """Queues are named after name if given, so several simulations can share one transport.
+
+        Events are exchanged through transport, Redis lists are used if no transport is given.
+        With coalesce state events are not queued, every field of agent's state is kept by transport instead,
+        so the last written value wins and superseded values are never read by simulation.
+        """
         self.redis = redis
+        self.transport = transport if transport is not None else RedisTransport(redis)
+        self.cluster_queue = CLUSTER_QUEUE if name is None else '{}:{}'.format(CLUSTER_QUEUE, name)
+        self.event_queue = EVENT_QUEUE if name is None else '{}:{}'.format(EVENT_QUEUE, name)
+        self.event_states = EVENT_STATES if name is None else '{}:{}'.format(EVENT_STATES, name)
+        self.coalesce = coalesce
 
     def cleanup(self):
         """Clear event queue"""
-        self.redis.delete(CLUSTER_QUEUE)
-        self.redis.delete(EVENT_QUEUE)
+        self.transport.delete(self.cluster_queue, self.event_queue, self.event_states)
+
+    def close(self):
+        """Close transport"""
+        self.transport.close()
 
     def read_states(self):
         """Read one state event in one go"""
-        event = self.redis.lpop(EVENT_QUEUE)
-        if event is not None:
-            return json.loads(event)
-        return None
+        return self.transport.pop(self.event_queue)
+
+    def read_all_states(self):
+        """Read all pending state events in order in one go, coalesced states are read as one last event"""
+        events = self.transport.pop_all(self.event_queue)
+        if not self.coalesce:
+            return events
+
+        fields = self.transport.pop_fields(self.event_states)
+        if not fields:
+            return events
+
+        states = {}
+        for path, value in fields.items():
+            *keys, field = path
+            target = states
+            for key in keys:
+                target = target.setdefault(key, {})
+            target[field] = value
+        return events + [{'states': states}]
 
     def write_states(self, states):
-        """Write event to queue"""
-        event = json.dumps(states)
-        self.redis.rpush(EVENT_QUEUE, event)
+        """Write event to queue, or overwrite fields of coalesced states.
+
+        Events with apply_at_step are always queued, they are applied by simulation at that step.
+        """
+        if not self.coalesce or states.get('apply_at_step') is not None:
+            self.transport.push(self.event_queue, states)
+            return
+
+        self.transport.set_fields(self.event_states, dict(state_fields(states['states'])))
 
     def read_clusters(self):
         """Read one clusters event in one go"""
-        event = self.redis.lpop(CLUSTER_QUEUE)
-        if event is not None:
-            return json.loads(event)
-        return None
+        return self.transport.pop(self.cluster_queue)
+
+    def read_all_clusters(self):
+        """Read all pending clusters events in order in one go"""
+        return self.transport.pop_all(self.cluster_queue)
 
     def write_clusters(self, clusters):
         """Write clusters to queue"""
-        event = json.dumps(clusters)
-        self.redis.rpush(CLUSTER_QUEUE, event)
+        self.transport.push(self.cluster_queue, clusters)
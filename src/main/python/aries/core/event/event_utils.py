@@ -0,0 +1,21 @@
+"""Helpers for creating event queue from config"""
+from aries.core import utils
+from aries.core.constants import IN_PROCESS_TRANSPORT, UNIX_SOCKET_TRANSPORT
+from aries.core.event.event_queue import EventQueue
+from aries.core.event.transport import InProcessTransport, UnixSocketServer, UnixSocketTransport
+
+
+def create_event_queue(config, redis_client=None, name=None, serve=False):
+    """Create event queue of config, Redis is checked only if it is used.
+
+    Simulation serves Unix socket queues (serve=True), controllers connect to them.
+    """
+    if config.event_transport == IN_PROCESS_TRANSPORT:
+        return EventQueue(name=name, coalesce=config.coalesce_states, transport=InProcessTransport())
+    if config.event_transport == UNIX_SOCKET_TRANSPORT:
+        path = config.event_socket_path if name is None else '{}.{}'.format(config.event_socket_path, name)
+        transport = UnixSocketServer(path) if serve else UnixSocketTransport(path)
+        return EventQueue(name=name, coalesce=config.coalesce_states, transport=transport)
+    if redis_client is None:
+        redis_client = utils.check_if_redis_is_running(config.redis_host, config.redis_port)
+    return EventQueue(redis=redis_client, name=name, coalesce=config.coalesce_states)
@@ -0,0 +1,126 @@
+"""In-process stand-in of Redis client, implements the subset of redis-py used by RedisTransport.
+
+Commands take exactly the arguments of pinned redis-py 2.10.6, so code which the real client would reject fails also
+with the stand-in.
+"""
+import collections
+import inspect
+import threading
+import time
+
+
+def encode(value):
+    """Values are returned as bytes like by redis-py"""
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class MemoryPipeline(object):
+    """Commands are buffered and executed atomically in one round trip"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def command(*args, **kwargs):
+            inspect.signature(method).bind(*args, **kwargs)
+            self.commands.append((name, args, kwargs))
+            return self
+        return command
+
+    def execute(self):
+        with self.redis.round_trip():
+            results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class MemoryRedis(object):
+    """Stand-in of redis.Redis keeping lists and hashes in this process.
+
+    Every command and every pipeline is one round trip, which is delayed by latency seconds to model the network
+    and the server.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.lists = collections.defaultdict(collections.deque)
+        self.hashes = collections.defaultdict(dict)
+        self.round_trips = 0
+        # Depth of round trips of this client, commands of pipeline are one round trip
+        self.local = threading.local()
+
+    def round_trip(self):
+        """Count round trip, wait for latency and return context holding the lock"""
+        return RoundTrip(self)
+
+    def client_list(self):
+        with self.round_trip():
+            return []
+
+    def rpush(self, name, *values):
+        with self.round_trip():
+            self.lists[name].extend(encode(value) for value in values)
+            return len(self.lists[name])
+
+    def lpop(self, name):
+        with self.round_trip():
+            values = self.lists.get(name)
+            return values.popleft() if values else None
+
+    def lrange(self, name, start, end):
+        with self.round_trip():
+            values = list(self.lists.get(name, ()))
+            return values[start:] if end == -1 else values[start:end + 1]
+
+    def hset(self, name, key, value):
+        with self.round_trip():
+            values = self.hashes[name]
+            added = int(encode(key) not in values)
+            values[encode(key)] = encode(value)
+            return added
+
+    def hmset(self, name, mapping):
+        with self.round_trip():
+            self.hashes[name].update((encode(key), encode(value)) for key, value in mapping.items())
+            return True
+
+    def hgetall(self, name):
+        with self.round_trip():
+            return dict(self.hashes.get(name, {}))
+
+    def delete(self, *names):
+        with self.round_trip():
+            deleted = 0
+            for name in names:
+                deleted += (self.lists.pop(name, None) is not None) + (self.hashes.pop(name, None) is not None)
+            return deleted
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return MemoryPipeline(self)
+
+
+class RoundTrip(object):
+    """Context of one round trip, nested commands of pipeline are part of the outer round trip"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __enter__(self):
+        redis = self.redis
+        depth = getattr(redis.local, 'depth', 0)
+        redis.local.depth = depth + 1
+        if depth == 0:
+            with redis.lock:
+                redis.round_trips += 1
+            if redis.latency > 0:
+                time.sleep(redis.latency)
+        redis.lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.redis.lock.release()
+        self.redis.local.depth -= 1
@@ -0,0 +1,265 @@
+"""Transports of EventQueue: Redis, in-process queues and in-process queues served on a local Unix socket"""
+import collections
+import json
+import logging
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+from aries.core.exceptions import AriesException
+
+logger = logging.getLogger(__name__)
+
+# Methods of transport which can be called by UnixSocketTransport
+SERVED_METHODS = {'push', 'pop', 'pop_all', 'set_fields', 'pop_fields', 'delete'}
+
+# Authentication key of Unix socket server is kept in file of socket path with this suffix
+AUTHKEY_SUFFIX = '.key'
+AUTHKEY_SIZE = 32
+
+
+class Transport(object):
+    """Base class of event transports, events are json-compatible objects, fields are {path tuple: value}"""
+
+    def push(self, queue, event):
+        pass
+
+    def pop(self, queue):
+        pass
+
+    def pop_all(self, queue):
+        pass
+
+    def set_fields(self, key, fields):
+        pass
+
+    def pop_fields(self, key):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def close(self):
+        pass
+
+
+class RedisTransport(Transport):
+    """Events are json strings in Redis lists, fields are kept in Redis hashes"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def push(self, queue, event):
+        """Append event to queue"""
+        self.redis.rpush(queue, json.dumps(event))
+
+    def pop(self, queue):
+        """Remove and return first event of queue, None if queue is empty"""
+        event = self.redis.lpop(queue)
+        if event is not None:
+            return json.loads(event)
+        return None
+
+    def pop_all(self, queue):
+        """Read and remove all events of queue atomically in one round trip"""
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.lrange(queue, 0, -1)
+        pipeline.delete(queue)
+        events, _ = pipeline.execute()
+        return [json.loads(event) for event in events]
+
+    def set_fields(self, key, fields):
+        """Overwrite fields of hash key in one round trip, hset(name, key, value) is supported by redis-py 2 and 3"""
+        if fields:
+            pipeline = self.redis.pipeline(transaction=True)
+            for path, value in fields.items():
+                pipeline.hset(key, json.dumps(path), json.dumps(value))
+            pipeline.execute()
+
+    def pop_fields(self, key):
+        """Read and remove all fields of hash key atomically in one round trip"""
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hgetall(key)
+        pipeline.delete(key)
+        fields, _ = pipeline.execute()
+        return {tuple(json.loads(path)): json.loads(value) for path, value in fields.items()}
+
+    def delete(self, *keys):
+        """Delete queues and hashes"""
+        self.redis.delete(*keys)
+
+
+class InProcessTransport(Transport):
+    """Events are kept as they are in queues of this process, they are neither encoded nor copied"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = collections.defaultdict(collections.deque)
+        self.fields = collections.defaultdict(dict)
+
+    def push(self, queue, event):
+        """Append event to queue"""
+        with self.lock:
+            self.queues[queue].append(event)
+
+    def pop(self, queue):
+        """Remove and return first event of queue, None if queue is empty"""
+        with self.lock:
+            events = self.queues.get(queue)
+            return events.popleft() if events else None
+
+    def pop_all(self, queue):
+        """Remove and return all events of queue"""
+        with self.lock:
+            return list(self.queues.pop(queue, ()))
+
+    def set_fields(self, key, fields):
+        """Overwrite fields of key"""
+        with self.lock:
+            self.fields[key].update(fields)
+
+    def pop_fields(self, key):
+        """Remove and return all fields of key"""
+        with self.lock:
+            return self.fields.pop(key, {})
+
+    def delete(self, *keys):
+        """Delete queues and fields"""
+        with self.lock:
+            for key in keys:
+                self.queues.pop(key, None)
+                self.fields.pop(key, None)
+
+
+def remove_stale_socket(path):
+    """Remove socket left at path by server which was not closed, any other file is refused"""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise AriesException("{} is not a socket, it is not removed to serve events".format(path))
+    os.remove(path)
+
+
+def write_authkey(path):
+    """Write new random authentication key readable only by owner"""
+    authkey = os.urandom(AUTHKEY_SIZE)
+    key_path = path + AUTHKEY_SUFFIX
+    if os.path.lexists(key_path):
+        os.remove(key_path)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(authkey)
+    return authkey
+
+
+def read_authkey(path):
+    """Read authentication key of server serving path"""
+    with open(path + AUTHKEY_SUFFIX, 'rb') as f:
+        return f.read()
+
+
+class UnixSocketServer(InProcessTransport):
+    """In-process transport whose queues are served on Unix socket path to UnixSocketTransport of other processes.
+
+    The socket and its authentication key are accessible only by their owner, clients which do not know the key are
+    refused before anything they send is unpickled.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        remove_stale_socket(path)
+        self.authkey = write_authkey(path)
+        # Socket is created accessible only by owner, there is no window before chmod
+        umask = os.umask(0o177)
+        try:
+            self.listener = Listener(address=path, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+        self.closed = False
+        self.thread = threading.Thread(target=self.serve, name='aries-event-server', daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        """Accept connections, every connection is served by its own thread"""
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, EOFError):
+                logger.warning("Connection to %s is refused, it is not authenticated", self.path)
+                continue
+            except OSError:
+                return
+            if self.closed:
+                connection.close()
+                return
+            threading.Thread(target=self.serve_connection, args=(connection,), daemon=True).start()
+
+    def serve_connection(self, connection):
+        """Call transport methods requested by connection and send back results"""
+        with connection:
+            while True:
+                try:
+                    method, args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                if method not in SERVED_METHODS:
+                    logger.error("Transport method %s can not be called", method)
+                    connection.send(None)
+                    continue
+                connection.send(getattr(self, method)(*args))
+
+    def close(self):
+        """Stop accepting connections and remove socket"""
+        if self.closed:
+            return
+        self.closed = True
+        # accept() is not interrupted by closing listener, so it is woken up by a connection
+        try:
+            Client(address=self.path, family='AF_UNIX', authkey=self.authkey).close()
+        except (OSError, AuthenticationError, EOFError):
+            pass
+        self.thread.join()
+        self.listener.close()
+        os.remove(self.path + AUTHKEY_SUFFIX)
+
+
+class UnixSocketTransport(Transport):
+    """Transport of UnixSocketServer running in another process on the same machine"""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = Client(address=path, family='AF_UNIX', authkey=read_authkey(path))
+
+    def call(self, method, *args):
+        """Call method of server transport"""
+        with self.lock:
+            self.connection.send((method, args))
+            return self.connection.recv()
+
+    def push(self, queue, event):
+        self.call('push', queue, event)
+
+    def pop(self, queue):
+        return self.call('pop', queue)
+
+    def pop_all(self, queue):
+        return self.call('pop_all', queue)
+
+    def set_fields(self, key, fields):
+        self.call('set_fields', key, fields)
+
+    def pop_fields(self, key):
+        return self.call('pop_fields', key)
+
+    def delete(self, *keys):
+        self.call('delete', *keys)
+
+    def close(self):
+        """Close connection to server"""
+        self.connection.close()
@@ -18,3 +18,8 @@ class FilePathNotFoundError(AriesException):
 class ValidationError(AriesException):
     """Raised in case validation of json format is not passed
     """
+
+
+class StorageError(AriesException):
+    """Raised if background writing to storage fails
+    """
@@ -6,6 +6,7 @@ import cerberus
 from bson import json_util
 
 import aries.core.utils as utils
+from aries.core.grid.record import Record, compile_methods
 
 # Schema for agent validation
 agent_schema = {
@@ -84,27 +85,15 @@ agent_schema = {
 
 agent_validator = cerberus.Validator(agent_schema)
 
+# Properties of agent holding grid elements
+GRID_ELEMENTS = ('battery', 'pv_panel', 'wind_generator', 'electrical_vehicle', 'water_tank')
 
-class Agent(object):
-    """Representation of Agent in simulation process"""
-    name = None
-    voltage_rating = None
-    power_rating = None
-    power_factor = None
-
-    incoming_power = None
-    request_inject_power = None
-    request_power_factor = None
 
-    battery = None
-    pv_panel = None
-    wind_generator = None
-    electrical_vehicle = None
-    water_tank = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+class Agent(Record):
+    """Representation of Agent in simulation process"""
+    __slots__ = ('name', 'voltage_rating', 'power_rating', 'power_factor',
+                 'incoming_power', 'request_inject_power', 'request_power_factor',
+                 'battery', 'pv_panel', 'wind_generator', 'electrical_vehicle', 'water_tank')
 
     @classmethod
     def from_properties(cls, name, voltage_rating, power_rating, power_factor, incoming_power, request_inject_power,
@@ -178,13 +167,9 @@ class Agent(object):
         return utils.validate(data, 'Agent', agent_validator)
 
 
-class GridElement(object):
+class GridElement(Record):
     """Base class for all grid elements withing Agent"""
-    active = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+    __slots__ = ('active',)
 
     def is_active(self):
         """Check if grid element is active or not"""
@@ -198,14 +183,8 @@ class GridElement(object):
 
 class EnergyBuffer(GridElement):
     """Base class for battery-like classes"""
-    voltage = None
-    capacity = None
-    status = None
-    contribution_active = None
-    contribution_reactive = None
-    inverter_input_voltage = None
-    inverter_output_voltage = None
-    inverter_efficiency = None
+    __slots__ = ('voltage', 'capacity', 'status', 'contribution_active', 'contribution_reactive',
+                 'inverter_input_voltage', 'inverter_output_voltage', 'inverter_efficiency')
 
     def erogate(self, power, time_scale):
         """Erogate power from energy buffer"""
@@ -239,6 +218,7 @@ class EnergyBuffer(GridElement):
 
 class Battery(EnergyBuffer):
     """Representation of battery in simulation process"""
+    __slots__ = ()
 
     @classmethod
     def from_properties(cls, voltage, capacity, status, contribution_active, contribution_reactive,
@@ -257,9 +237,8 @@ class Battery(EnergyBuffer):
 
 class ElectricalVehicle(EnergyBuffer):
     """Representation of electrical vehicle in simulation process"""
-    consumption = None
-    charge_current = None  # some constant model dependent
-    power_supplier = None  # 0 or 1
+    # charge_current is some constant model dependent, power_supplier is 0 or 1
+    __slots__ = ('consumption', 'charge_current', 'power_supplier')
 
     @classmethod
     def from_properties(cls, voltage, capacity, status, consumption, contribution_active, contribution_reactive,
@@ -290,13 +269,8 @@ class ElectricalVehicle(EnergyBuffer):
 
 class PVPanel(GridElement):
     """Representation of PV panel in simulation process"""
-    unit_area = None
-    series = None
-    parallels = None
-    efficiency = None
-    solar_irradiance = None
-    battery_coupling_efficiency = None
-    heating_contribution = None
+    __slots__ = ('unit_area', 'series', 'parallels', 'efficiency', 'solar_irradiance', 'battery_coupling_efficiency',
+                 'heating_contribution')
 
     @classmethod
     def from_properties(cls, unit_area, series, parallels, efficiency, solar_irradiance, battery_coupling_efficiency,
@@ -326,11 +300,7 @@ class PVPanel(GridElement):
 
 class WindGenerator(GridElement):
     """Representation of wind generator in simulation process"""
-    power_coefficient = None
-    air_density = None
-    area = None
-    wind_speed = None
-    battery_coupling_efficiency = None
+    __slots__ = ('power_coefficient', 'air_density', 'area', 'wind_speed', 'battery_coupling_efficiency')
 
     @classmethod
     def from_properties(cls, power_coefficient, air_density, area, wind_speed, battery_coupling_efficiency, active):
@@ -357,8 +327,7 @@ class WindGenerator(GridElement):
 
 class WaterTank(GridElement):
     """Representation of water tank in simulation process"""
-    capacity = None
-    temp = None
+    __slots__ = ('capacity', 'temp')
 
     @classmethod
     def from_properties(cls, capacity, temp, active):
@@ -374,19 +343,15 @@ class WaterTank(GridElement):
             self.temp = 60
 
 
+# Grid elements of agent are dumped inline by one compiled function, agent is dumped once per simulation step
+_, _, Agent.to_dict = compile_methods(Agent._fields, nested={
+    element: element_class._fields
+    for element, element_class in zip(GRID_ELEMENTS, (Battery, PVPanel, WindGenerator, ElectricalVehicle, WaterTank))})
+Agent.to_dict.__doc__ = """Dump object to dictionary of native types, e.g. for BSON document"""
+
+
 class AgentEncoder(json.JSONEncoder):
     """Agent Encoder for JSON serialization"""
 
     def default(self, o):
-        result = dict(o.__dict__)
-        if o.battery is not None:
-            result['battery'] = dict(o.battery.__dict__)
-        if o.pv_panel is not None:
-            result['pv_panel'] = dict(o.pv_panel.__dict__)
-        if o.wind_generator is not None:
-            result['wind_generator'] = dict(o.wind_generator.__dict__)
-        if o.electrical_vehicle is not None:
-            result['electrical_vehicle'] = dict(o.electrical_vehicle.__dict__)
-        if o.water_tank is not None:
-            result['water_tank'] = dict(o.water_tank.__dict__)
-        return result
+        return o.to_dict()
@@ -0,0 +1,282 @@
+"""Compiled binary format of grid elements and topology.
+
+Compiled file is validated grid elements or topology stored as packed NumPy arrays, strings are kept in one name
+table and referenced by index. File is memory-mapped when loaded, so it is neither parsed nor validated again.
+
+Layout: MAGIC, format version and header length (little-endian uint32), json header describing arrays
+{name: {'dtype', 'length', 'offset'}}, then arrays, each aligned to ALIGNMENT bytes from the start of data.
+"""
+import contextlib
+import gc
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from aries.core.exceptions import ValidationError
+from aries.core.grid.agent import Agent, Battery, PVPanel, WindGenerator, ElectricalVehicle, WaterTank, agent_schema
+from aries.core.grid.line import Line
+from aries.core.grid.topology import Path, Node
+
+MAGIC = b'ARIESGRD'
+# Files of other versions are refused, they have to be compiled again
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct('<8sII')
+
+GRID_ELEMENTS_KIND = 'grid_elements'
+TOPOLOGY_KIND = 'topology'
+# Names of compiled files written by aries --compile
+GRID_ELEMENTS_FILE = 'grid_elements.aries'
+TOPOLOGY_FILE = 'topology.aries'
+
+# Classes of grid elements of agent
+ELEMENTS = {
+    'battery': Battery,
+    'pv_panel': PVPanel,
+    'wind_generator': WindGenerator,
+    'electrical_vehicle': ElectricalVehicle,
+    'water_tank': WaterTank
+}
+# Agent properties [(column, grid element or None, attribute, dtype)], columns are named like in AgentStore
+AGENT_FIELDS = [(name, None, name, np.int64 if rules['type'] == 'integer' else np.float64)
+                for name, rules in agent_schema.items() if name != 'name' and rules['type'] != 'dict'] + \
+               [('{}_{}'.format(element, name), element, name, np.int64 if rules['type'] == 'integer' else np.float64)
+                for element in ELEMENTS for name, rules in agent_schema[element]['schema'].items()]
+LINE_FIELDS = ['resistance', 'reactance']
+# Optional line properties, None is stored as NaN together with mask of None values
+OPTIONAL_LINE_FIELDS = ['shunt_resistance', 'shunt_reactance']
+
+
+class StringTable(object):
+    """Strings of compiled file, every distinct string is stored once"""
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, string):
+        """Index of string, string is added if it is not in table yet"""
+        return self.index.setdefault(string, len(self.index))
+
+    def arrays(self):
+        """Encoded strings and offsets of each of them"""
+        encoded = [string.encode() for string in self.index]
+        return {'strings': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'string_offsets': list_offsets(encoded)}
+
+
+def read_strings(arrays):
+    """Decode strings of name table"""
+    data = arrays['strings'].tobytes()
+    offsets = arrays['string_offsets'].tolist()
+    return [data[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+
+def list_offsets(lists):
+    """Offsets of lists in concatenation of lists"""
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(values) for values in lists], out=offsets[1:])
+    return offsets
+
+
+def pack(lists, dtype=np.int32):
+    """Pack list of lists into offsets and flat array"""
+    return list_offsets(lists), np.array([value for values in lists for value in values], dtype=dtype)
+
+
+def split(values, offsets):
+    """Split list into lists at offsets"""
+    offsets = offsets.tolist()
+    return [values[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """Pause garbage collection, which is triggered again and again by building many objects at once"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_compiled(path, kind, arrays):
+    """Write arrays {name: 1-D array} as compiled file of kind"""
+    header = {'kind': kind, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'length': len(array), 'offset': offset}
+        offset = align(offset + array.nbytes)
+    encoded_header = json.dumps(header).encode()
+    data_start = align(PREAMBLE.size + len(encoded_header))
+
+    with open(path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded_header)))
+        f.write(encoded_header)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+def is_compiled(path):
+    """Check if file at path is compiled file, missing or short files are not"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def read_compiled(path, kind):
+    """Memory-map compiled file of kind and return its arrays, arrays are read-only views of the file"""
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < PREAMBLE.size:
+        raise ValidationError("'{}' is not compiled grid".format(path))
+    magic, version, header_length = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValidationError("'{}' is not compiled grid".format(path))
+    if version != FORMAT_VERSION:
+        raise ValidationError("'{}' is compiled in format version {}, version {} is supported. Please compile it again"
+                              .format(path, version, FORMAT_VERSION))
+    header = json.loads(data[PREAMBLE.size:PREAMBLE.size + header_length].decode())
+    if header['kind'] != kind:
+        raise ValidationError("'{}' is compiled {}, not {}".format(path, header['kind'], kind))
+
+    data_start = align(PREAMBLE.size + header_length)
+    return {name: np.frombuffer(data, dtype=array['dtype'], count=array['length'],
+                                offset=data_start + array['offset'])
+            for name, array in header['arrays'].items()}
+
+
+def compile_grid_elements(path, agents, lines):
+    """Write validated agents and lines (objects) as compiled file"""
+    strings = StringTable()
+    arrays = {
+        'agent_names': np.array([strings.add(name) for name in agents], dtype=np.int32),
+        'line_names': np.array([strings.add(name) for name in lines], dtype=np.int32)
+    }
+    for column, element, attribute, dtype in AGENT_FIELDS:
+        arrays['agent_' + column] = np.array(
+            [getattr(agent if element is None else getattr(agent, element), attribute) for agent in agents.values()],
+            dtype=dtype)
+    for field in LINE_FIELDS:
+        arrays['line_' + field] = np.array([getattr(line, field) for line in lines.values()], dtype=np.float64)
+    for field in OPTIONAL_LINE_FIELDS:
+        values = [getattr(line, field) for line in lines.values()]
+        arrays['line_' + field] = np.array([np.nan if value is None else value for value in values],
+                                           dtype=np.float64)
+        arrays['line_' + field + '_none'] = np.array([value is None for value in values], dtype=np.uint8)
+    arrays.update(strings.arrays())
+    write_compiled(path, GRID_ELEMENTS_KIND, arrays)
+
+
+def read_agent_columns(path):
+    """Names of agents and memory-mapped columns {column: array} of compiled grid elements"""
+    arrays = read_compiled(path, GRID_ELEMENTS_KIND)
+    strings = read_strings(arrays)
+    names = [strings[idx] for idx in arrays['agent_names'].tolist()]
+    return names, {column: arrays['agent_' + column] for column, _, _, _ in AGENT_FIELDS}
+
+
+def load_grid_elements(path):
+    """Load agents and lines of compiled file"""
+    with gc_paused():
+        return build_grid_elements(read_compiled(path, GRID_ELEMENTS_KIND))
+
+
+def build_grid_elements(arrays):
+    """Build agents and lines of arrays of compiled file"""
+    strings = read_strings(arrays)
+
+    agent_names = [strings[idx] for idx in arrays['agent_names'].tolist()]
+    properties = [('name', agent_names)] + [(attribute, arrays['agent_' + column].tolist())
+                                            for column, element, attribute, _ in AGENT_FIELDS if element is None]
+    for element, element_class in ELEMENTS.items():
+        fields = [(attribute, arrays['agent_' + column].tolist())
+                  for column, field_element, attribute, _ in AGENT_FIELDS if field_element == element]
+        attributes = [attribute for attribute, _ in fields]
+        properties.append((element, [element_class(dict(zip(attributes, values)))
+                                     for values in zip(*(values for _, values in fields))]))
+    keys = [key for key, _ in properties]
+    agents = {name: Agent(dict(zip(keys, values)))
+              for name, values in zip(agent_names, zip(*(values for _, values in properties)))}
+
+    line_names = [strings[idx] for idx in arrays['line_names'].tolist()]
+    line_values = [arrays['line_' + field].tolist() for field in LINE_FIELDS]
+    for field in OPTIONAL_LINE_FIELDS:
+        line_values.append([None if none else value for value, none in
+                            zip(arrays['line_' + field].tolist(), arrays['line_' + field + '_none'].tolist())])
+    lines = {name: Line.from_properties(name, *values) for name, values in zip(line_names, zip(*line_values))}
+    return agents, lines
+
+
+def compile_topology(path, paths, nodes):
+    """Write validated paths and nodes (objects) as compiled file"""
+    strings = StringTable()
+    entries = [entry for p in paths.values() for entry in p.paths]
+    branch_offsets, branches = pack([[strings.add(branch) for branch in entry.get('path', [])] for entry in entries])
+    arrays = {
+        'path_names': np.array([strings.add(name) for name in paths], dtype=np.int32),
+        'path_offsets': list_offsets([p.paths for p in paths.values()]),
+        'path_active': np.array([entry['active'] for entry in entries], dtype=np.int64),
+        'path_has_branches': np.array(['path' in entry for entry in entries], dtype=np.uint8),
+        'path_branch_offsets': branch_offsets,
+        'path_branches': branches,
+        'node_names': np.array([strings.add(name) for name in nodes], dtype=np.int32),
+        'node_agents': np.array([-1 if node.agent is None else strings.add(node.agent) for node in nodes.values()],
+                                dtype=np.int32)
+    }
+    for field in ['branches_in', 'branches_out']:
+        arrays['node_{}_offsets'.format(field)], arrays['node_' + field] = pack(
+            [[strings.add(branch) for branch in getattr(node, field)] for node in nodes.values()])
+    adjacency = [node.adjacency for node in nodes.values()]
+    arrays['node_adjacency_offsets'] = list_offsets(adjacency)
+    arrays['node_adjacency_item_offsets'], arrays['node_adjacency'] = pack(
+        [[strings.add(value) for value in item] for items in adjacency for item in items])
+    arrays.update(strings.arrays())
+    write_compiled(path, TOPOLOGY_KIND, arrays)
+
+
+def load_topology(path):
+    """Load paths and nodes of compiled file"""
+    with gc_paused():
+        return build_topology(read_compiled(path, TOPOLOGY_KIND))
+
+
+def build_topology(arrays):
+    """Build paths and nodes of arrays of compiled file"""
+    strings = read_strings(arrays)
+
+    entries = []
+    branches = split(arrays['path_branches'].tolist(), arrays['path_branch_offsets'])
+    for active, has_branches, entry_branches in zip(arrays['path_active'].tolist(),
+                                                    arrays['path_has_branches'].tolist(), branches):
+        entry = {'active': active}
+        if has_branches:
+            entry['path'] = [strings[idx] for idx in entry_branches]
+        entries.append(entry)
+    path_names = [strings[idx] for idx in arrays['path_names'].tolist()]
+    paths = {name: Path.from_properties(path_entries)
+             for name, path_entries in zip(path_names, split(entries, arrays['path_offsets']))}
+
+    def string_lists(offsets, values):
+        return split([strings[idx] for idx in values.tolist()], offsets)
+
+    branches_in = string_lists(arrays['node_branches_in_offsets'], arrays['node_branches_in'])
+    branches_out = string_lists(arrays['node_branches_out_offsets'], arrays['node_branches_out'])
+    adjacency_items = string_lists(arrays['node_adjacency_item_offsets'], arrays['node_adjacency'])
+    adjacency = split(adjacency_items, arrays['node_adjacency_offsets'])
+    node_names = [strings[idx] for idx in arrays['node_names'].tolist()]
+    node_agents = [None if idx < 0 else strings[idx] for idx in arrays['node_agents'].tolist()]
+    nodes = {name: Node.from_properties(branches_in=values[0], branches_out=values[1], adjacency=values[2],
+                                        agent=values[3])
+             for name, values in zip(node_names, zip(branches_in, branches_out, adjacency, node_agents))}
+    return paths, nodes
@@ -0,0 +1,144 @@
+"""Generate synthetic radial feeders (topology, grid elements and clusters) for scale testing"""
+import json
+import os
+import random
+
+from aries.core.exceptions import ValidationError
+
+SLACK_NODE = 'SLACK'
+TOPOLOGY_FILE = 'topology.json'
+GRID_ELEMENTS_FILE = 'grid_elements.json'
+CLUSTERS_FILE = 'clusters.json'
+CLUSTER_CONTROLLER = 'LoadSharingCluster'
+
+
+def node_name(i):
+    return 'N{}'.format(i)
+
+
+def branch_name(i):
+    return 'B{}'.format(i)
+
+
+def agent_name(i):
+    return 'AGENT{}'.format(i)
+
+
+def create_agent(power_rating, der, solar_irradiance):
+    """Agent with PV panel and battery active only if it has distributed energy resources"""
+    return {
+        "voltage_rating": 230,
+        "power_rating": power_rating,
+        "power_factor": 1,
+        "incoming_power": 0,
+        "request_inject_power": 0,
+        "request_power_factor": 1,
+        "battery": {"voltage": 24, "capacity": 1296000, "status": 1296000, "contribution_active": 1,
+                    "contribution_reactive": 1, "inverter_input_voltage": 24, "inverter_output_voltage": 230,
+                    "inverter_efficiency": 0.87, "active": int(der)},
+        "pv_panel": {"unit_area": 2, "series": 50, "parallels": 50, "efficiency": 0.8,
+                     "solar_irradiance": solar_irradiance if der else 0, "battery_coupling_efficiency": 1,
+                     "heating_contribution": 0, "active": int(der)},
+        "wind_generator": {"power_coefficient": 0.59, "air_density": 1.225, "area": 2, "wind_speed": 10,
+                           "battery_coupling_efficiency": 1, "active": 0},
+        "electrical_vehicle": {"voltage": 24, "capacity": 1296000, "status": 1296000, "consumption": 20,
+                               "contribution_active": 0.3, "contribution_reactive": 0.3,
+                               "inverter_input_voltage": 24, "inverter_output_voltage": 230,
+                               "inverter_efficiency": 0.87, "charge_current": 0, "power_supplier": 1, "active": 0},
+        "water_tank": {"capacity": 100, "temp": 20, "active": 0}
+    }
+
+
+def generate_radial_grid(number_of_agents, branching_factor=2, depth=None, der_penetration=0.0,
+                         resistance=(0.1, 0.1), reactance=(0.0, 0.0), power_rating=(1000, 1000),
+                         solar_irradiance=(0.0, 1.0), cluster_size=0, seed=None):
+    """Generate radial feeder with one agent per bus and return (topology, grid_elements, clusters) json.
+
+    SLACK feeds head node N0 through B0, every further bus Ni hangs on a random bus through branch Bi, a bus has at
+    most branching_factor children and lies at most depth branches below N0. Bus Ni hosts AGENT{i-1}, a share of
+    der_penetration agents has active PV panel and battery. Line impedances, power ratings and solar irradiance are
+    drawn uniformly from (min, max) ranges. Agents are grouped into clusters of cluster_size agents of neighbouring
+    buses, no clusters are generated if cluster_size is 0.
+    """
+    if number_of_agents < 1 or branching_factor < 1 or (depth is not None and depth < 1):
+        raise ValidationError("Number of agents, branching factor and depth have to be positive")
+    if depth is not None and sum(branching_factor ** level for level in range(1, depth + 1)) < number_of_agents:
+        raise ValidationError("{} agents do not fit into feeder with branching factor {} and depth {}"
+                              .format(number_of_agents, branching_factor, depth))
+    if not 0 <= der_penetration <= 1:
+        raise ValidationError("DER penetration has to be between 0 and 1")
+
+    rng = random.Random(seed)
+    # parents[i], levels[i] and children[i] of bus Ni, N0 is head of feeder
+    parents = [None]
+    levels = [0]
+    children = [[]]
+    # Buses which can get another child, removed by swapping with the last one when they are full
+    open_buses = [0]
+    for i in range(1, number_of_agents + 1):
+        k = rng.randrange(len(open_buses))
+        parent = open_buses[k]
+        parents.append(parent)
+        levels.append(levels[parent] + 1)
+        children.append([])
+        children[parent].append(i)
+        if len(children[parent]) == branching_factor:
+            open_buses[k] = open_buses[-1]
+            open_buses.pop()
+        if depth is None or levels[i] < depth:
+            open_buses.append(i)
+
+    nodes = {SLACK_NODE: {"branches_in": [], "branches_out": [branch_name(0)],
+                          "adjacency": [[node_name(0), branch_name(0)]]}}
+    paths = {}
+    bus_paths = [[branch_name(0)]]
+    for i in range(number_of_agents + 1):
+        parent = parents[i]
+        if i > 0:
+            bus_paths.append(bus_paths[parent] + [branch_name(i)])
+        node = {
+            "branches_in": [branch_name(i)],
+            "branches_out": [branch_name(child) for child in children[i]],
+            "adjacency": ([[SLACK_NODE if parent is None else node_name(parent), branch_name(i)]] +
+                          [[node_name(child), branch_name(child)] for child in children[i]])
+        }
+        if i > 0:
+            node["agent"] = agent_name(i - 1)
+            paths[agent_name(i - 1)] = [{"active": 1, "path": bus_paths[i]}]
+        nodes[node_name(i)] = node
+
+    lines = {branch_name(i): {"resistance": rng.uniform(*resistance), "reactance": rng.uniform(*reactance)}
+             for i in range(number_of_agents + 1)}
+    number_of_ders = round(der_penetration * number_of_agents)
+    ders = set(rng.sample(range(number_of_agents), number_of_ders))
+    agents = {agent_name(i): create_agent(power_rating=rng.uniform(*power_rating), der=i in ders,
+                                          solar_irradiance=rng.uniform(*solar_irradiance))
+              for i in range(number_of_agents)}
+
+    clusters = {}
+    if cluster_size > 0:
+        # Buses are sorted depth first, so agents of one cluster are close to each other
+        order = []
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            if i > 0:
+                order.append(agent_name(i - 1))
+            stack.extend(reversed(children[i]))
+        for start in range(0, number_of_agents, cluster_size):
+            clusters['cluster{}'.format(start // cluster_size)] = {
+                "cluster_agents": order[start:start + cluster_size], "controller": CLUSTER_CONTROLLER,
+                "priority": 1, "delay": 0}
+
+    return {"paths": paths, "nodes": nodes}, {"agents": agents, "lines": lines}, clusters
+
+
+def write_grid(path, topology, grid_elements, clusters=None):
+    """Write topology, grid elements and clusters to json files in directory path"""
+    os.makedirs(path, exist_ok=True)
+    files = [(TOPOLOGY_FILE, topology), (GRID_ELEMENTS_FILE, grid_elements)]
+    if clusters:
+        files.append((CLUSTERS_FILE, clusters))
+    for file_name, j in files:
+        with open(os.path.join(path, file_name), 'w') as f:
+            json.dump(j, f)
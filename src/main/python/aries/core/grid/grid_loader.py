@@ -0,0 +1,164 @@
+"""Bulk loading of grid elements and topology.
+
+Cerberus schemas of grid elements are compiled once into plain checks, which validate whole collections in one pass.
+All errors of collection are reported together, objects are built only if there are none.
+"""
+from aries.core.exceptions import ValidationError
+from aries.core.grid.agent import Agent, Battery, PVPanel, WindGenerator, ElectricalVehicle, WaterTank, \
+    agent_validator
+from aries.core.grid.line import Line, line_validator
+from aries.core.grid.topology import Path, Node, path_validator, node_validator
+
+# Python types of cerberus types used by schemas, bool is accepted as number like by cerberus
+TYPES = {
+    'string': str,
+    'float': (float, int),
+    'integer': int,
+    'dict': dict,
+    'list': list
+}
+
+
+def compile_field(rules, ignore_none_values):
+    """Compile rules of one field into check(value, path, errors)"""
+    expected_type = TYPES[rules['type']]
+    type_error = 'must be of {} type'.format(rules['type'])
+    not_empty = rules.get('empty') is False
+    minimum = rules.get('min')
+    maximum = rules.get('max')
+    check_items = None
+    if 'schema' in rules:
+        if rules['type'] == 'dict':
+            check_items = compile_schema(rules['schema'], ignore_none_values)
+        else:
+            check_item = compile_field(rules['schema'], ignore_none_values)
+
+            def check_items(values, path, errors):
+                for idx, value in enumerate(values):
+                    if value is None:
+                        if not ignore_none_values:
+                            errors.append((path + (idx,), 'null value not allowed'))
+                    else:
+                        check_item(value, path + (idx,), errors)
+
+    def check(value, path, errors):
+        if not isinstance(value, expected_type):
+            errors.append((path, type_error))
+            return
+        if not_empty and len(value) == 0:
+            errors.append((path, 'empty values not allowed'))
+        if minimum is not None and value < minimum:
+            errors.append((path, 'min value is {}'.format(minimum)))
+        if maximum is not None and value > maximum:
+            errors.append((path, 'max value is {}'.format(maximum)))
+        if check_items is not None:
+            check_items(value, path, errors)
+    return check
+
+
+def compile_schema(schema, ignore_none_values=False):
+    """Compile cerberus schema into check(document, path, errors), errors are appended as (path, message)"""
+    fields = {name: compile_field(rules, ignore_none_values) for name, rules in schema.items()}
+    required = [name for name, rules in schema.items() if rules.get('required')]
+
+    def check(document, path, errors):
+        if not isinstance(document, dict):
+            errors.append((path, 'must be of dict type'))
+            return
+        for name, value in document.items():
+            check_field = fields.get(name)
+            if value is None and ignore_none_values:
+                continue
+            if check_field is None:
+                errors.append((path + (name,), 'unknown field'))
+            elif value is None:
+                errors.append((path + (name,), 'null value not allowed'))
+            else:
+                check_field(value, path + (name,), errors)
+        for name in required:
+            if document.get(name) is None and (name not in document or ignore_none_values):
+                errors.append((path + (name,), 'required field'))
+    return check
+
+
+def compile_validator(validator):
+    """Compile schema of cerberus validator"""
+    return compile_schema(dict(validator.schema), ignore_none_values=validator.ignore_none_values)
+
+
+check_agent = compile_validator(agent_validator)
+check_line = compile_validator(line_validator)
+check_path = compile_validator(path_validator)
+check_node = compile_validator(node_validator)
+
+
+def check_paths(paths, path, errors):
+    """Paths of agent are list of path documents"""
+    if not isinstance(paths, list):
+        errors.append((path, 'must be of list type'))
+        return
+    for idx, p in enumerate(paths):
+        check_path(p, path + (idx,), errors)
+
+
+def validate_collection(items, check, collection, errors):
+    """Validate every item of collection {name: item}"""
+    if not isinstance(items, dict):
+        errors.append(((collection,), 'must be of dict type'))
+        return
+    for name, item in items.items():
+        check(item, (collection, name), errors)
+
+
+def raise_errors(errors, obj_type):
+    """Raise ValidationError listing all errors"""
+    if errors:
+        raise ValidationError("{} is not valid, {} error(s). Please take a look to these field(s) :\n{}".format(
+            obj_type, len(errors), '\n'.join('{} : {}'.format('.'.join(str(key) for key in path), message)
+                                             for path, message in errors)))
+
+
+def build_agent(name, j):
+    """Build Agent of validated json, it is the same as of Agent.load"""
+    return Agent({
+        "name": name,
+        "voltage_rating": j['voltage_rating'],
+        "power_rating": j['power_rating'],
+        "power_factor": j['power_factor'],
+        "incoming_power": j['incoming_power'],
+        "request_inject_power": j['request_inject_power'],
+        "request_power_factor": j['request_power_factor'],
+        "battery": Battery(j['battery']),
+        "pv_panel": PVPanel(j['pv_panel']),
+        "wind_generator": WindGenerator(j['wind_generator']),
+        "electrical_vehicle": ElectricalVehicle(j['electrical_vehicle']),
+        "water_tank": WaterTank(j['water_tank'])
+    })
+
+
+def load_grid_elements(j):
+    """Validate all agents and lines of json and build them, all errors are reported together"""
+    errors = []
+    validate_collection(j['agents'], check_agent, 'agents', errors)
+    validate_collection(j['lines'], check_line, 'lines', errors)
+    raise_errors(errors, 'Grid elements')
+
+    agents = {name: build_agent(name, item) for name, item in j['agents'].items()}
+    lines = {name: Line.from_properties(name, item['resistance'], item['reactance'], item.get('shunt_resistance'),
+                                        item.get('shunt_reactance'))
+             for name, item in j['lines'].items()}
+    return agents, lines
+
+
+def load_topology(j):
+    """Validate all paths and nodes of json and build them, all errors are reported together"""
+    errors = []
+    validate_collection(j['paths'], check_paths, 'paths', errors)
+    validate_collection(j['nodes'], check_node, 'nodes', errors)
+    raise_errors(errors, 'Topology')
+
+    paths = {name: Path.from_properties(list(item)) for name, item in j['paths'].items()}
+    nodes = {name: Node.from_properties(branches_in=item['branches_in'], branches_out=item['branches_out'],
+                                        adjacency=item['adjacency'], agent=item.get('agent'))
+             for name, item in j['nodes'].items()}
+    return paths, nodes
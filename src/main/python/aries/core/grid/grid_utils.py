@@ -1,6 +1,5 @@
-from aries.core.grid.agent import Agent
-from aries.core.grid.line import Line
-from aries.core.grid.topology import Path, Node
+from aries.core.grid import grid_loader
+from aries.core.grid.state import State
 
 
 def dict_to_json(dict_obj):
@@ -11,34 +10,34 @@ def dict_to_json(dict_obj):
     return result
 
 
-def create_grid_elements(j):
-    """Create grid elements (agents and lines) from json"""
-    agents = {}
-    for name, item in j['agents'].items():
-        agent = Agent.load(name=name, j=item)
-        agents[name] = agent
+def dict_to_documents(dict_obj):
+    """Converter dict with obj to dict of native dictionaries"""
+    result = {}
+    for name, obj in dict_obj.items():
+        result[name] = obj.to_dict()
+    return result
 
-    lines = {}
-    for name, item in j['lines'].items():
-        line = Line.load(name=name, j=item)
-        lines[name] = line
 
-    return agents, lines
+def create_grid_elements(j):
+    """Create grid elements (agents and lines) from json, all validation errors are reported together"""
+    return grid_loader.load_grid_elements(j)
 
 
 def create_topology(j):
-    """Create topology (paths and nodes) from json"""
-    paths = {}
-    for name, item in j['paths'].items():
-        path = Path.load(j=item)
-        # list(map(Path.validate, item))
-        paths[name] = path
-
-    nodes = {}
-    for name, item in j['nodes'].items():
-        node = Node.load(j=item)
-        nodes[name] = node
-
-    return paths, nodes
-
-
+    """Create topology (paths and nodes) from json, all validation errors are reported together"""
+    return grid_loader.load_topology(j)
+
+
+def create_scheduled_states(j):
+    """Create states {step: {agent_name: state}} from scenario {agent_name: [state, ...]}.
+
+    i-th state of agent is applied at step i, unless the state has its own apply_at_step.
+    """
+    scheduled_states = {}
+    for name, states in j.items():
+        for step, state in enumerate(states):
+            state = dict(state)
+            step = state.pop('apply_at_step', step)
+            State.validate(state)
+            scheduled_states.setdefault(step, {})[name] = state
+    return scheduled_states
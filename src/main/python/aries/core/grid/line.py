@@ -6,6 +6,7 @@ import cerberus
 from bson import json_util
 
 from aries.core import utils
+from aries.core.grid.record import Record
 
 # Schema for line validation
 line_schema = {
@@ -20,17 +21,9 @@ line_validator = cerberus.Validator(line_schema)
 line_validator.ignore_none_values = True
 
 
-class Line(object):
+class Line(Record):
     """Representation of line in simulation"""
-    name = None
-    resistance = None
-    reactance = None
-    shunt_resistance = None
-    shunt_reactance = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+    __slots__ = ('name', 'resistance', 'reactance', 'shunt_resistance', 'shunt_reactance')
 
     @classmethod
     def from_properties(cls, name, resistance, reactance, shunt_resistance, shunt_reactance):
@@ -47,6 +40,10 @@ class Line(object):
         """Dump object to json string"""
         return json_util.dumps(self, cls=LineEncoder)
 
+    def to_dict(self):
+        """Dump object to dictionary of native types, e.g. for BSON document"""
+        return LineEncoder().default(self)
+
     @classmethod
     def load(cls, name, j):
         """Create Line object from json"""
@@ -64,4 +61,4 @@ class LineEncoder(json.JSONEncoder):
     """Line Encoder for JSON serialization"""
 
     def default(self, o):
-        return dict(o.__dict__)
+        return o.properties()
@@ -0,0 +1,64 @@
+"""Provide Record base class for compact grid model objects"""
+
+
+def _items(obj, fields):
+    """Source of dictionary items of fields of obj"""
+    return ', '.join('{0!r}: {1}.{0}'.format(name, obj) for name in fields)
+
+
+def compile_methods(fields, nested=None):
+    """Compile __init__, properties and to_dict of record with fields, attributes are accessed directly like namedtuple.
+
+    nested maps fields holding records to fields of those records, to_dict dumps them inline into dictionaries and
+    leaves out the ones which are None.
+    """
+    nested = nested or {}
+    assignments = '\n    '.join('self.{0} = get({0!r})'.format(name) for name in fields) or 'pass'
+    items = _items('self', fields)
+    flat_items = _items('self', [name for name in fields if name not in nested])
+    nested_items = ''.join("    record = self.{0}\n"
+                           "    if record is not None:\n"
+                           "        result[{0!r}] = {{{1}}}\n".format(name, _items('record', nested[name]))
+                           for name in fields if name in nested)
+    source = "def __init__(self, params_dict):\n" \
+             "    get = params_dict.get\n" \
+             "    {}\n" \
+             "def properties(self):\n" \
+             "    return {{{}}}\n" \
+             "def to_dict(self):\n" \
+             "    result = {{{}}}\n" \
+             "{}" \
+             "    return result\n".format(assignments, items, flat_items, nested_items)
+    namespace = {}
+    exec(source, namespace)
+    return namespace['__init__'], namespace['properties'], namespace['to_dict']
+
+
+class Record(object):
+    """Base class of objects storing their fields in __slots__ instead of instance dictionary.
+
+    Fields are slots of class and its bases in order of declaration, fields missing in params_dict are None.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name not in fields:
+                    fields.append(name)
+        cls._fields = tuple(fields)
+        init, properties, _ = compile_methods(cls._fields)
+        init.__doc__ = Record.__init__.__doc__
+        properties.__doc__ = Record.properties.__doc__
+        cls.__init__ = init
+        cls.properties = properties
+
+    def __init__(self, params_dict):
+        """Initialization from dictionary"""
+
+    def properties(self):
+        """Return dictionary of all fields"""
+        return {}
@@ -5,6 +5,7 @@ import cerberus
 from bson import json_util
 
 from aries.core import utils
+from aries.core.grid.record import Record
 
 # Schema for state validation
 state_schema = {
@@ -65,22 +66,10 @@ state_schema = {
 state_validator = cerberus.Validator(state_schema)
 
 
-class State(object):
-    """Representation of State in simulation process"""
-    power_rating = None
-    power_factor = None
-    incoming_power = None
-    request_inject_power = None
-    request_power_factor = None
-
-    battery = None
-    electrical_vehicle = None
-    pv_panel = None
-    water_tank = None
-    wind_generator = None
-
-    def __init__(self, params_dict):
-        self.__dict__ = params_dict
+class State(Record):
+    """Representation of State in simulation process, properties which are not changed are None"""
+    __slots__ = ('power_rating', 'power_factor', 'incoming_power', 'request_inject_power', 'request_power_factor',
+                 'battery', 'electrical_vehicle', 'pv_panel', 'water_tank', 'wind_generator')
 
     @classmethod
     def load(cls, j):
@@ -102,4 +91,4 @@ class StateEncoder(json.JSONEncoder):
     """State Encoder for JSON serialization"""
 
     def default(self, o):
-        return dict(o.__dict__)
+        return {key: value for key, value in o.properties().items() if value is not None}
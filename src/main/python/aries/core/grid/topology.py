@@ -8,6 +8,7 @@ from bson import json_util
 
 # Schema for path validation
 from aries.core import utils
+from aries.core.grid.record import Record
 
 path_schema = {
     'active': {'type': 'integer', 'min': 0, 'max': 1, 'required': True},
@@ -26,14 +27,9 @@ node_validator = cerberus.Validator(node_schema)
 node_validator.ignore_none_values = True
 
 
-class Path(object):
+class Path(Record):
     """Representation of path in simulation"""
-
-    paths = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+    __slots__ = ('paths',)
 
     @classmethod
     def from_properties(cls, paths):
@@ -54,6 +50,10 @@ class Path(object):
         """Dump object to json string"""
         return json_util.dumps(self, cls=PathEncoder)
 
+    def to_dict(self):
+        """Dump object to dictionary of native types, e.g. for BSON document"""
+        return PathEncoder().default(self)
+
     @classmethod
     def load(cls, j):
         """Create Path object from json"""
@@ -87,16 +87,9 @@ class PathEncoder(json.JSONEncoder):
         return result
 
 
-class Node(object):
+class Node(Record):
     """Representation of node in simulation"""
-    branches_in = None
-    branches_out = None
-    adjacency = None
-    agent = None
-
-    def __init__(self, params_dict):
-        """Initialization from dictionary"""
-        self.__dict__ = params_dict
+    __slots__ = ('branches_in', 'branches_out', 'adjacency', 'agent')
 
     @classmethod
     def from_properties(cls, branches_in, branches_out, adjacency, agent):
@@ -112,6 +105,10 @@ class Node(object):
         """Dump object to json string"""
         return json_util.dumps(self, cls=NodeEncoder)
 
+    def to_dict(self):
+        """Dump object to dictionary of native types, e.g. for BSON document"""
+        return NodeEncoder().default(self)
+
     @classmethod
     def load(cls, j):
         """Create Node object from json"""
@@ -130,4 +127,4 @@ class NodeEncoder(json.JSONEncoder):
     """Node Encoder for JSON serialization"""
 
     def default(self, o):
-        return dict(o.__dict__)
+        return o.properties()
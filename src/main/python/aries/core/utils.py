@@ -1,4 +1,5 @@
 """Helpers for simulation process"""
+import copy
 import os
 
 import redis
@@ -45,6 +46,30 @@ def validate(obj, obj_type, validator):
     else:
         return validation_state
 
+def merge_dict(target, source):
+    """Merge source into target recursively"""
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_dict(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+def diff_dict(old, new):
+    """Nested dictionary of values of new which are different from old, merge_dict(old, diff) gives new"""
+    diff = {}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            nested_diff = diff_dict(old_value, value)
+            if nested_diff:
+                diff[key] = nested_diff
+        elif key not in old or old_value != value:
+            diff[key] = value
+    return diff
+
+
 def validate_log_level(level):
     try:
         logging._checkLevel(level)
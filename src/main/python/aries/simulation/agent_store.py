@@ -0,0 +1,293 @@
+"""Provide array-backed agent store and vectorized simulation step"""
+
+import numpy as np
+
+from aries.core.grid import grid_compiler
+
+# Mapping of store columns to (grid element, attribute) of Agent. Grid element None means attribute of Agent itself
+AGENT_COLUMNS = {
+    'voltage_rating': (None, 'voltage_rating'),
+    'power_rating': (None, 'power_rating'),
+    'power_factor': (None, 'power_factor'),
+    'incoming_power': (None, 'incoming_power'),
+    'request_inject_power': (None, 'request_inject_power'),
+    'request_power_factor': (None, 'request_power_factor'),
+
+    'battery_voltage': ('battery', 'voltage'),
+    'battery_capacity': ('battery', 'capacity'),
+    'battery_status': ('battery', 'status'),
+    'battery_contribution_active': ('battery', 'contribution_active'),
+    'battery_contribution_reactive': ('battery', 'contribution_reactive'),
+    'battery_inverter_efficiency': ('battery', 'inverter_efficiency'),
+    'battery_active': ('battery', 'active'),
+
+    'pv_panel_unit_area': ('pv_panel', 'unit_area'),
+    'pv_panel_series': ('pv_panel', 'series'),
+    'pv_panel_parallels': ('pv_panel', 'parallels'),
+    'pv_panel_efficiency': ('pv_panel', 'efficiency'),
+    'pv_panel_solar_irradiance': ('pv_panel', 'solar_irradiance'),
+    'pv_panel_battery_coupling_efficiency': ('pv_panel', 'battery_coupling_efficiency'),
+    'pv_panel_heating_contribution': ('pv_panel', 'heating_contribution'),
+    'pv_panel_active': ('pv_panel', 'active'),
+
+    'wind_generator_power_coefficient': ('wind_generator', 'power_coefficient'),
+    'wind_generator_air_density': ('wind_generator', 'air_density'),
+    'wind_generator_area': ('wind_generator', 'area'),
+    'wind_generator_wind_speed': ('wind_generator', 'wind_speed'),
+    'wind_generator_battery_coupling_efficiency': ('wind_generator', 'battery_coupling_efficiency'),
+    'wind_generator_active': ('wind_generator', 'active'),
+
+    'electrical_vehicle_voltage': ('electrical_vehicle', 'voltage'),
+    'electrical_vehicle_capacity': ('electrical_vehicle', 'capacity'),
+    'electrical_vehicle_status': ('electrical_vehicle', 'status'),
+    'electrical_vehicle_contribution_active': ('electrical_vehicle', 'contribution_active'),
+    'electrical_vehicle_contribution_reactive': ('electrical_vehicle', 'contribution_reactive'),
+    'electrical_vehicle_inverter_efficiency': ('electrical_vehicle', 'inverter_efficiency'),
+    'electrical_vehicle_charge_current': ('electrical_vehicle', 'charge_current'),
+    'electrical_vehicle_power_supplier': ('electrical_vehicle', 'power_supplier'),
+    'electrical_vehicle_active': ('electrical_vehicle', 'active'),
+
+    'water_tank_capacity': ('water_tank', 'capacity'),
+    'water_tank_temp': ('water_tank', 'temp'),
+    'water_tank_active': ('water_tank', 'active'),
+}
+
+# Columns changed by the simulation step itself, they have to be written back to Agent objects after each step
+STATE_COLUMNS = ['battery_status', 'electrical_vehicle_status', 'water_tank_temp']
+# Columns changed by controllers of clusters, they have to be read from Agent objects after clusters are run
+CLUSTER_COLUMNS = ['request_inject_power', 'request_power_factor']
+
+
+def _attribute(agent, element, attribute):
+    """Get attribute of agent or of one of its grid elements"""
+    if element is None:
+        return getattr(agent, attribute)
+    return getattr(getattr(agent, element), attribute)
+
+
+def _complex(real, imag):
+    """Build complex array from real and imaginary parts"""
+    result = np.empty(np.broadcast(real, imag).shape, dtype=np.complex128)
+    result.real = real
+    result.imag = imag
+    return result
+
+
+class AgentStore(object):
+    """Struct-of-arrays representation of agents, one NumPy column per agent property.
+
+    With scenarios set, every column has shape (scenarios, agents) and all scenarios are advanced together
+    """
+    names = None
+    index = None
+    scenarios = None
+    columns = None
+
+    def __init__(self, names, scenarios=None):
+        """Initialization from list of agent names and optional number of scenarios"""
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.scenarios = scenarios
+        self.columns = {column: np.zeros(self.shape) for column in AGENT_COLUMNS.keys()}
+
+    @classmethod
+    def from_agents(cls, agents, scenarios=None):
+        """Create AgentStore from dictionary of Agent objects, copied into each scenario if scenarios is set"""
+        store = cls(agents.keys(), scenarios=scenarios)
+        store.load(agents)
+        return store
+
+    @classmethod
+    def from_compiled(cls, path, scenarios=None):
+        """Create AgentStore from columns of grid elements compiled by aries --compile, without Agent objects"""
+        names, columns = grid_compiler.read_agent_columns(path)
+        store = cls(names, scenarios=scenarios)
+        for column in AGENT_COLUMNS:
+            store.columns[column] = np.broadcast_to(columns[column].astype(np.float64), store.shape).copy()
+        return store
+
+    @classmethod
+    def from_scenarios(cls, scenarios_agents):
+        """Create AgentStore from list of dictionaries of Agent objects, one dictionary per scenario"""
+        store = cls(scenarios_agents[0].keys(), scenarios=len(scenarios_agents))
+        for scenario, agents in enumerate(scenarios_agents):
+            store.load(agents, scenario=scenario)
+        return store
+
+    @property
+    def shape(self):
+        if self.scenarios is None:
+            return len(self.names),
+        return self.scenarios, len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def load(self, agents, columns=None, scenario=None):
+        """Copy values from Agent objects into columns (all columns and all scenarios by default)"""
+        columns = AGENT_COLUMNS.keys() if columns is None else columns
+        for column in columns:
+            element, attribute = AGENT_COLUMNS[column]
+            values = np.array([_attribute(agents[name], element, attribute) for name in self.names],
+                              dtype=np.float64)
+            if scenario is not None:
+                self.columns[column][scenario] = values
+            else:
+                self.columns[column] = np.broadcast_to(values, self.shape).copy()
+
+    def dump(self, agents, columns=None, scenario=None):
+        """Copy values from columns (of one scenario) back into Agent objects (state columns by default)"""
+        columns = STATE_COLUMNS if columns is None else columns
+        for column in columns:
+            element, attribute = AGENT_COLUMNS[column]
+            values = self.columns[column] if scenario is None else self.columns[column][scenario]
+            for name, value in zip(self.names, values.tolist()):
+                obj = agents[name] if element is None else getattr(agents[name], element)
+                setattr(obj, attribute, value)
+
+
+def reactive_power(power_rating, power_factor):
+    """Calculate reactive power for arrays"""
+    return power_rating * np.tan(np.arccos(power_factor))
+
+
+def impedance(voltage_rating, power_rating, power_factor):
+    """Calculate impedance for arrays"""
+    apparent_power = _complex(power_rating, reactive_power(power_rating, power_factor))
+    zero_power = np.abs(apparent_power) == 0
+    apparent_power[zero_power] = 1
+    return np.where(zero_power, np.complex128(1e9), np.conj(np.square(voltage_rating) / apparent_power))
+
+
+def erogate(status, mask, power, voltage, inverter_efficiency, time_scale):
+    """Erogate power from energy buffers where mask is set, return new status and mask of successful erogation"""
+    required_amps = (power / voltage / inverter_efficiency) * time_scale
+    erogated = mask & (status >= required_amps)
+    return np.where(erogated, status - required_amps, status), erogated
+
+
+def charge(status, mask, capacity, current, time_scale):
+    """Charge energy buffers where mask is set, return new status and energy left"""
+    total_coulombs = current * time_scale
+    fits = status + total_coulombs <= capacity
+    new_status = np.where(fits, status + total_coulombs, capacity)
+    energy_left = np.where(fits, 0., total_coulombs - (capacity - status))
+    return np.where(mask, new_status, status), np.where(mask, energy_left, 0.)
+
+
+def charge_water_tank(store, mask, power, time_scale):
+    """Charge water tanks where mask is set"""
+    c = store.columns
+    temp = c['water_tank_temp'] + (power * 3.412 / (4 * c['water_tank_capacity'])) * time_scale
+    c['water_tank_temp'] = np.where(mask, np.minimum(temp, 60), c['water_tank_temp'])
+
+
+def get_pv_power(store):
+    """Power of active pv panels, zero for inactive ones"""
+    c = store.columns
+    pv_power = c['pv_panel_unit_area'] * c['pv_panel_series'] * c['pv_panel_parallels'] * c[
+        'pv_panel_efficiency'] * c['pv_panel_solar_irradiance']
+    return np.where(c['pv_panel_active'] == 1, pv_power, 0.)
+
+
+def get_wind_power(store):
+    """Power of active wind generators, zero for inactive ones"""
+    c = store.columns
+    wind_power = (c['wind_generator_air_density'] * c['wind_generator_power_coefficient'] * c[
+        'wind_generator_area'] * c['wind_generator_wind_speed'] ** 3) / 2
+    return np.where(c['wind_generator_active'] == 1, wind_power, 0.)
+
+
+def process_simulation_step(store, time_scale):
+    """Vectorized counterpart of simulation.process_simulation_step advancing every agent of the store at once.
+
+    Return arrays of impedance, demand power, inject power, power from battery and pv power ordered as store.names
+    """
+    c = store.columns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Power of renewables and contribution of the pv panel to the water tank
+        pv_power = get_pv_power(store)
+        wind_power_to_battery = get_wind_power(store)
+        pv_power_to_heating = np.where(c['water_tank_active'] == 1, pv_power * c['pv_panel_heating_contribution'], 0.)
+        pv_power_to_battery = pv_power - pv_power_to_heating
+        charge_water_tank(store, pv_power_to_heating > 0, pv_power_to_heating, time_scale)
+
+        # Power demand, incoming power and request for power injection (see simulation_utils.manage_power)
+        rated_active_power = c['power_rating']
+        rated_reactive_power = reactive_power(rated_active_power, c['power_factor'])
+        incoming_power = np.where(c['incoming_power'] > 0, c['incoming_power'] - c['incoming_power'] * 0.05, 0.)
+        power_surplus = incoming_power - rated_active_power
+        absorb = power_surplus >= 0
+        total_active_power = np.where(absorb, incoming_power, rated_active_power)
+        total_reactive_power = np.where(absorb, 0., rated_reactive_power)
+        inject_allowed = ~absorb & (incoming_power <= 0)
+        request_inject_active_power = np.where(inject_allowed, c['request_inject_power'], 0.)
+        request_inject_reactive_power = np.where(
+            inject_allowed, reactive_power(c['request_inject_power'], c['request_power_factor']), 0.)
+
+        # Electrical vehicle in supply or charging mode (see simulation_utils.manage_ev)
+        ev_active = c['electrical_vehicle_active'] == 1
+        ev_supplier = ev_active & (c['electrical_vehicle_power_supplier'] == 1)
+        ev_charging = ev_active & ~ev_supplier
+        desired_active_power_from_ev = total_active_power * c['electrical_vehicle_contribution_active']
+        desired_reactive_power_from_ev = total_reactive_power * c['electrical_vehicle_contribution_reactive']
+        c['electrical_vehicle_status'], erogated = erogate(
+            c['electrical_vehicle_status'], ev_supplier,
+            np.abs(_complex(desired_active_power_from_ev, desired_reactive_power_from_ev)),
+            c['electrical_vehicle_voltage'], c['electrical_vehicle_inverter_efficiency'], time_scale)
+        total_active_power = np.where(erogated, total_active_power - desired_active_power_from_ev, total_active_power)
+        total_reactive_power = np.where(erogated, total_reactive_power - desired_reactive_power_from_ev,
+                                        total_reactive_power)
+        total_active_power = np.where(
+            ev_charging, total_active_power + c['electrical_vehicle_charge_current'] * c['voltage_rating'],
+            total_active_power)
+        c['electrical_vehicle_status'], _ = charge(c['electrical_vehicle_status'], ev_charging,
+                                                   c['electrical_vehicle_capacity'],
+                                                   c['electrical_vehicle_charge_current'], time_scale)
+
+        # Battery contribution and battery charging (see simulation_utils.manage_battery)
+        battery_active = c['battery_active'] == 1
+        desired_active_power_from_battery = rated_active_power * c['battery_contribution_active']
+        desired_reactive_power_from_battery = rated_reactive_power * c['battery_contribution_reactive']
+        c['battery_status'], erogated = erogate(
+            c['battery_status'], battery_active & (power_surplus <= 0),
+            np.abs(_complex(desired_active_power_from_battery, 1e-2 * desired_reactive_power_from_battery)),
+            c['battery_voltage'], c['battery_inverter_efficiency'], time_scale)
+        total_active_power_from_battery = np.where(erogated, desired_active_power_from_battery, 0.)
+        total_reactive_power_from_battery = np.where(erogated, desired_reactive_power_from_battery, 0.)
+        total_active_power = np.where(erogated, total_active_power - total_active_power_from_battery,
+                                      total_active_power)
+        total_reactive_power = np.where(erogated, total_reactive_power - total_reactive_power_from_battery,
+                                        total_reactive_power)
+
+        c['battery_status'], injected = erogate(
+            c['battery_status'], battery_active & (incoming_power <= 0),
+            np.abs(_complex(request_inject_active_power, request_inject_reactive_power)),
+            c['battery_voltage'], c['battery_inverter_efficiency'], time_scale)
+        inject_active_power = np.where(injected, request_inject_active_power, 0.)
+        inject_reactive_power = np.where(injected, request_inject_reactive_power, 0.)
+        total_active_power_from_battery = total_active_power_from_battery + inject_active_power
+        total_reactive_power_from_battery = total_reactive_power_from_battery + inject_reactive_power
+
+        current_surplus_to_battery = np.where(power_surplus > 0, power_surplus / c['battery_voltage'], 0.)
+        current_pv_to_battery = pv_power_to_battery * c['pv_panel_battery_coupling_efficiency'] / c['battery_voltage']
+        current_wind_to_battery = wind_power_to_battery * c['wind_generator_battery_coupling_efficiency'] / c[
+            'battery_voltage']
+        c['battery_status'], energy_left = charge(
+            c['battery_status'], battery_active, c['battery_capacity'],
+            current_pv_to_battery + current_wind_to_battery + current_surplus_to_battery, time_scale)
+        # If the battery is full, the excess goes to the water tank
+        charge_water_tank(store, energy_left > 0, energy_left / time_scale, time_scale)
+
+        total_apparent_power = np.abs(_complex(total_active_power, total_reactive_power))
+        has_power = total_apparent_power != 0
+        total_power_factor = np.where(has_power, total_active_power / total_apparent_power, 1.)
+        demand_power = np.where(has_power, _complex(total_active_power, total_reactive_power), 0j)
+        inject_power = _complex(inject_active_power, inject_reactive_power)
+        power_from_battery = _complex(total_active_power_from_battery, total_reactive_power_from_battery)
+
+        return (impedance(c['voltage_rating'], total_active_power, total_power_factor), demand_power, inject_power,
+                power_from_battery, pv_power)
@@ -0,0 +1,62 @@
+"""Provide simulation of several scenarios of the same grid advanced together"""
+import logging
+
+import numpy as np
+
+from aries.core.constants import TIME_SCALE
+from aries.simulation import agent_store
+from aries.simulation.agent_store import AgentStore
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSimulation(object):
+    """Representation of batched simulation, scenarios share topology and solver and differ in agent state only.
+
+    Columns of agent_store have shape (scenarios, agents), profiles and controller actions are applied by writing
+    directly into them between steps
+    """
+    agent_store = None
+    solver = None
+    step_number = None
+
+    def __init__(self, agent_store, solver):
+        self.agent_store = agent_store
+        self.solver = solver
+        self.step_number = 0
+
+    @classmethod
+    def from_agents(cls, agents, scenarios, solver):
+        """Create batched simulation with scenarios copies of agents"""
+        return cls(agent_store=AgentStore.from_agents(agents, scenarios=scenarios), solver=solver)
+
+    @classmethod
+    def from_scenarios(cls, scenarios_agents, solver):
+        """Create batched simulation from list of dictionaries of agents, one dictionary per scenario"""
+        return cls(agent_store=AgentStore.from_scenarios(scenarios_agents), solver=solver)
+
+    def step(self):
+        """Advance all scenarios by one step, every returned array has scenarios as first axis"""
+        impedance, demand_power, inject_power, power_from_battery, pv_power = agent_store.process_simulation_step(
+            store=self.agent_store, time_scale=TIME_SCALE)
+        simulation_result = self.solver.solve_batch(net_power=demand_power - inject_power,
+                                                    agent_names=self.agent_store.names)
+        self.step_number += 1
+        return {
+            'simulation_step': self.step_number,
+            'impedance': impedance,
+            'demand_power': demand_power,
+            'inject_power': inject_power,
+            'battery_power': power_from_battery,
+            'pv_power': pv_power,
+            'total_pv_power': np.sum(pv_power, axis=-1),
+            'simulation_result': simulation_result
+        }
+
+    def run(self, number_of_steps, callback=None):
+        """Run number_of_steps steps, callback(simulation, result) is called after each step"""
+        for _ in range(number_of_steps):
+            result = self.step()
+            logger.debug("{} {}".format(self.step_number, result['simulation_result']['power_from_main']))
+            if callback is not None:
+                callback(self, result)
@@ -0,0 +1,230 @@
+"""Benchmarks of step loop, solvers, clusters, storage and event path on generated grids.
+
+MongoDB and Redis can be replaced by in-process stand-ins, so that simulator is profiled without services.
+"""
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import simpy
+from bson import ObjectId
+
+from aries.controller import cluster_utils
+from aries.core import constants
+from aries.core.db.memory_mongodb import MemoryMongoClient
+from aries.core.db.mongodb import MongoDB, DATABASE, AGENTS
+from aries.core.event.event_queue import EventQueue
+from aries.core.event.memory_redis import MemoryRedis
+from aries.core.event.transport import InProcessTransport
+from aries.core.grid import grid_generator, grid_utils
+from aries.simulation import simulation, simulation_utils
+from aries.simulation.solver.linear_solver import LinearSolver
+from aries.simulation.solver.non_linear_solver import NonLinearSolver
+from aries.simulation.step_timer import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+PROCESS_SIMULATION_STEP = 'process_simulation_step'
+LINEAR_SOLVER = 'linear_solver'
+NON_LINEAR_SOLVER = 'non_linear_solver'
+LOAD_SHARING_CLUSTER = 'load_sharing_cluster'
+MONGODB_WRITE_AGENTS = 'mongodb_write_agents'
+EVENT_QUEUE_IN_PROCESS = 'event_queue_in_process'
+EVENT_QUEUE_REDIS = 'event_queue_redis'
+SIMULATION_STEP = 'simulation_step'
+BENCHMARKS = [PROCESS_SIMULATION_STEP, LINEAR_SOLVER, NON_LINEAR_SOLVER, LOAD_SHARING_CLUSTER, MONGODB_WRITE_AGENTS,
+              EVENT_QUEUE_IN_PROCESS, EVENT_QUEUE_REDIS, SIMULATION_STEP]
+
+# Name of event queues of benchmarks
+BENCHMARK_QUEUE = 'benchmark'
+CLUSTER_SIZE = 20
+# Small impedances, so that generated feeders of all sizes have a power flow solution
+RESISTANCE = (0.0005, 0.002)
+REACTANCE = (0.0, 0.0005)
+
+
+class Grid(object):
+    """Generated grid of benchmark"""
+
+    def __init__(self, number_of_agents, seed=0):
+        self.generated = grid_generator.generate_radial_grid(
+            number_of_agents, branching_factor=3, der_penetration=0.3, resistance=RESISTANCE, reactance=REACTANCE,
+            power_rating=(500, 3000), solar_irradiance=(0.0, 1.0), cluster_size=CLUSTER_SIZE, seed=seed)
+        self.build()
+
+    def build(self):
+        """Build agents, lines, paths, nodes and clusters of generated grid, changes made by benchmarks are dropped"""
+        topology, grid_elements, clusters = self.generated
+        self.agents, self.lines = grid_utils.create_grid_elements(grid_elements)
+        self.paths, self.nodes = grid_utils.create_topology(topology)
+        self.clusters = cluster_utils.create_clusters(clusters)
+
+    def agents_states(self):
+        """Agents states of one simulation step"""
+        agents_states = {}
+        for agent in self.agents.values():
+            agent_name, impedance, demand_power, inject_power, power_from_battery, _ = \
+                simulation.process_simulation_step(agent=agent, time_scale=1)
+            agents_states[agent_name] = simulation.agent_state(impedance, demand_power, inject_power,
+                                                               power_from_battery)
+        return agents_states
+
+
+def measure(function, repeat, warmup=1):
+    """Steps per second, latency percentiles and peak memory of calls of function"""
+    for _ in range(warmup):
+        function()
+
+    timer = PhaseTimer(window=repeat)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timer.record(time.perf_counter() - start)
+
+    # Memory is traced in its own call, tracing would distort the timings
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    summary = timer.summary()
+    return {'repeat': repeat, 'steps_per_sec': summary['count'] / summary['total'] if summary['total'] else None,
+            'mean': summary['mean'], 'p50': summary['p50'], 'p90': summary['p90'], 'p99': summary['p99'],
+            'max': summary['max'], 'peak_memory': peak_memory}
+
+
+def create_benchmark(name, grid, mongodb_client=None, redis_client=None):
+    """Return (function running one step of benchmark name on grid, cleanup function or None).
+
+    None is returned if benchmark can not run, e.g. MongoDB or Redis is not given.
+    """
+    if name == PROCESS_SIMULATION_STEP:
+        return grid.agents_states, None
+    if name == LINEAR_SOLVER:
+        solver = LinearSolver(paths=grid.paths, nodes=grid.nodes, lines=grid.lines)
+        agents_states = grid.agents_states()
+        return lambda: solver.solve(agents_states), None
+    if name == NON_LINEAR_SOLVER:
+        solver = NonLinearSolver(paths=grid.paths, nodes=grid.nodes, lines=grid.lines)
+        agents_states = grid.agents_states()
+        return lambda: solver.solve(agents_states), None
+    if name == LOAD_SHARING_CLUSTER:
+        def run_clusters():
+            for cluster in grid.clusters.values():
+                cluster.run(agents=grid.agents, lines=grid.lines, nodes=grid.nodes, paths=grid.paths)
+        return run_clusters, None
+    if name == MONGODB_WRITE_AGENTS:
+        if mongodb_client is None:
+            return None
+        storage = MongoDB(client=mongodb_client)
+        simulation_id = ObjectId()
+        return (lambda: storage.write_agents(grid.agents, ObjectId(), simulation_id),
+                lambda: mongodb_client[DATABASE][AGENTS].delete_many({'simulation_id': simulation_id}))
+    if name == EVENT_QUEUE_IN_PROCESS or name == EVENT_QUEUE_REDIS:
+        if name == EVENT_QUEUE_REDIS and redis_client is None:
+            return None
+        event_queue = EventQueue(redis=redis_client, name=BENCHMARK_QUEUE) if name == EVENT_QUEUE_REDIS else \
+            EventQueue(transport=InProcessTransport())
+        states = {'states': {agent_name: {'power_rating': agent.power_rating}
+                             for agent_name, agent in grid.agents.items()}}
+
+        def round_trip():
+            event_queue.write_states(states)
+            event_queue.read_all_states()
+        return round_trip, event_queue.cleanup
+    if name == SIMULATION_STEP:
+        # Full simulation step does not need services, they are replaced by stand-ins if they are not given
+        return create_simulation_benchmark(grid, mongodb_client if mongodb_client is not None else MemoryMongoClient(),
+                                           redis_client if redis_client is not None else MemoryRedis())
+    raise ValueError("Unknown benchmark {}".format(name))
+
+
+def create_simulation_benchmark(grid, mongodb_client, redis_client):
+    """Return (function running one full simulation step with one state event, cleanup function)"""
+    storage = MongoDB(client=mongodb_client)
+    storage.create_indexes()
+    event_queue = EventQueue(redis=redis_client, name=BENCHMARK_QUEUE)
+    event_queue.cleanup()
+    solver = simulation_utils.create_solver(solver_type=constants.LINEAR_SOLVER, paths=grid.paths, nodes=grid.nodes,
+                                            lines=grid.lines)
+    simulation_id = storage.write_simulation(agents=grid.agents, lines=grid.lines, paths=grid.paths,
+                                             nodes=grid.nodes, solver=solver.type, clusters=grid.clusters)
+    step_simulation = simulation.Simulation(agents=grid.agents, lines=grid.lines, paths=grid.paths, nodes=grid.nodes,
+                                            clusters=grid.clusters, storage=storage, event_queue=event_queue,
+                                            solver=solver, simulation_id=simulation_id, latency=0)
+    env = simpy.Environment()
+    step_simulation.init_simulation(env)
+    agent_name, agent = next(iter(grid.agents.items()))
+    states = {'states': {agent_name: {'power_rating': agent.power_rating}}}
+
+    def step():
+        event_queue.write_states(states)
+        env.run(until=env.now + 1)
+
+    def cleanup():
+        event_queue.cleanup()
+        step_simulation.close()
+        storage.clear_agents(simulation_id=simulation_id)
+        storage.clear_simulation_step(simulation_id=simulation_id)
+        storage.clear_states(simulation_id=simulation_id)
+        storage.clear_clusters(simulation_id=simulation_id)
+        storage.clear_simulation(simulation_id=simulation_id)
+    return step, cleanup
+
+
+def git_commit():
+    """Commit of working directory, None if it is not known"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, benchmarks=None, repeat=20, mongodb_client=None, redis_client=None, seed=0):
+    """Run benchmarks on grids with sizes agents and return results with metadata of the run"""
+    results = []
+    for number_of_agents in sizes:
+        grid = Grid(number_of_agents, seed=seed)
+        for name in benchmarks or BENCHMARKS:
+            # Benchmarks change agents, every benchmark starts from the generated grid whatever ran before it
+            grid.build()
+            benchmark = create_benchmark(name, grid, mongodb_client=mongodb_client, redis_client=redis_client)
+            if benchmark is None:
+                logger.info("Benchmark {} is skipped".format(name))
+                continue
+            run, cleanup = benchmark
+            try:
+                result = measure(run, repeat)
+            finally:
+                if cleanup is not None:
+                    cleanup()
+            result.update({'benchmark': name, 'agents': number_of_agents})
+            logger.info("{} with {} agents: {:.1f} steps/s, p99 {:.6f} s".format(
+                name, number_of_agents, result['steps_per_sec'] or 0, result['p99']))
+            results.append(result)
+    return {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+            'time': datetime.datetime.utcnow().isoformat(), 'repeat': repeat, 'results': results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """Compare p50 latency of results present in both runs, regressions are slower by more than threshold"""
+    baseline_results = {(result['benchmark'], result['agents']): result for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        key = (result['benchmark'], result['agents'])
+        if key not in baseline_results or not baseline_results[key]['p50']:
+            continue
+        ratio = result['p50'] / baseline_results[key]['p50']
+        comparison.append({'benchmark': key[0], 'agents': key[1], 'baseline_p50': baseline_results[key]['p50'],
+                           'p50': result['p50'], 'ratio': ratio, 'regression': ratio > 1 + threshold})
+    return comparison
+
+
+def write_results(path, results):
+    """Write results as json"""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
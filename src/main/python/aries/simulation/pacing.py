@@ -0,0 +1,62 @@
+"""Pace simulation steps to wall clock"""
+import logging
+import time
+
+from aries.core.constants import TIME_SCALE, CATCH_UP_POLICY, SKIP_POLICY
+
+logger = logging.getLogger(__name__)
+
+
+class Pacer(object):
+    """Every simulation step takes period seconds of wall clock, its own compute time included.
+
+    Ends of steps are fixed deadlines, so compute time and sleep inaccuracy do not accumulate into drift.
+    """
+
+    def __init__(self, period, overrun_policy=CATCH_UP_POLICY, clock=time.perf_counter, sleep=time.sleep):
+        self.period = period
+        self.overrun_policy = overrun_policy
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = None
+        self.overruns = 0
+        self.skipped_steps = 0
+        self.max_lateness = 0.0
+
+    def start(self):
+        """Start period of first step"""
+        self.deadline = self.clock() + self.period
+
+    def wait(self):
+        """Wait until end of period of current step, return number of steps simulation time advances"""
+        if self.deadline is None:
+            self.start()
+        lateness = self.clock() - self.deadline
+        if lateness <= 0:
+            self.sleep(-lateness)
+            self.deadline += self.period
+            return 1
+
+        self.overruns += 1
+        self.max_lateness = max(self.max_lateness, lateness)
+        logger.warning("Simulation step overran its period by {:.6f} s".format(lateness))
+        if self.overrun_policy == SKIP_POLICY:
+            # Steps whose whole period has already passed are skipped, the next step runs in the current period
+            skipped_steps = int(lateness // self.period)
+            self.skipped_steps += skipped_steps
+            self.deadline += (skipped_steps + 1) * self.period
+            return skipped_steps + 1
+        # Next step starts at once, deadlines are kept so missed periods are caught up
+        self.deadline += self.period
+        return 1
+
+    def report(self):
+        """Summary of overruns"""
+        return {'overruns': self.overruns, 'skipped_steps': self.skipped_steps, 'max_lateness': self.max_lateness}
+
+
+def create_pacer(real_time_factor, overrun_policy=CATCH_UP_POLICY):
+    """Create pacer running real_time_factor times faster than real time, None if pacing is disabled"""
+    if not real_time_factor:
+        return None
+    return Pacer(period=TIME_SCALE / real_time_factor, overrun_policy=overrun_policy)
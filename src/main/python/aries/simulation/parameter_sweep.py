@@ -0,0 +1,96 @@
+"""Run the same simulation over a grid of parameters in parallel processes"""
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aries.core.config.config import Config
+from aries.core.db.memory_mongodb import MemoryMongoClient
+from aries.core.event.memory_redis import MemoryRedis
+from aries.core.exceptions import ValidationError
+from aries.simulation import simulation_loader
+from aries.simulation.run_simulation import run_simulation
+
+logger = logging.getLogger(__name__)
+
+# Parameter of the grid which is applied to grid elements instead of config
+AGENTS_PARAMETER = 'agents'
+
+
+def expand_parameter_grid(parameters):
+    """Expand dictionary of parameter lists into the list of all their combinations"""
+    for name, values in parameters.items():
+        if not isinstance(values, list) or len(values) == 0:
+            raise ValidationError("Sweep parameter '{}' has to be a non empty list".format(name))
+    names = list(parameters.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*parameters.values())]
+
+
+def create_sweep_configurations(config_json, sweep_json):
+    """Create list of (config json, agents overrides, parameters) for every combination of the sweep parameters"""
+    configurations = []
+    for parameters in expand_parameter_grid(sweep_json.get('parameters', {})):
+        run_config_json = dict(config_json)
+        run_config_json.update({k: v for k, v in parameters.items() if k != AGENTS_PARAMETER})
+        # Fail early, before any process is started
+        Config.load(dict(run_config_json))
+        configurations.append((run_config_json, parameters.get(AGENTS_PARAMETER), parameters))
+    return configurations
+
+
+def run_configuration(config_json, agents_overrides=None, name=None, offline=False):
+    """Run one simulation in its own storage and event queue connections and return summary of the run.
+
+    Offline runs use in-process MongoDB and Redis stand-ins, their results are kept only in memory of the run.
+    """
+    summary = {'name': name, 'simulation_id': None, 'steps': 0, 'elapsed': 0.0, 'error': None}
+    start = time.perf_counter()
+    try:
+        config = Config.load(config_json)
+        mongodb_client, redis_client = (MemoryMongoClient(), MemoryRedis()) if offline else (None, None)
+        simulation = simulation_loader.build_simulation(config, agents_overrides=agents_overrides, name=name,
+                                                        mongodb_client=mongodb_client, redis_client=redis_client)
+        summary['simulation_id'] = str(simulation.simulation_id)
+
+        run_simulation(simulation=simulation, number_of_steps=config.simulation_steps)
+        summary['steps'] = simulation.env.now if simulation.env is not None else 0
+    except Exception as e:
+        logger.exception(e)
+        summary['error'] = str(e)
+    summary['elapsed'] = time.perf_counter() - start
+    return summary
+
+
+def run_sweep(config_json, sweep_json, workers=None, offline=False):
+    """Run every combination of the sweep parameters in a process pool and return aggregated summary"""
+    configurations = create_sweep_configurations(config_json, sweep_json)
+    workers = workers or sweep_json.get('workers') or os.cpu_count()
+    logger.info("Running {} simulations in {} processes".format(len(configurations), workers))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_configuration, run_config_json, agents_overrides, 'sweep_{}'.format(idx),
+                                   offline)
+                   for idx, (run_config_json, agents_overrides, _) in enumerate(configurations)]
+        runs = []
+        for future, (_, _, parameters) in zip(futures, configurations):
+            run = future.result()
+            run['parameters'] = parameters
+            runs.append(run)
+            logger.info("{} finished in {:.3f}s {}".format(run['name'], run['elapsed'], parameters))
+
+    return summarize_runs(runs, elapsed=time.perf_counter() - start)
+
+
+def summarize_runs(runs, elapsed):
+    """Aggregate summaries of the runs"""
+    succeeded = [run for run in runs if run['error'] is None]
+    return {
+        'runs': runs,
+        'succeeded': len(succeeded),
+        'failed': len(runs) - len(succeeded),
+        'steps': sum(run['steps'] for run in succeeded),
+        'elapsed': elapsed,
+        'simulation_elapsed': sum(run['elapsed'] for run in runs)
+    }
@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 
 def run_simulation(simulation, number_of_steps):
-    """Run simulation with given parameters"""
+    """Run simulation with given parameters, simulation is closed also when its step raises an exception"""
     try:
         env = simpy.Environment()
         simulation.init_simulation(env)
@@ -17,5 +17,9 @@ def run_simulation(simulation, number_of_steps):
             env.run(until=number_of_steps)
         else:
             env.run()
-    except Exception as e:
-        logger.exception(e)
+    finally:
+        try:
+            simulation.close()
+        except Exception as e:
+            logger.exception(e)
+        logger.info("Step timings [ms]\n{}".format(simulation.step_timer.format_summary()))
@@ -1,4 +1,6 @@
 """Provide classes for simulation"""
+import heapq
+import itertools
 import json
 import logging
 import time
@@ -8,10 +10,15 @@ import numpy as np
 from aries.controller import cluster_utils
 from aries.core.constants import TIME_SCALE
 from aries.core.grid.state import State
-from aries.simulation import simulation_utils
+from aries.simulation import simulation_utils, agent_store
+from aries.simulation.step_timer import StepTimer, STATE_PHASE, CLUSTER_PHASE, AGENTS_PHASE, SOLVER_PHASE, \
+    WRITE_PHASE, STEP_PHASE
 
 logger = logging.getLogger(__name__)
 
+# Summary of step timings is stored every STEP_TIMINGS_INTERVAL steps
+STEP_TIMINGS_INTERVAL = 100
+
 
 def process_simulation_step(agent, time_scale):
     """Determine the new Agent state according to external factors contained in state"""
@@ -61,6 +68,18 @@ def process_simulation_step(agent, time_scale):
             total_power_from_battery, pv_power)
 
 
+def agent_state(impedance, demand_power, inject_power, power_from_battery):
+    """Build agent state for solver and storage from results of simulation step"""
+    return {"impedance": {"resistance": np.real(impedance),
+                          "reactance": np.imag(impedance)},
+            "inject_power": {"active_power": np.real(inject_power),
+                             "reactive_power": np.imag(inject_power)},
+            "demand_power": {"active_power": np.real(demand_power),
+                             "reactive_power": np.imag(demand_power)},
+            "battery_power": {"active_power": np.real(power_from_battery),
+                              "reactive_power": np.imag(power_from_battery)}}
+
+
 class Simulation(object):
     """Representation of simulation"""
     simulation_id = None
@@ -73,12 +92,20 @@ class Simulation(object):
     event_queue = None
     latency = None
     solver = None
+    agent_store = None
+    agents_changed = False
+    requests_changed = False
+    writer = None
+    scheduled_states = None
+    pacer = None
+    step_timer = None
+    step_timings_step = None
 
     env = None
     process = None
 
     def __init__(self, agents, lines, paths, nodes, storage, event_queue, solver, simulation_id, latency,
-                 clusters=None):
+                 clusters=None, vectorized=False, writer=None, pacer=None, compiled_grid_elements=None):
         self.agents = agents
         self.lines = lines
         self.paths = paths
@@ -89,33 +116,73 @@ class Simulation(object):
         self.simulation_id = simulation_id
         self.latency = latency
         self.clusters = clusters
+        if vectorized:
+            # Columns of grid elements compiled by aries --compile are read directly, without Agent objects
+            if compiled_grid_elements is not None:
+                self.agent_store = agent_store.AgentStore.from_compiled(compiled_grid_elements)
+            else:
+                self.agent_store = agent_store.AgentStore.from_agents(agents)
+        # Simulation results are written in background by writer if it is set
+        self.writer = writer
+        # Heap of (step, order, states), states of the same step are applied in order of scheduling
+        self.scheduled_states = []
+        self.scheduling_order = itertools.count()
+        # Steps are paced to wall clock by pacer if it is set, latency is used otherwise
+        self.pacer = pacer
+        self.step_timer = StepTimer()
+        # Step at which summary of step timings was written last time
+        self.step_timings_step = -1
+
+    def schedule_states(self, states, apply_at_step):
+        """Schedule states {agent_name: state} to be applied at step apply_at_step"""
+        heapq.heappush(self.scheduled_states, (apply_at_step, next(self.scheduling_order), states))
+
+    def read_states(self):
+        """Read states due at current step, events scheduled for later steps are kept until their step"""
+        events = self.event_queue.read_all_states() if self.event_queue is not None else []
+        current_states = []
+        for ev in events:
+            apply_at_step = ev.get('apply_at_step')
+            if apply_at_step is not None and apply_at_step > self.env.now:
+                self.schedule_states(ev['states'], apply_at_step)
+            else:
+                current_states.append(ev['states'])
+
+        due_states = []
+        while self.scheduled_states and self.scheduled_states[0][0] <= self.env.now:
+            due_states.append(heapq.heappop(self.scheduled_states)[2])
+        return due_states + current_states
 
     def check_and_update_state(self):
-        """Read events and update state of agent"""
-        ev = self.event_queue.read_states()
-        if ev is None:
+        """Read all pending and scheduled events and update state of agents in order of events"""
+        states_events = self.read_states()
+        if not states_events:
             return
         is_applied = True
-        for agent_name, j in ev['states'].items():
-            try:
-                # state = State(json.loads(j))
-                print(agent_name, j)
-                state = State(j)
-                self.agents[agent_name].update_state(state)
-            except Exception as e:
-                is_applied = False
-                logging.exception('check_and_update_state', e)
-
-        # Store state events
-        self.storage.write_states(ev['states'], simulation_id=self.simulation_id, simulation_step=self.env.now,
-                                  is_applied=is_applied)
+        for states in states_events:
+            for agent_name, j in states.items():
+                try:
+                    state = State(j)
+                    self.agents[agent_name].update_state(state)
+                    self.agents_changed = True
+                except Exception as e:
+                    is_applied = False
+                    logging.exception('check_and_update_state', e)
+
+        # Store state events of the step as one batch
+        self.storage.write_states(states_events, simulation_id=self.simulation_id,
+                                  simulation_step=self.env.now, is_applied=is_applied)
 
     def check_and_update_cluster(self):
         """Read cluster events and update agent configuration"""
         try:
-            ev = self.event_queue.read_clusters()
-            if ev is not None:
+            events = self.event_queue.read_all_clusters() if self.event_queue is not None else []
+            if events:
+                # Every clusters event replaces all clusters, so only the last one is applied
+                ev = events[-1]
                 is_applied = True
+                # Requests of all agents are reset, also when the event removes all clusters
+                self.agents_changed = True
                 for agent in self.agents.values():
                     agent.request_inject_power = 0
                     agent.request_power_factor = 1
@@ -124,7 +191,10 @@ class Simulation(object):
                 else:
                     self.clusters = {}
 
-                # Store cluster events
+                # Store all cluster events, events superseded by the last one are not applied
+                for superseded in events[:-1]:
+                    self.storage.write_clusters(superseded['clusters'], simulation_id=self.simulation_id,
+                                                simulation_step=self.env.now, is_applied=False)
                 self.storage.write_clusters(ev['clusters'], simulation_id=self.simulation_id,
                                             simulation_step=self.env.now,
                                             is_applied=is_applied)
@@ -132,6 +202,8 @@ class Simulation(object):
             logging.exception('check_and_update_cluster', e)
 
         if self.clusters:
+            # Controllers change only requests of agents, other columns of agent store are kept
+            self.requests_changed = True
             for name, cluster in self.clusters.items():
                 cluster.run(agents=self.agents, lines=self.lines, nodes=self.nodes, paths=self.paths)
 
@@ -142,49 +214,110 @@ class Simulation(object):
 
     def run(self):
         """Run cluster method"""
+        if self.pacer is not None:
+            self.pacer.start()
         while True:
-            if self.latency and self.latency > 0:
+            if self.pacer is None and self.latency and self.latency > 0:
                 time.sleep(self.latency / 1000)
 
-            self.check_and_update_state()
-            self.check_and_update_cluster()
-
-            agents_states = {}
-            total_pv_power = 0
-            for agent in self.agents.values():
-                ret_vals = process_simulation_step(
-                    agent=agent, time_scale=TIME_SCALE)
-                agent_name, impedance, demand_power, inject_power, power_from_battery, pv_power = ret_vals
-                # With this we have all the data we need to solve the power flow equations
-                # Initial conditions for voltages at the buses are to be set to the pcc voltage_rating, i.e., 230V for
-                # single phase and 400V for three-phase systems
-
-                # impedance is already computed on the actual power demand that accounts for the incoming power
-                # hence no need for recomputing it
-                total_pv_power += pv_power
-                agents_states[agent_name] = {"impedance": {"resistance": np.real(impedance),
-                                                           "reactance": np.imag(impedance)},
-                                             "inject_power": {"active_power": np.real(inject_power),
-                                                              "reactive_power": np.imag(inject_power)},
-                                             "demand_power": {"active_power": np.real(demand_power),
-                                                              "reactive_power": np.imag(demand_power)},
-                                             "battery_power": {"active_power": np.real(power_from_battery),
-                                                               "reactive_power": np.imag(power_from_battery)}}
-
-            simulation_result = self.solver.solve(agents_states)
-            # simulation_result['pv_power'] = total_pv_power
-            self.write_simulation_result(simulation_result=simulation_result, agents_states=agents_states,
-                                         total_pv_power=total_pv_power)
+            timer = self.step_timer
+            with timer.measure(STEP_PHASE):
+                with timer.measure(STATE_PHASE):
+                    self.check_and_update_state()
+                with timer.measure(CLUSTER_PHASE):
+                    self.check_and_update_cluster()
+
+                with timer.measure(AGENTS_PHASE):
+                    if self.agent_store is not None:
+                        agents_states, total_pv_power = self.process_agents_vectorized()
+                    else:
+                        agents_states, total_pv_power = self.process_agents()
+
+                with timer.measure(SOLVER_PHASE):
+                    simulation_result = self.solver.solve(agents_states)
+                # simulation_result['pv_power'] = total_pv_power
+                with timer.measure(WRITE_PHASE):
+                    self.write_simulation_result(simulation_result=simulation_result, agents_states=agents_states,
+                                                 total_pv_power=total_pv_power)
             logger.info("{} {}".format(self.env.now, simulation_result))
-            yield self.env.timeout(1)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("{} step timings {}".format(self.env.now, timer.last()))
+            # Steps can be skipped by pacer, so interval is measured from the last written step
+            if self.env.now - self.step_timings_step >= STEP_TIMINGS_INTERVAL:
+                self.write_step_timings()
+            yield self.env.timeout(self.pacer.wait() if self.pacer is not None else 1)
+
+    def process_agents(self):
+        """Process simulation step for each agent one by one"""
+        agents_states = {}
+        total_pv_power = 0
+        for agent in self.agents.values():
+            ret_vals = process_simulation_step(
+                agent=agent, time_scale=TIME_SCALE)
+            agent_name, impedance, demand_power, inject_power, power_from_battery, pv_power = ret_vals
+            # With this we have all the data we need to solve the power flow equations
+            # Initial conditions for voltages at the buses are to be set to the pcc voltage_rating, i.e., 230V for
+            # single phase and 400V for three-phase systems
+
+            # impedance is already computed on the actual power demand that accounts for the incoming power
+            # hence no need for recomputing it
+            total_pv_power += pv_power
+            agents_states[agent_name] = agent_state(impedance=impedance, demand_power=demand_power,
+                                                    inject_power=inject_power, power_from_battery=power_from_battery)
+        return agents_states, total_pv_power
+
+    def process_agents_vectorized(self):
+        """Process simulation step for all agents in one pass over agent store"""
+        # Agents are updated by state events and clusters, reload store only if it could happen
+        if self.agents_changed:
+            self.agent_store.load(self.agents)
+        elif self.requests_changed:
+            self.agent_store.load(self.agents, columns=agent_store.CLUSTER_COLUMNS)
+        self.agents_changed = False
+        self.requests_changed = False
+        impedance, demand_power, inject_power, power_from_battery, pv_power = agent_store.process_simulation_step(
+            store=self.agent_store, time_scale=TIME_SCALE)
+        # Agent objects are still used by storage, clusters and events
+        self.agent_store.dump(self.agents)
+
+        agents_states = {}
+        ret_vals_of_agents = zip(impedance.tolist(), demand_power.tolist(), inject_power.tolist(),
+                                 power_from_battery.tolist())
+        for agent_name, ret_vals in zip(self.agent_store.names, ret_vals_of_agents):
+            agents_states[agent_name] = agent_state(*ret_vals)
+        return agents_states, float(np.sum(pv_power))
 
     def write_simulation_result(self, simulation_result, agents_states, total_pv_power):
         """Help method to write simulation result in one go"""
+        if self.writer is not None:
+            self.writer.write_simulation_result(simulation_step=self.env.now, simulation_id=self.simulation_id,
+                                                simulation_result=simulation_result, agents_states=agents_states,
+                                                total_pv_power=total_pv_power, agents=self.agents)
+            return
         simulation_step_id = self.storage.write_simulation_step(simulation_step=self.env.now,
                                                                 simulation_id=self.simulation_id,
                                                                 simulation_result=simulation_result,
                                                                 agents_states=agents_states,
                                                                 total_pv_power=total_pv_power)
         self.storage.write_agents(agents=self.agents, simulation_step_id=simulation_step_id,
-                                  simulation_id=self.simulation_id)
+                                  simulation_id=self.simulation_id, simulation_step=self.env.now)
         self.storage.finalize_simulation_step(simulation_step_id)
+
+    def write_step_timings(self):
+        """Write summary of step timings, by writer in background if it is set"""
+        self.step_timings_step = self.env.now
+        if self.writer is not None:
+            self.writer.write_step_timings(self.simulation_id, self.step_timer.summary())
+        else:
+            self.storage.write_step_timings(self.simulation_id, self.step_timer.summary())
+
+    def close(self):
+        """Write all pending simulation results and step timings and close event queue"""
+        if self.writer is not None:
+            self.writer.close()
+        self.storage.write_step_timings(self.simulation_id, self.step_timer.summary())
+        self.storage.close()
+        if self.event_queue is not None:
+            self.event_queue.close()
+        if self.pacer is not None:
+            logger.info("Real-time pacing: {}".format(self.pacer.report()))
@@ -0,0 +1,141 @@
+"""Load grid elements referenced by config and build simulation of config"""
+import copy
+import json
+import os
+
+from aries.controller import cluster_utils
+from aries.core import utils
+from aries.core.constants import LINEAR_SOLVER
+from aries.core.db import storage_utils
+from aries.core.db.async_writer import AsyncWriter
+from aries.core.event import event_utils
+from aries.core.exceptions import ValidationError
+from aries.core.grid import grid_utils, grid_compiler
+from aries.simulation import simulation_utils, pacing
+from aries.simulation.simulation import Simulation
+
+# Agent name in overrides which is applied to all the agents
+ALL_AGENTS = '*'
+
+
+def check_if_agent_and_paths_same_in_linear(agents, paths):
+    """Check if agents and paths has same names"""
+    agent_names = agents.keys() - paths.keys()
+    path_names = paths.keys() - agents.keys()
+    if len(agent_names) > 0:
+        raise ValidationError(
+            "Agent names is not the same. Please check these name(s): {} in grid elements paths.".format(agent_names))
+    if len(path_names) > 0:
+        raise ValidationError(
+            "Path agent names is not the same. Please check these name(s): {} in topology paths.".format(path_names))
+
+
+def apply_agent_overrides(grid_elements_json, overrides):
+    """Return copy of grid elements json with overrides {agent_name or '*': {parameter: value}} merged into agents"""
+    grid_elements_json = copy.deepcopy(grid_elements_json)
+    agents_json = grid_elements_json['agents']
+    for agent_name, parameters in overrides.items():
+        if agent_name == ALL_AGENTS:
+            for agent_json in agents_json.values():
+                utils.merge_dict(agent_json, parameters)
+        elif agent_name in agents_json:
+            utils.merge_dict(agents_json[agent_name], parameters)
+        else:
+            raise ValidationError("Could not override agent '{}', it is not in grid elements".format(agent_name))
+    return grid_elements_json
+
+
+def load_simulation_elements(config, agents_overrides=None):
+    """Load agents, lines, paths, nodes and clusters referenced by config.
+
+    Grid elements and topology are either json or compiled by aries --compile, compiled files are memory-mapped.
+    """
+    if grid_compiler.is_compiled(config.grid_elements):
+        agents, lines = grid_compiler.load_grid_elements(config.grid_elements)
+        if agents_overrides:
+            # Overridden agents are validated again
+            grid_element_json = {'agents': grid_utils.dict_to_documents(agents),
+                                 'lines': grid_utils.dict_to_documents(lines)}
+            agents, lines = grid_utils.create_grid_elements(apply_agent_overrides(grid_element_json,
+                                                                                  agents_overrides))
+    else:
+        with utils.check_if_file_exists(config.grid_elements) as grid_file:
+            grid_element_json = json.load(grid_file)
+            if agents_overrides:
+                grid_element_json = apply_agent_overrides(grid_element_json, agents_overrides)
+            agents, lines = grid_utils.create_grid_elements(grid_element_json)
+
+    if grid_compiler.is_compiled(config.topology):
+        paths, nodes = grid_compiler.load_topology(config.topology)
+    else:
+        with utils.check_if_file_exists(config.topology) as topology_file:
+            topology_json = json.load(topology_file)
+            paths, nodes = grid_utils.create_topology(topology_json)
+
+    clusters = None
+    if config.clusters:
+        with utils.check_if_file_exists(config.clusters) as cluster_file:
+            cluster_json = json.load(cluster_file)
+            clusters = cluster_utils.create_clusters(cluster_json)
+
+    if config.solver_type == LINEAR_SOLVER:
+        check_if_agent_and_paths_same_in_linear(agents, paths)
+
+    return agents, lines, paths, nodes, clusters
+
+
+def load_scheduled_states(config):
+    """Load scripted states {step: {agent_name: state}} referenced by config"""
+    if not config.states:
+        return {}
+    with utils.check_if_file_exists(config.states) as states_file:
+        return grid_utils.create_scheduled_states(json.load(states_file))
+
+
+def compile_simulation_elements(config, path):
+    """Validate grid elements and topology referenced by config and write them compiled into directory path"""
+    agents, lines, paths, nodes, _ = load_simulation_elements(config)
+    os.makedirs(path, exist_ok=True)
+    grid_elements_path = os.path.join(path, grid_compiler.GRID_ELEMENTS_FILE)
+    topology_path = os.path.join(path, grid_compiler.TOPOLOGY_FILE)
+    grid_compiler.compile_grid_elements(grid_elements_path, agents, lines)
+    grid_compiler.compile_topology(topology_path, paths, nodes)
+    return grid_elements_path, topology_path
+
+
+def build_simulation(config, agents_overrides=None, name=None, mongodb_client=None, redis_client=None):
+    """Build simulation of config with its storage, event queue, writer, solver and scheduled states.
+
+    Simulation is written to storage, MongoDB and Redis clients are created from config if they are not given.
+    """
+    agents, lines, paths, nodes, clusters = load_simulation_elements(config, agents_overrides=agents_overrides)
+
+    scheduled_states = load_scheduled_states(config)
+
+    # Without polling only scheduled states are applied
+    event_queue = None
+    if config.poll_events:
+        event_queue = event_utils.create_event_queue(config, redis_client=redis_client, name=name, serve=True)
+        event_queue.cleanup()
+
+    storage = storage_utils.create_storage(config, mongodb_client=mongodb_client)
+    # Results are written in background in batches of storage_batch_size steps
+    writer = AsyncWriter(storage, batch_size=config.storage_batch_size) if config.storage_batch_size > 0 else None
+
+    solver = simulation_utils.create_solver(solver_type=config.solver_type, paths=paths, nodes=nodes,
+                                            lines=lines, warm_start=config.warm_start)
+    simulation_id = storage.write_simulation(agents=agents, lines=lines, paths=paths,
+                                             nodes=nodes, solver=solver.type, clusters=clusters)
+    # Overridden agents differ from compiled ones, their agent store is built from agents
+    compiled_grid_elements = None
+    if grid_compiler.is_compiled(config.grid_elements) and not agents_overrides:
+        compiled_grid_elements = config.grid_elements
+
+    simulation = Simulation(agents=agents, lines=lines, nodes=nodes, paths=paths, clusters=clusters,
+                            storage=storage, latency=config.latency, simulation_id=simulation_id,
+                            event_queue=event_queue, solver=solver, vectorized=config.vectorized,
+                            writer=writer, compiled_grid_elements=compiled_grid_elements,
+                            pacer=pacing.create_pacer(config.real_time_factor, config.overrun_policy))
+    for step, states in scheduled_states.items():
+        simulation.schedule_states(states, apply_at_step=step)
+    return simulation
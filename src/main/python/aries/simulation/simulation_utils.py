@@ -1,8 +1,9 @@
 import numpy as np
 
-from aries.core.constants import NON_LINEAR_SOLVER, LINEAR_SOLVER
+from aries.core.constants import NON_LINEAR_SOLVER, LINEAR_SOLVER, SWEEP_SOLVER
 from aries.simulation.solver.linear_solver import LinearSolver
 from aries.simulation.solver.non_linear_solver import NonLinearSolver
+from aries.simulation.solver.sweep_solver import SweepSolver
 
 
 def reactive_power(power_rating, power_factor):
@@ -35,12 +36,14 @@ def current_from_power(voltage_rating, power):
     return np.conj(power / voltage_rating)
 
 
-def create_solver(solver_type, paths, nodes, lines):
+def create_solver(solver_type, paths, nodes, lines, warm_start=False):
     """Factory for creating solver according to solver_type"""
     if solver_type == NON_LINEAR_SOLVER:
-        return NonLinearSolver(paths=paths, nodes=nodes, lines=lines)
+        return NonLinearSolver(paths=paths, nodes=nodes, lines=lines, warm_start=warm_start)
     if solver_type == LINEAR_SOLVER:
         return LinearSolver(paths=paths, nodes=nodes, lines=lines)
+    if solver_type == SWEEP_SOLVER:
+        return SweepSolver(paths=paths, nodes=nodes, lines=lines, warm_start=warm_start)
 
 
 def get_pv_power(agent):
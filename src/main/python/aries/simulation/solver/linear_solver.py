@@ -1,4 +1,5 @@
 import numpy as np
+from scipy import sparse
 
 from aries.core.constants import PCC_VOLTAGE, LINEAR_SOLVER
 from aries.simulation import simulation_utils
@@ -8,99 +9,79 @@ from aries.simulation.solver.solver import Solver
 class LinearSolver(Solver):
     """Solver to determine the electrical state of the grid"""
 
-    # The constructor just takes the topology and the lines specs as parameters
-    # That's because to build the network matrix, we need to know the actual state of the loads
-    # and this (possibly) changes at every time step.
+    # The constructor takes the topology and the lines specs as parameters and precomputes the agent x line
+    # incidence matrices of the active paths. The state of the loads (possibly) changes at every time step, so only
+    # the right hand side is built in build.
     def __init__(self, paths, nodes, lines):
         """Initialize the grid configuration"""
         super().__init__(paths=paths, nodes=nodes, lines=lines)
         self.type = LINEAR_SOLVER
 
-    def build(self, agents_state):
-        """Build the KCL-KVL matrix"""
-
-        # Init the nodes matrix to zero
-        lines_to_idx = {j: i for i, j in enumerate(self.lines.keys())}
-        agents_to_idx = {j: i for i, j in enumerate(agents_state.keys())}
-
-        b = np.zeros(len(self.lines), dtype=np.complex)
+        self.lines_to_idx = {j: i for i, j in enumerate(self.lines.keys())}
+        self.agents_to_idx = {j: i for i, j in enumerate(self.paths.keys())}
+        self.line_impedance = np.array([complex(line.resistance, line.reactance) for line in self.lines.values()],
+                                       dtype=np.complex128)
+
+        # incidence[agent, line] counts the active paths of agent going through line (current of agent flows in line)
+        # voltage_incidence[agent, line] is set for lines of the last active path of agent (voltage drop to agent)
+        rows, cols, voltage_rows, voltage_cols = [], [], [], []
+        self.has_path = np.zeros(len(self.paths), dtype=bool)
+        for agent, path in self.paths.items():
+            agent_idx = self.agents_to_idx[agent]
+            active_paths = path.active_paths()
+            for p in active_paths:
+                for line_name in p['path']:
+                    rows.append(agent_idx)
+                    cols.append(self.lines_to_idx[line_name])
+            if active_paths:
+                self.has_path[agent_idx] = True
+                for line_name in active_paths[-1]['path']:
+                    voltage_rows.append(agent_idx)
+                    voltage_cols.append(self.lines_to_idx[line_name])
+        shape = (len(self.paths), len(self.lines))
+        self.incidence = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        self.voltage_incidence = sparse.csr_matrix((np.ones(len(voltage_rows)), (voltage_rows, voltage_cols)),
+                                                   shape=shape)
+        self.voltage_incidence_transposed = self.voltage_incidence.T.tocsr()
+
+    def net_power(self, agents_state):
+        """Net power (demand - inject) of agents ordered as agents_to_idx"""
+        net_power = np.zeros(len(self.agents_to_idx), dtype=np.complex128)
+        for agent, state in agents_state.items():
+            net_power[self.agents_to_idx[agent]] = complex(
+                state['demand_power']['active_power'] - state['inject_power']['active_power'],
+                state['demand_power']['reactive_power'] - state['inject_power']['reactive_power'])
+        return net_power
 
-        for agent in agents_state.keys():
-            for path in self.paths[agent].active_paths():
-                if path['active'] == 1:
-                    for line_name in path['path']:
-                        inject_power = np.complex(agents_state[agent]['inject_power']['active_power'],
-                                                  agents_state[agent]['inject_power']['reactive_power'])
-                        demand_power = np.complex(agents_state[agent]['demand_power']['active_power'],
-                                                  agents_state[agent]['demand_power']['reactive_power'])
-
-                        net_power = demand_power - inject_power
-
-                        b[lines_to_idx[line_name]] += simulation_utils.current_from_power(
-                            voltage_rating=PCC_VOLTAGE,
-                            power=net_power)
-        drops = np.zeros(len(b), dtype=np.complex)
-        for line in self.lines.keys():
-            line_idx = lines_to_idx[line]
-            line_imp = np.complex(self.lines[line].resistance, self.lines[line].reactance)
-            drops[line_idx] = line_imp * b[line_idx]
-        voltages = np.zeros(len(agents_state))
-        for agent in agents_state.keys():
-            inject_power = np.complex(agents_state[agent]['inject_power']['active_power'],
-                                      agents_state[agent]['inject_power']['reactive_power'])
-            demand_power = np.complex(agents_state[agent]['demand_power']['active_power'],
-                                      agents_state[agent]['demand_power']['reactive_power'])
-
-            net_power = demand_power - inject_power
-            if np.real(net_power) <= 0:
-                voltages[agents_to_idx[agent]] = 230
-            else:
-                for path in self.paths[agent].active_paths():
-                    if path['active'] == 1:
-                        voltage = 0
-                        for branch in path['path']:
-                            branch_idx = lines_to_idx[branch]
-                            voltage += drops[branch_idx]
-                            if branch == path['path'][-1]:
-                                voltages[agents_to_idx[agent]] = 230 - np.real(voltage)
-
-        b = np.zeros(len(self.lines), dtype=np.complex)
-        for agent in agents_state.keys():
-            for path in self.paths[agent].active_paths():
-                if path['active'] == 1:
-                    for line_name in path['path']:
-                        inject_power = np.complex(agents_state[agent]['inject_power']['active_power'],
-                                                  agents_state[agent]['inject_power']['reactive_power'])
-                        demand_power = np.complex(agents_state[agent]['demand_power']['active_power'],
-                                                  agents_state[agent]['demand_power']['reactive_power'])
-
-                        net_power = demand_power - inject_power
-
-                        b[lines_to_idx[line_name]] += simulation_utils.current_from_power(
-                            voltage_rating=voltages[agents_to_idx[agent]],
-                            power=net_power)
-
-        # Map the dictionary keys to the column indices
-        solution = np.zeros(len(self.lines) + len(agents_state), dtype=np.complex)
-
-        variables_to_idx = list(self.lines.keys()) + list(agents_state.keys())
-        variables_to_idx = {variables_to_idx[i]: i for i in range(len(variables_to_idx))}
-
-        for l in self.lines.keys():
-            l_idx = variables_to_idx[l]
-            solution[l_idx] = b[lines_to_idx[l]]
-        for a in agents_state.keys():
-            a_idx = variables_to_idx[a]
-            inject_power = np.complex(agents_state[a]['inject_power']['active_power'],
-                                      agents_state[a]['inject_power']['reactive_power'])
-            demand_power = np.complex(agents_state[a]['demand_power']['active_power'],
-                                      agents_state[a]['demand_power']['reactive_power'])
-
-            net_power = demand_power - inject_power
-
-            solution[a_idx] = simulation_utils.current_from_power(voltage_rating=voltages[agents_to_idx[a]],
-                                                                  power=net_power)
-        return solution, variables_to_idx
+    def build(self, agents_state):
+        """Compute lines and agents currents of the linearized grid"""
+        return self.currents(self.net_power(agents_state))
+
+    def currents(self, net_power):
+        """Compute lines and agents currents from net power of agents, last axis of net_power is agents_to_idx"""
+        # Lines currents with all agents at PCC voltage and corresponding drops
+        drops = self.line_impedance * (simulation_utils.current_from_power(
+            voltage_rating=PCC_VOLTAGE, power=net_power) @ self.incidence)
+        voltages = np.where(self.has_path, PCC_VOLTAGE - np.real(drops @ self.voltage_incidence_transposed), 0)
+        voltages = np.where(np.real(net_power) <= 0, PCC_VOLTAGE, voltages)
+
+        agents_currents = simulation_utils.current_from_power(voltage_rating=voltages, power=net_power)
+        lines_currents = agents_currents @ self.incidence
+        return lines_currents, agents_currents
+
+    def solve_batch(self, net_power, agent_names):
+        """Solve the linearized grid for a batch of scenarios, net_power has shape (scenarios, agent_names)"""
+        agents_net_power = np.zeros(net_power.shape[:-1] + (len(self.agents_to_idx),), dtype=np.complex128)
+        agents_idx = [self.agents_to_idx[agent] for agent in agent_names]
+        agents_net_power[..., agents_idx] = net_power
+        lines_currents, agents_currents = self.currents(agents_net_power)
+        return {
+            'lines_currents': lines_currents,
+            'agents_currents': agents_currents[..., agents_idx],
+            'power_from_main': PCC_VOLTAGE * np.conj(lines_currents[..., self.lines_to_idx['B0']]),
+            'distribution_loss': np.sum(np.real(self.line_impedance * lines_currents * np.conj(lines_currents)),
+                                        axis=-1)
+        }
 
     def power_from_main(self, grid_solution):
         complex_current = np.complex(grid_solution['B0']['real'], grid_solution['B0']['imag'])
@@ -116,13 +97,18 @@ class LinearSolver(Solver):
 
     def solve(self, agents_state):
         """Solve the linearized approximation of the grid"""
-        solution, variables_to_idx = self.build(agents_state)
+        lines_currents, agents_currents = self.build(agents_state)
+
+        solution_dict = {}
+        for line_name, real, imag in zip(self.lines_to_idx.keys(), np.real(lines_currents).tolist(),
+                                         np.imag(lines_currents).tolist()):
+            solution_dict[line_name] = {'real': real, 'imag': imag}
+        for agent in agents_state.keys():
+            current = agents_currents[self.agents_to_idx[agent]]
+            solution_dict[agent] = {'real': np.real(current), 'imag': np.imag(current)}
 
-        solution_dict = {
-            key: {'real': np.real(solution[variables_to_idx[key]]), 'imag': np.imag(solution[variables_to_idx[key]])}
-            for key in variables_to_idx.keys()}
         power_from_main = self.power_from_main(grid_solution=solution_dict)
-        distribution_loss = self.power_distribution_loss(grid_solution=solution_dict)
+        distribution_loss = np.sum(np.real(self.line_impedance * lines_currents * np.conj(lines_currents)))
         solution_dict['power_from_main'] = {'real': np.real(power_from_main), 'imag': np.imag(power_from_main)}
         solution_dict['distribution_loss'] = {'real': distribution_loss, 'imag': 0}
 
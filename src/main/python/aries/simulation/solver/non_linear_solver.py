@@ -1,3 +1,5 @@
+import logging
+
 import numpy as np
 import pandapower as pp
 from pandas import DataFrame as df
@@ -5,15 +7,23 @@ from pandas import DataFrame as df
 from aries.core.constants import PCC_VOLTAGE, NON_LINEAR_SOLVER
 from aries.simulation.solver.solver import Solver
 
+logger = logging.getLogger(__name__)
+
 
 class NonLinearSolver(Solver):
 
-    def __init__(self, paths, nodes, lines):
+    def __init__(self, paths, nodes, lines, warm_start=False):
         """Initialize the grid configuration"""
         super().__init__(paths=paths, nodes=nodes, lines=lines)
         self.type = NON_LINEAR_SOLVER
+        # In warm start mode Newton-Raphson starts from the bus voltages of the previous step
+        self.warm_start = warm_start
+        self.statistics = {'warm_starts': 0, 'flat_starts': 0, 'fallbacks': 0, 'iterations': None, 'time': None}
+        # Network is built once, only sgen powers are updated at every step
+        self.net, self.line_to_idx, self.bus_to_idx, self.sgen_to_idx = self.create_network()
 
-    def build(self, agents_states):
+    def create_network(self):
+        """Create pandapower network with buses, external grid, lines and one sgen per agent"""
         net = pp.create_empty_network()
 
         buses_dict = {}
@@ -28,20 +38,14 @@ class NonLinearSolver(Solver):
         lines_dict = {}
         line_to_idx = {}
         line_idx = 0
+        sgen_to_idx = {}
+        sgen_idx = 0
         for bus_name, node in self.nodes.items():
             if node.agent is not None:
                 agent_name = node.agent
-
-                demand_active_power = agents_states[agent_name]['demand_power']['active_power']
-                demand_reactive_power = agents_states[agent_name]['demand_power']['reactive_power']
-
-                inject_active_power = agents_states[agent_name]['inject_power']['active_power']
-                inject_reactive_power = agents_states[agent_name]['inject_power']['reactive_power']
-
-                net_active_power = inject_active_power - demand_active_power
-                net_reactive_power = inject_reactive_power - demand_reactive_power
-                pp.create_sgen(net=net, bus=buses_dict[bus_name], p_kw=-net_active_power / 1000,
-                               q_kvar=-net_reactive_power / 1000, name=agent_name)
+                pp.create_sgen(net=net, bus=buses_dict[bus_name], p_kw=0, q_kvar=0, name=agent_name)
+                sgen_to_idx[agent_name] = sgen_idx
+                sgen_idx += 1
 
             adjacent = node.adjacency
             for adj in adjacent:
@@ -58,7 +62,27 @@ class NonLinearSolver(Solver):
                     line_to_idx[line_name] = line_idx
                     line_idx += 1
 
-        return net, line_to_idx, bus_to_idx
+        return net, line_to_idx, bus_to_idx, sgen_to_idx
+
+    def build(self, agents_states):
+        """Write power of agents into sgens of the network"""
+        p_kw = np.zeros(len(self.sgen_to_idx))
+        q_kvar = np.zeros(len(self.sgen_to_idx))
+        for agent_name, sgen_idx in self.sgen_to_idx.items():
+            demand_active_power = agents_states[agent_name]['demand_power']['active_power']
+            demand_reactive_power = agents_states[agent_name]['demand_power']['reactive_power']
+
+            inject_active_power = agents_states[agent_name]['inject_power']['active_power']
+            inject_reactive_power = agents_states[agent_name]['inject_power']['reactive_power']
+
+            net_active_power = inject_active_power - demand_active_power
+            net_reactive_power = inject_reactive_power - demand_reactive_power
+            p_kw[sgen_idx] = -net_active_power / 1000
+            q_kvar[sgen_idx] = -net_reactive_power / 1000
+        self.net.sgen['p_kw'] = p_kw
+        self.net.sgen['q_kvar'] = q_kvar
+
+        return self.net, self.line_to_idx, self.bus_to_idx
 
     def power_from_main(self, grid_solution):
         return np.complex(grid_solution['buses']['SLACK']['p_kw'] * 1000,
@@ -70,9 +94,31 @@ class NonLinearSolver(Solver):
             power += grid_solution['lines'][line_name]['pl_kw'] * 1000
         return power
 
+    def run_power_flow(self, net):
+        """Run power flow, warm started from the last solution if possible, with fallback to flat start"""
+        if self.warm_start and net.get('converged', False):
+            try:
+                pp.runpp(net, init='results')
+                self.statistics['warm_starts'] += 1
+                self.update_statistics(net)
+                return
+            except pp.LoadflowNotConverged:
+                logger.warning('Warm started power flow did not converge, falling back to flat start')
+                self.statistics['fallbacks'] += 1
+        pp.runpp(net)
+        self.statistics['flat_starts'] += 1
+        self.update_statistics(net)
+
+    def update_statistics(self, net):
+        """Store iteration count (if reported by pandapower) and time of the last power flow"""
+        ppc = net.get('_ppc') or {}
+        self.statistics['iterations'] = ppc.get('iterations')
+        self.statistics['time'] = ppc.get('et')
+        logger.debug('Power flow statistics: {}'.format(self.statistics))
+
     def solve(self, agents_state):
         net, line_to_idx, bus_to_idx = self.build(agents_state)
-        pp.runpp(net)
+        self.run_power_flow(net)
         result_bus_dict = df.to_dict(net.res_bus, orient='index')
         result_line_dict = df.to_dict(net.res_line, orient='index')
         bus_dict = {}
@@ -1,3 +1,6 @@
+from aries.core.exceptions import SimulationError
+
+
 class Solver(object):
     """Solver to determine the electrical state of the grid"""
 
@@ -17,3 +20,7 @@ class Solver(object):
 
     def solve(self, agents_state):
         pass
+
+    def solve_batch(self, net_power, agent_names):
+        """Solve the grid for a batch of scenarios, net_power has shape (scenarios, agent_names)"""
+        raise SimulationError("Solver {} does not support batch of scenarios".format(self.type))
@@ -0,0 +1,186 @@
+import logging
+
+import numpy as np
+from scipy import sparse
+
+from aries.core.constants import PCC_VOLTAGE, SWEEP_SOLVER
+from aries.core.exceptions import SimulationError
+from aries.simulation.solver.solver import Solver
+
+logger = logging.getLogger(__name__)
+
+SLACK = 'SLACK'
+
+
+class SweepSolver(Solver):
+    """Backward/forward sweep power flow for radial grids rooted at SLACK node"""
+
+    max_iteration = 100
+    tolerance = 1e-9 * PCC_VOLTAGE
+
+    def __init__(self, paths, nodes, lines, warm_start=False):
+        """Initialize the grid configuration"""
+        super().__init__(paths=paths, nodes=nodes, lines=lines)
+        self.type = SWEEP_SOLVER
+        # In warm start mode the sweep starts from the node voltages of the previous step
+        self.warm_start = warm_start
+        self.voltages = None
+        self.batch_voltages = None
+        self.statistics = {'iterations': None}
+
+        # Line is going out from one node and coming in another one
+        line_from = {}
+        line_to = {}
+        for node_name, node in self.nodes.items():
+            for line_name in node.branches_out:
+                line_from[line_name] = node_name
+            for line_name in node.branches_in:
+                line_to[line_name] = node_name
+        children = {node_name: [] for node_name in self.nodes.keys()}
+        for line_name, node_name in line_to.items():
+            if line_name not in line_from:
+                raise SimulationError("Line {} is not going out from any node".format(line_name))
+            children[line_from[line_name]].append((node_name, line_name))
+
+        # Order nodes from SLACK to leaves, each node (except SLACK) is fed by exactly one line
+        if SLACK not in self.nodes:
+            raise SimulationError("Radial grid has to be rooted at {} node".format(SLACK))
+        self.node_names = [SLACK]
+        self.node_lines = [None]
+        parent = [-1]
+        for idx, node_name in enumerate(self.node_names):
+            for child_name, line_name in children[node_name]:
+                self.node_names.append(child_name)
+                self.node_lines.append(line_name)
+                parent.append(idx)
+                if len(self.node_names) > len(self.nodes):
+                    raise SimulationError("Grid is not radial, node {} is fed twice".format(child_name))
+        self.nodes_to_idx = {j: i for i, j in enumerate(self.node_names)}
+        unreachable = sorted(self.nodes.keys() - self.nodes_to_idx.keys())
+        if unreachable:
+            raise SimulationError("Nodes {} are not reachable from {} node".format(unreachable, SLACK))
+        self.parent = np.array(parent)
+        self.line_impedance = np.zeros(len(self.node_names), dtype=np.complex128)
+        for idx, line_name in enumerate(self.node_lines[1:], 1):
+            self.line_impedance[idx] = complex(self.lines[line_name].resistance, self.lines[line_name].reactance)
+
+        # path[node, k] is set if line feeding node k is on the way from SLACK to node
+        rows, cols = [], []
+        for idx in range(len(self.node_names)):
+            k = idx
+            while k > 0:
+                rows.append(idx)
+                cols.append(k)
+                k = parent[k]
+        shape = (len(self.node_names), len(self.node_names))
+        self.path = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        self.path_transposed = self.path.T.tocsr()
+
+        self.agents_to_idx = {node.agent: self.nodes_to_idx[node_name] for node_name, node in self.nodes.items()
+                              if node.agent is not None}
+
+    def build(self, agents_state):
+        """Build vector of complex power consumed at each node"""
+        power = np.zeros(len(self.node_names), dtype=np.complex128)
+        for agent_name, node_idx in self.agents_to_idx.items():
+            state = agents_state[agent_name]
+            power[node_idx] += complex(
+                state['demand_power']['active_power'] - state['inject_power']['active_power'],
+                state['demand_power']['reactive_power'] - state['inject_power']['reactive_power'])
+        return power
+
+    def sweep(self, power, voltages):
+        """Iterate backward (currents) and forward (voltages) sweeps until voltages converge"""
+        for iteration in range(1, self.max_iteration + 1):
+            # Backward sweep: current of line feeding node is the sum of load currents of its subtree
+            currents = np.conj(power / voltages) @ self.path
+            # Forward sweep: voltage of node is SLACK voltage minus drops along the path
+            new_voltages = PCC_VOLTAGE - (self.line_impedance * currents) @ self.path_transposed
+            converged = np.max(np.abs(new_voltages - voltages)) < self.tolerance
+            voltages = new_voltages
+            if converged:
+                return voltages, currents, iteration
+        raise SimulationError("Sweep power flow did not converge after {} iterations".format(self.max_iteration))
+
+    def start_voltages(self, shape, last_voltages):
+        """Initial voltages of the sweep, previous solution in warm start mode or flat start"""
+        if self.warm_start and last_voltages is not None and last_voltages.shape == shape:
+            return last_voltages
+        return np.full(shape, PCC_VOLTAGE, dtype=np.complex128)
+
+    def run_sweep(self, power, last_voltages):
+        """Run sweep with fallback to flat start if warm started sweep does not converge"""
+        voltages = self.start_voltages(power.shape, last_voltages)
+        try:
+            voltages, currents, iteration = self.sweep(power, voltages)
+        except SimulationError:
+            if not self.warm_start or last_voltages is None:
+                raise
+            logger.warning('Warm started sweep did not converge, falling back to flat start')
+            voltages, currents, iteration = self.sweep(power, np.full(power.shape, PCC_VOLTAGE,
+                                                                      dtype=np.complex128))
+        self.statistics['iterations'] = iteration
+        return voltages, currents
+
+    def solve_batch(self, net_power, agent_names):
+        """Solve the power flow for a batch of scenarios, net_power has shape (scenarios, agent_names)"""
+        nodes_idx = [self.agents_to_idx[agent] for agent in agent_names]
+        incidence = sparse.csr_matrix((np.ones(len(nodes_idx)), (np.arange(len(nodes_idx)), nodes_idx)),
+                                      shape=(len(nodes_idx), len(self.node_names)))
+        power = np.asarray(net_power @ incidence, dtype=np.complex128)
+        voltages, currents = self.run_sweep(power, self.batch_voltages)
+        self.batch_voltages = voltages
+
+        power_from = voltages[..., self.parent[1:]] * np.conj(currents[..., 1:])
+        return {
+            'voltages': voltages,
+            'lines_currents': currents[..., 1:],
+            'power_from_main': power[..., 0] - np.sum(power_from[..., self.parent[1:] == 0], axis=-1),
+            'distribution_loss': np.sum(np.real(self.line_impedance[1:] * currents[..., 1:] *
+                                                np.conj(currents[..., 1:])), axis=-1)
+        }
+
+    def power_from_main(self, grid_solution):
+        return np.complex(grid_solution['buses'][SLACK]['p_kw'] * 1000,
+                          grid_solution['buses'][SLACK]['q_kvar'] * 1000)
+
+    def power_distribution_loss(self, grid_solution):
+        power = 0
+        for line in grid_solution['lines'].values():
+            power += line['pl_kw'] * 1000
+        return power
+
+    def solve(self, agents_state):
+        """Solve the power flow of the radial grid"""
+        power = self.build(agents_state)
+        voltages, currents = self.run_sweep(power, self.voltages)
+        self.voltages = voltages
+
+        # Results follow pandapower conventions used by NonLinearSolver (consumed power is positive)
+        power_from = voltages[self.parent[1:]] * np.conj(currents[1:])
+        power_to = -voltages[1:] * np.conj(currents[1:])
+        loss = power_from + power_to
+        # Power of SLACK node is the one fed into the lines going out from it
+        power[0] -= np.sum(power_from[self.parent[1:] == 0])
+
+        bus_dict = {}
+        for node_name, v, p in zip(self.node_names, voltages.tolist(), (power / 1000).tolist()):
+            bus_dict[node_name] = {'vm_pu': abs(v) / PCC_VOLTAGE, 'va_degree': np.degrees(np.angle(v)),
+                                   'p_kw': p.real, 'q_kvar': p.imag}
+        line_dict = {}
+        for line_name, i, p_from, p_to, p_loss in zip(self.node_lines[1:], np.abs(currents[1:]).tolist(),
+                                                      (power_from / 1000).tolist(), (power_to / 1000).tolist(),
+                                                      (loss / 1000).tolist()):
+            line_dict[line_name] = {'p_from_kw': p_from.real, 'q_from_kvar': p_from.imag,
+                                    'p_to_kw': p_to.real, 'q_to_kvar': p_to.imag,
+                                    'pl_kw': p_loss.real, 'ql_kvar': p_loss.imag,
+                                    'i_ka': i / np.sqrt(3) / 1000}
+        solution_dict = {
+            'buses': bus_dict,
+            'lines': line_dict
+        }
+        power_from_main = self.power_from_main(grid_solution=solution_dict)
+        distribution_loss = self.power_distribution_loss(grid_solution=solution_dict)
+        solution_dict['power_from_main'] = {'real': np.real(power_from_main), 'imag': np.imag(power_from_main)}
+        solution_dict['distribution_loss'] = {'real': distribution_loss, 'imag': 0}
+        return solution_dict
@@ -0,0 +1,105 @@
+"""Low-overhead timing of phases of simulation step"""
+import bisect
+import collections
+import time
+
+# Phases of simulation step
+STATE_PHASE = 'state'
+CLUSTER_PHASE = 'cluster'
+AGENTS_PHASE = 'agents'
+SOLVER_PHASE = 'solver'
+WRITE_PHASE = 'write'
+STEP_PHASE = 'step'
+PHASES = [STATE_PHASE, CLUSTER_PHASE, AGENTS_PHASE, SOLVER_PHASE, WRITE_PHASE, STEP_PHASE]
+
+# Upper bounds of histogram buckets in seconds, from 10 us to 10 s, durations above are in the last open bucket
+BUCKETS = [10 ** (exponent / 2) for exponent in range(-10, 3)]
+# Number of last durations of phase kept for percentiles and histogram
+WINDOW = 1000
+
+
+class PhaseTimer(object):
+    """Durations of one phase, totals of all steps and rolling window of last durations"""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.durations = collections.deque(maxlen=window)
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.durations.append(duration)
+
+    def histogram(self):
+        """Histogram of rolling window as [{'le': upper bound, 'count': count}], last bucket has no upper bound"""
+        counts = [0] * (len(BUCKETS) + 1)
+        for duration in self.durations:
+            counts[bisect.bisect_left(BUCKETS, duration)] += 1
+        return [{'le': upper, 'count': count} for upper, count in zip(BUCKETS + [None], counts)]
+
+    def summary(self):
+        """Totals of all steps, percentiles and histogram of rolling window"""
+        durations = sorted(self.durations)
+
+        def percentile(p):
+            return durations[min(len(durations) - 1, int(p * len(durations)))] if durations else 0.0
+
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max, 'last': self.durations[-1] if self.durations else 0.0,
+                'p50': percentile(0.5), 'p90': percentile(0.9), 'p99': percentile(0.99),
+                'histogram': self.histogram()}
+
+
+class Measurement(object):
+    """Context manager recording its duration to phase of step timer"""
+
+    def __init__(self, timer, phase):
+        self.timer = timer
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.phase, time.perf_counter() - self.start)
+
+
+class StepTimer(object):
+    """Timers of phases of simulation step"""
+
+    def __init__(self, window=WINDOW):
+        self.phases = collections.OrderedDict((phase, PhaseTimer(window)) for phase in PHASES)
+        self.window = window
+
+    def measure(self, phase):
+        """Measure duration of with block as phase"""
+        return Measurement(self, phase)
+
+    def record(self, phase, duration):
+        if phase not in self.phases:
+            self.phases[phase] = PhaseTimer(self.window)
+        self.phases[phase].record(duration)
+
+    def last(self):
+        """Durations of phases of last step"""
+        return {phase: timer.durations[-1] for phase, timer in self.phases.items() if timer.durations}
+
+    def summary(self):
+        """Summary of every phase"""
+        return {phase: timer.summary() for phase, timer in self.phases.items()}
+
+    def format_summary(self):
+        """Summary of every phase as text table in milliseconds"""
+        lines = ['{:<8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('phase', 'count', 'total', 'mean', 'p50',
+                                                                         'p99', 'max')]
+        for phase, timer in self.phases.items():
+            summary = timer.summary()
+            lines.append('{:<8} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}'.format(
+                phase, summary['count'], summary['total'] * 1000, summary['mean'] * 1000, summary['p50'] * 1000,
+                summary['p99'] * 1000, summary['max'] * 1000))
+        return '\n'.join(lines)
@@ -1,8 +1,11 @@
 """Test agent"""
+import json
 import unittest
+from unittest import mock
 
 # from aries.core.grid.agent import Agent, Battery, ElectricalVehicle, PVPanel, WaterTank, WindGenerator
 import aries.core.grid.agent as agent
+from aries.core.grid.state import State
 
 # Agent constants
 AGENT_NAME = "agent1"
@@ -79,6 +82,49 @@ class TestAgent(unittest.TestCase):
 
         self.assertTrue(agent.Agent.validate(j), "Agent is not valid")
 
+    def test_agent_is_compact(self):
+        """Test if agent without instance dictionary is dumped and updated like before"""
+        self.agent = agent.Agent.from_properties(name=AGENT_NAME, voltage_rating=VOLTAGE_RATING,
+                                                 power_rating=POWER_RATING, power_factor=POWER_FACTOR,
+                                                 incoming_power=INCOMING_POWER,
+                                                 request_inject_power=REQUEST_INJECT_POWER,
+                                                 request_power_factor=REQUEST_POWER_FACTOR)
+        self.assertFalse(hasattr(self.agent, '__dict__'), "Agent has instance dictionary")
+        self.assertRaises(AttributeError, setattr, self.agent, 'unknown', 1)
+        self.assertEqual(json.loads(self.agent.dump()), {
+            "name": AGENT_NAME, "voltage_rating": VOLTAGE_RATING, "power_rating": POWER_RATING,
+            "power_factor": POWER_FACTOR, "incoming_power": INCOMING_POWER,
+            "request_inject_power": REQUEST_INJECT_POWER, "request_power_factor": REQUEST_POWER_FACTOR
+        }, "Agent without grid elements is dumped differently")
+
+        self.agent.water_tank = agent.WaterTank.from_properties(capacity=CAPACITY, temp=TEMP, active=ACTIVE)
+        self.agent.update_state(State({'power_rating': 1.0, 'water_tank': {'active': 1}}))
+        self.assertEqual(self.agent.power_rating, 1.0, "power_rating is not updated")
+        self.assertEqual(self.agent.to_dict()['water_tank'], {"capacity": CAPACITY, "temp": TEMP, "active": 1},
+                         "Water tank is dumped differently")
+
+    def test_to_dict_dumps_grid_elements_inline(self):
+        """Test if agent with grid elements is dumped without dumping elements one by one"""
+        self.agent = agent.Agent.from_properties(name=AGENT_NAME, voltage_rating=VOLTAGE_RATING,
+                                                 power_rating=POWER_RATING, power_factor=POWER_FACTOR,
+                                                 incoming_power=INCOMING_POWER,
+                                                 request_inject_power=REQUEST_INJECT_POWER,
+                                                 request_power_factor=REQUEST_POWER_FACTOR)
+        self.agent.water_tank = agent.WaterTank.from_properties(capacity=CAPACITY, temp=TEMP, active=ACTIVE)
+        self.agent.wind_generator = agent.WindGenerator.from_properties(power_coefficient=POWER_COEFFICIENT,
+                                                                        air_density=AIR_DENSITY, area=AREA,
+                                                                        wind_speed=WIND_SPEED,
+                                                                        battery_coupling_efficiency=1,
+                                                                        active=ACTIVE)
+        expected = dict(self.agent.properties(), water_tank=self.agent.water_tank.properties(),
+                        wind_generator=self.agent.wind_generator.properties())
+        for element in ('battery', 'pv_panel', 'electrical_vehicle'):
+            del expected[element]
+        with mock.patch.object(agent.WaterTank, 'properties', side_effect=AssertionError("Water tank is dumped")), \
+                mock.patch.object(agent.WindGenerator, 'properties', side_effect=AssertionError("Generator is dumped")):
+            self.assertEqual(self.agent.to_dict(), expected, "Agent is dumped differently")
+            self.assertEqual(json.loads(self.agent.dump()), expected, "Agent is serialized differently")
+
 
 class TestBattery(unittest.TestCase):
     """Tests for battery"""
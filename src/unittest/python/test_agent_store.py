@@ -0,0 +1,59 @@
+import json
+import unittest
+
+import numpy as np
+
+import unittest_utils
+from aries.core.grid import grid_utils
+from aries.simulation import simulation, agent_store
+from aries.simulation.agent_store import AgentStore
+
+AGENT_STORE_TEST_GRID_ELEMENTS = 'agent_store_test_grid_elements.json'
+
+
+class TestAgentStore(unittest.TestCase):
+    """Tests for vectorized simulation step over AgentStore"""
+
+    def setUp(self):
+        with unittest_utils.readfile(AGENT_STORE_TEST_GRID_ELEMENTS, __file__) as f:
+            j = json.load(f)
+            self.agents, _ = grid_utils.create_grid_elements(j)
+            self.expected_agents, _ = grid_utils.create_grid_elements(json.loads(json.dumps(j)))
+
+    def test_load_and_dump(self):
+        store = AgentStore.from_agents(self.agents)
+        self.assertEqual(len(store), len(self.agents), "Number of agents mismatch")
+        index = store.index['AGENT1']
+        self.assertEqual(store['battery_status'][index], self.agents['AGENT1'].battery.status,
+                         "Battery status mismatch")
+
+        store['battery_status'][index] = 42
+        store.dump(self.agents)
+        self.assertEqual(self.agents['AGENT1'].battery.status, 42, "Battery status was not written back")
+
+    def test_process_simulation_step(self):
+        """Vectorized step has to give the same result as the step agent by agent"""
+        store = AgentStore.from_agents(self.agents)
+        for _ in range(3):
+            impedance, demand_power, inject_power, power_from_battery, pv_power = \
+                agent_store.process_simulation_step(store=store, time_scale=1)
+            store.dump(self.agents)
+            for name in store.names:
+                i = store.index[name]
+                expected = simulation.process_simulation_step(agent=self.expected_agents[name], time_scale=1)
+                _, expected_impedance, expected_demand, expected_inject, expected_battery, expected_pv = expected
+                np.testing.assert_allclose(impedance[i], expected_impedance, err_msg="Impedance mismatch " + name)
+                np.testing.assert_allclose(demand_power[i], expected_demand, err_msg="Demand mismatch " + name)
+                np.testing.assert_allclose(inject_power[i], expected_inject, err_msg="Inject mismatch " + name)
+                np.testing.assert_allclose(power_from_battery[i], expected_battery,
+                                           err_msg="Battery power mismatch " + name)
+                np.testing.assert_allclose(pv_power[i], expected_pv, err_msg="PV power mismatch " + name)
+
+                agent = self.agents[name]
+                expected_agent = self.expected_agents[name]
+                self.assertAlmostEqual(agent.battery.status, expected_agent.battery.status,
+                                       msg="Battery status mismatch " + name)
+                self.assertAlmostEqual(agent.electrical_vehicle.status, expected_agent.electrical_vehicle.status,
+                                       msg="EV status mismatch " + name)
+                self.assertAlmostEqual(agent.water_tank.temp, expected_agent.water_tank.temp,
+                                       msg="Water tank temp mismatch " + name)
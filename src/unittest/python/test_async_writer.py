@@ -0,0 +1,103 @@
+import threading
+import unittest
+
+from aries.core.db.async_writer import AsyncWriter
+from aries.core.exceptions import StorageError
+
+
+class Agent(object):
+    """Agent which dumps its current state"""
+
+    def __init__(self, state):
+        self.state = state
+
+    def to_dict(self):
+        return {'state': self.state}
+
+
+class Storage(object):
+    """Storage which keeps written batches, writing waits for release event"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.step_timings = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = fail
+
+    def write_simulation_results(self, simulation_results):
+        self.release.wait()
+        if self.fail:
+            raise RuntimeError("Storage is not available")
+        self.batches.append(simulation_results)
+
+    def write_step_timings(self, simulation_id, step_timings):
+        self.step_timings.append((sum(len(batch) for batch in self.batches), step_timings))
+
+
+def write(writer, simulation_step, agents):
+    writer.write_simulation_result(simulation_step=simulation_step, simulation_id='simulation',
+                                   simulation_result={}, agents_states={}, total_pv_power=0, agents=agents)
+
+
+class TestAsyncWriter(unittest.TestCase):
+    """Tests for background writing of simulation results"""
+
+    def test_results_are_written_in_order_in_batches(self):
+        """Test if all results are written in order, in batches and agents are dumped at writing time"""
+        storage = Storage()
+        storage.release.clear()
+        writer = AsyncWriter(storage, batch_size=4, max_queue_size=100)
+        agent = Agent(0)
+        for step in range(10):
+            agent.state = step
+            write(writer, step, {'AGENT0': agent})
+        storage.release.set()
+        writer.close()
+
+        results = [result for batch in storage.batches for result in batch]
+        self.assertEqual([result['simulation_step'] for result in results], list(range(10)), "Order is different")
+        self.assertEqual([result['agents']['AGENT0']['state'] for result in results], list(range(10)),
+                         "Agent is not dumped at writing time")
+        self.assertTrue(all(len(batch) <= 4 for batch in storage.batches), "Batch is larger than batch size")
+        self.assertLess(len(storage.batches), 10, "Results are not batched")
+        self.assertFalse(writer.thread.is_alive(), "Writer thread is not stopped")
+        self.assertRaises(StorageError, write, writer, 10, {})
+
+    def test_step_timings_are_written_in_order(self):
+        """Test if step timings are written after results put before them"""
+        storage = Storage()
+        writer = AsyncWriter(storage, batch_size=4)
+        for step in range(3):
+            write(writer, step, {})
+        writer.write_step_timings('simulation', {'step': {}})
+        for step in range(3, 5):
+            write(writer, step, {})
+        writer.close()
+        self.assertEqual(storage.step_timings, [(3, {'step': {}})], "Step timings are written differently")
+        self.assertEqual(len([result for batch in storage.batches for result in batch]), 5,
+                         "Number of written results is different")
+
+    def test_backpressure(self):
+        """Test if writing blocks when queue is full"""
+        storage = Storage()
+        storage.release.clear()
+        writer = AsyncWriter(storage, batch_size=1, max_queue_size=2)
+        writing = threading.Thread(target=lambda: [write(writer, step, {}) for step in range(5)])
+        writing.start()
+        writing.join(timeout=0.5)
+        self.assertTrue(writing.is_alive(), "Writing is not blocked by full queue")
+        storage.release.set()
+        writing.join()
+        writer.flush()
+        self.assertEqual(len([result for batch in storage.batches for result in batch]), 5,
+                         "Number of written results is different")
+        writer.close()
+
+    def test_storage_error(self):
+        """Test if error of writer thread is raised in simulation thread"""
+        writer = AsyncWriter(Storage(fail=True), batch_size=2)
+        write(writer, 0, {})
+        self.assertRaises(StorageError, writer.flush)
+        self.assertRaises(StorageError, write, writer, 1, {})
+        self.assertRaises(StorageError, writer.close)
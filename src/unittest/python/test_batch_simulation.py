@@ -0,0 +1,77 @@
+import json
+import unittest
+
+import numpy as np
+
+import unittest_utils
+from aries.core.grid import grid_utils
+from aries.simulation import simulation
+from aries.simulation.batch_simulation import BatchSimulation
+from aries.simulation.solver.linear_solver import LinearSolver
+from aries.simulation.solver.sweep_solver import SweepSolver
+
+BATCH_SIMULATION_TEST_GRID_ELEMENTS = 'batch_simulation_test_grid_elements.json'
+BATCH_SIMULATION_TEST_TOPOLOGY = 'batch_simulation_test_topology.json'
+POWER_RATINGS = [500, 1000, 3000]
+
+
+class TestBatchSimulation(unittest.TestCase):
+    """Tests for simulation of several scenarios along scenario axis"""
+
+    def setUp(self):
+        with unittest_utils.readfile(BATCH_SIMULATION_TEST_GRID_ELEMENTS, __file__) as f:
+            self.grid_elements_json = json.load(f)
+        with unittest_utils.readfile(BATCH_SIMULATION_TEST_TOPOLOGY, __file__) as f:
+            self.paths, self.nodes = grid_utils.create_topology(json.load(f))
+
+        _, self.lines = grid_utils.create_grid_elements(json.loads(json.dumps(self.grid_elements_json)))
+        self.scenarios_agents = self.create_scenarios()
+
+    def create_scenarios(self):
+        """Scenarios differ in power rating of AGENT0"""
+        scenarios_agents = []
+        for power_rating in POWER_RATINGS:
+            agents, _ = grid_utils.create_grid_elements(json.loads(json.dumps(self.grid_elements_json)))
+            agents['AGENT0'].power_rating = power_rating
+            scenarios_agents.append(agents)
+        return scenarios_agents
+
+    def check_batch(self, solver, batch_solver, check_result):
+        """Compare each scenario of batch with simulation agent by agent"""
+        batch = BatchSimulation.from_scenarios(self.create_scenarios(), solver=batch_solver)
+        for step in range(2):
+            result = batch.step()
+            for scenario, agents in enumerate(self.scenarios_agents):
+                agents_states = {}
+                for agent in agents.values():
+                    agent_name, impedance, demand_power, inject_power, power_from_battery, _ = \
+                        simulation.process_simulation_step(agent=agent, time_scale=1)
+                    agents_states[agent_name] = simulation.agent_state(impedance, demand_power, inject_power,
+                                                                       power_from_battery)
+                    i = batch.agent_store.index[agent_name]
+                    np.testing.assert_allclose(result['demand_power'][scenario, i], demand_power,
+                                               err_msg='Demand power mismatch')
+                check_result(solver.solve(agents_states), result['simulation_result'], scenario)
+
+    def test_batch_with_linear_solver(self):
+        def check_result(expected, result, scenario):
+            self.assertAlmostEqual(expected['power_from_main']['real'], np.real(result['power_from_main'][scenario]),
+                                   6, 'power_from_main mismatch')
+            self.assertAlmostEqual(expected['distribution_loss']['real'], result['distribution_loss'][scenario], 6,
+                                   'distribution_loss mismatch')
+
+        self.check_batch(LinearSolver(paths=self.paths, nodes=self.nodes, lines=self.lines),
+                         LinearSolver(paths=self.paths, nodes=self.nodes, lines=self.lines), check_result)
+
+    def test_batch_with_sweep_solver(self):
+        def check_result(expected, result, scenario):
+            self.assertAlmostEqual(expected['power_from_main']['real'], np.real(result['power_from_main'][scenario]),
+                                   6, 'power_from_main mismatch')
+            self.assertAlmostEqual(expected['distribution_loss']['real'], result['distribution_loss'][scenario], 6,
+                                   'distribution_loss mismatch')
+            for node_name, node_idx in batch_solver.nodes_to_idx.items():
+                self.assertAlmostEqual(expected['buses'][node_name]['vm_pu'],
+                                       np.abs(result['voltages'][scenario, node_idx]) / 230, 8, 'Voltage mismatch')
+
+        batch_solver = SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines)
+        self.check_batch(SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines), batch_solver, check_result)
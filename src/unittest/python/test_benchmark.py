@@ -0,0 +1,66 @@
+import unittest
+
+from aries.core.db.memory_mongodb import MemoryMongoClient
+from aries.core.event.memory_redis import MemoryRedis
+from aries.simulation import benchmark
+
+NUMBER_OF_AGENTS = 6
+REPEAT = 3
+
+
+def results(p50s):
+    return {'results': [{'benchmark': name, 'agents': NUMBER_OF_AGENTS, 'p50': p50} for name, p50 in p50s.items()]}
+
+
+class TestBenchmark(unittest.TestCase):
+    """Tests for benchmark suite"""
+
+    def test_run_benchmarks(self):
+        """Test if every benchmark with available services is measured"""
+        run = benchmark.run_benchmarks([NUMBER_OF_AGENTS], repeat=REPEAT)
+        self.assertEqual([result['benchmark'] for result in run['results']],
+                         [name for name in benchmark.BENCHMARKS
+                          if name not in (benchmark.MONGODB_WRITE_AGENTS, benchmark.EVENT_QUEUE_REDIS)],
+                         "Benchmarks without MongoDB and Redis are different")
+        for result in run['results']:
+            self.assertEqual(result['agents'], NUMBER_OF_AGENTS, "Grid size is different")
+            self.assertEqual(result['repeat'], REPEAT, "Number of steps is different")
+            self.assertGreater(result['steps_per_sec'], 0, "Steps per second are not measured")
+            self.assertLessEqual(result['p50'], result['p99'], "Percentiles are not ordered")
+            self.assertGreater(result['peak_memory'], 0, "Peak memory is not measured")
+        self.assertIn('commit', run, "Commit is not recorded")
+
+    def test_run_benchmarks_with_stand_ins(self):
+        """Test if storage, event queue and simulation benchmarks run against in-process stand-ins"""
+        mongodb_client = MemoryMongoClient()
+        redis_client = MemoryRedis()
+        names = [benchmark.MONGODB_WRITE_AGENTS, benchmark.EVENT_QUEUE_REDIS, benchmark.SIMULATION_STEP]
+        run = benchmark.run_benchmarks([NUMBER_OF_AGENTS], benchmarks=names, repeat=REPEAT,
+                                       mongodb_client=mongodb_client, redis_client=redis_client)
+        self.assertEqual([result['benchmark'] for result in run['results']], names, "Benchmarks are different")
+        self.assertGreater(mongodb_client.round_trips, 0, "MongoDB stand-in is not used")
+        self.assertGreater(redis_client.round_trips, 0, "Redis stand-in is not used")
+        self.assertEqual(sum(len(collection.documents) for database in mongodb_client.databases.values()
+                             for collection in database.collections.values()), 0, "Benchmark data is not removed")
+
+    def test_benchmarks_start_from_generated_grid(self):
+        """Test if agents changed by benchmark are built again from generated grid"""
+        grid = benchmark.Grid(NUMBER_OF_AGENTS)
+        agents = {name: agent.to_dict() for name, agent in grid.agents.items()}
+        run, _ = benchmark.create_benchmark(benchmark.LOAD_SHARING_CLUSTER, grid)
+        run()
+        grid.agents_states()
+        self.assertNotEqual({name: agent.to_dict() for name, agent in grid.agents.items()}, agents,
+                            "Agents are not changed by benchmarks")
+        grid.build()
+        self.assertEqual({name: agent.to_dict() for name, agent in grid.agents.items()}, agents,
+                         "Agents are not built again")
+
+    def test_compare(self):
+        """Test if slower benchmarks are reported as regressions"""
+        comparison = benchmark.compare(results({benchmark.LINEAR_SOLVER: 1.0, benchmark.NON_LINEAR_SOLVER: 1.0}),
+                                       results({benchmark.LINEAR_SOLVER: 1.05, benchmark.NON_LINEAR_SOLVER: 1.5,
+                                                benchmark.LOAD_SHARING_CLUSTER: 1.0}), threshold=0.1)
+        self.assertEqual([(row['benchmark'], row['regression']) for row in comparison],
+                         [(benchmark.LINEAR_SOLVER, False), (benchmark.NON_LINEAR_SOLVER, True)],
+                         "Regressions are different")
@@ -0,0 +1,154 @@
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from aries.core.event.event_queue import EventQueue
+from aries.core.event.memory_redis import MemoryRedis
+from aries.core.event.transport import InProcessTransport, UnixSocketServer, UnixSocketTransport, AUTHKEY_SUFFIX
+from aries.core.exceptions import AriesException
+
+AGENT_NAME = 'AGENT0'
+NUMBER_OF_EVENTS = 10
+LATENCY = 0.01
+
+
+def states_event(i):
+    return {'states': {AGENT_NAME: {'power_factor': float(i), 'battery': {'status': float(i)}}}}
+
+
+class TestEventTransport(unittest.TestCase):
+    """Tests for exchanging events through in-process, Unix socket and Redis stand-in transports"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.path, 'aries.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def assert_events_are_exchanged(self, writer, reader):
+        for i in range(NUMBER_OF_EVENTS):
+            writer.write_states(states_event(i))
+        writer.write_clusters({'clusters': {}})
+
+        self.assertEqual(reader.read_states(), states_event(0), "First event is different")
+        self.assertEqual(reader.read_all_states(), [states_event(i) for i in range(1, NUMBER_OF_EVENTS)],
+                         "Events are not read in order")
+        self.assertIsNone(reader.read_states(), "Event is read twice")
+        self.assertEqual(reader.read_all_clusters(), [{'clusters': {}}], "Clusters event is different")
+        self.assertEqual(reader.read_all_clusters(), [], "Clusters event is read twice")
+
+        writer.write_states(states_event(0))
+        writer.cleanup()
+        self.assertEqual(reader.read_all_states(), [], "Events are not cleaned up")
+
+    def assert_states_are_coalesced(self, writer, reader):
+        for i in range(NUMBER_OF_EVENTS):
+            writer.write_states(states_event(i))
+        writer.write_states({'states': {AGENT_NAME: {'battery': {'active': 0}}}})
+
+        self.assertEqual(reader.read_all_states(), [{'states': {AGENT_NAME: {
+            'power_factor': NUMBER_OF_EVENTS - 1.0, 'battery': {'status': NUMBER_OF_EVENTS - 1.0, 'active': 0}}}}],
+            "Coalesced states are different")
+        self.assertEqual(reader.read_all_states(), [], "States are read twice")
+
+    def test_in_process_transport(self):
+        """Test if events are exchanged through in-process transport"""
+        event_queue = EventQueue(transport=InProcessTransport())
+        self.assert_events_are_exchanged(event_queue, event_queue)
+
+    def test_in_process_coalesced_states(self):
+        """Test if states are coalesced by in-process transport"""
+        event_queue = EventQueue(transport=InProcessTransport(), coalesce=True)
+        self.assert_states_are_coalesced(event_queue, event_queue)
+
+    def test_unix_socket_transport(self):
+        """Test if events of controller are read by simulation serving Unix socket"""
+        simulation_queue = EventQueue(name='simulation', transport=UnixSocketServer(self.socket_path))
+        controller_queue = EventQueue(name='simulation', transport=UnixSocketTransport(self.socket_path))
+        try:
+            self.assert_events_are_exchanged(controller_queue, simulation_queue)
+        finally:
+            controller_queue.close()
+            simulation_queue.close()
+        self.assertFalse(os.path.exists(self.socket_path), "Socket is not removed")
+
+    def test_unix_socket_coalesced_states(self):
+        """Test if states of controllers are coalesced by simulation serving Unix socket"""
+        simulation_queue = EventQueue(transport=UnixSocketServer(self.socket_path), coalesce=True)
+        controller_queues = [EventQueue(transport=UnixSocketTransport(self.socket_path), coalesce=True)
+                             for _ in range(2)]
+        try:
+            self.assert_states_are_coalesced(controller_queues[0], simulation_queue)
+            controller_queues[0].write_states(states_event(1))
+            controller_queues[1].write_states(states_event(2))
+            self.assertEqual(simulation_queue.read_all_states(), [states_event(2)], "Last writer does not win")
+        finally:
+            for controller_queue in controller_queues:
+                controller_queue.close()
+            simulation_queue.close()
+
+    def test_unix_socket_is_private(self):
+        """Test if socket and its key are accessible only by owner and clients without key are refused"""
+        server = UnixSocketServer(self.socket_path)
+        try:
+            for path in [self.socket_path, self.socket_path + AUTHKEY_SUFFIX]:
+                self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600, "{} is not private".format(path))
+            self.assertRaises(AuthenticationError, Client, address=self.socket_path, family='AF_UNIX',
+                              authkey=b'wrong')
+            controller_queue = EventQueue(transport=UnixSocketTransport(self.socket_path))
+            controller_queue.write_states(states_event(0))
+            controller_queue.close()
+            self.assertEqual(EventQueue(transport=server).read_all_states(), [states_event(0)],
+                             "Server is not serving after refused client")
+        finally:
+            server.close()
+        self.assertFalse(os.path.exists(self.socket_path + AUTHKEY_SUFFIX), "Key is not removed")
+
+    def test_unix_socket_path(self):
+        """Test if stale socket is replaced and any other file at socket path is refused"""
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(self.socket_path)
+        stale.close()
+        UnixSocketServer(self.socket_path).close()
+
+        with open(self.socket_path, 'w') as f:
+            f.write('data')
+        self.assertRaises(AriesException, UnixSocketServer, self.socket_path)
+        with open(self.socket_path) as f:
+            self.assertEqual(f.read(), 'data', "File is changed")
+
+    def test_memory_redis_transport(self):
+        """Test if events are exchanged through Redis transport with in-process Redis stand-in"""
+        event_queue = EventQueue(redis=MemoryRedis(), name='test')
+        self.assert_events_are_exchanged(event_queue, event_queue)
+
+    def test_memory_redis_coalesced_states(self):
+        """Test if states are coalesced by Redis transport with in-process Redis stand-in"""
+        event_queue = EventQueue(redis=MemoryRedis(), coalesce=True)
+        self.assert_states_are_coalesced(event_queue, event_queue)
+
+    def test_memory_redis_commands(self):
+        """Test if Redis stand-in rejects arguments which pinned redis-py 2.10.6 does not accept"""
+        redis = MemoryRedis()
+        self.assertRaises(TypeError, redis.hset, 'key', mapping={'field': 'value'})
+        self.assertRaises(TypeError, redis.pipeline().hset, 'key', mapping={'field': 'value'})
+        self.assertRaises(AttributeError, getattr, redis.pipeline(), 'hsetnx')
+        self.assertTrue(redis.hmset('key', {'field': 'value'}), "Fields are not set")
+        self.assertEqual(redis.hgetall('key'), {b'field': b'value'}, "Fields are different")
+
+    def test_memory_redis_latency(self):
+        """Test if every command and pipeline of Redis stand-in is one round trip delayed by latency"""
+        redis = MemoryRedis(latency=LATENCY)
+        event_queue = EventQueue(redis=redis)
+        start = time.perf_counter()
+        event_queue.write_states(states_event(0))
+        event_queue.read_all_states()
+        self.assertGreaterEqual(time.perf_counter() - start, 2 * LATENCY, "Latency is not injected")
+        self.assertEqual(redis.round_trips, 2, "Pipeline is not one round trip")
@@ -0,0 +1,101 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from aries.core.config.config import Config
+from aries.core.db.memory_mongodb import MemoryMongoClient
+from aries.core.exceptions import ValidationError
+from aries.core.grid import grid_compiler, grid_generator, grid_utils
+from aries.simulation import simulation_loader
+from aries.simulation.agent_store import AgentStore
+
+NUMBER_OF_AGENTS = 30
+SEED = 7
+
+
+def documents(objects):
+    return {name: obj.to_dict() for name, obj in objects.items()}
+
+
+class TestGridCompiler(unittest.TestCase):
+    """Tests for compiling grid elements and topology into memory-mapped binary files"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.topology, self.grid_elements, _ = grid_generator.generate_radial_grid(
+            NUMBER_OF_AGENTS, branching_factor=3, der_penetration=0.5, power_rating=(500, 3000), seed=SEED)
+        self.grid_elements['lines']['B2']['shunt_resistance'] = 0.5
+        self.topology['paths']['AGENT3'].append({'active': 0})
+        self.agents, self.lines = grid_utils.create_grid_elements(self.grid_elements)
+        self.paths, self.nodes = grid_utils.create_topology(self.topology)
+        self.grid_elements_path = os.path.join(self.path, grid_compiler.GRID_ELEMENTS_FILE)
+        self.topology_path = os.path.join(self.path, grid_compiler.TOPOLOGY_FILE)
+        grid_compiler.compile_grid_elements(self.grid_elements_path, self.agents, self.lines)
+        grid_compiler.compile_topology(self.topology_path, self.paths, self.nodes)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_grid_elements(self):
+        """Test if compiled agents and lines are loaded back the same"""
+        agents, lines = grid_compiler.load_grid_elements(self.grid_elements_path)
+        self.assertEqual(documents(agents), documents(self.agents), "Agents are different")
+        self.assertEqual(list(agents), list(self.agents), "Order of agents is different")
+        self.assertEqual(documents(lines), documents(self.lines), "Lines are different")
+        self.assertIsInstance(agents['AGENT0'].battery.active, int, "Integer property is not integer")
+
+    def test_topology(self):
+        """Test if compiled paths and nodes are loaded back the same"""
+        paths, nodes = grid_compiler.load_topology(self.topology_path)
+        self.assertEqual(documents(paths), documents(self.paths), "Paths are different")
+        self.assertEqual(documents(nodes), documents(self.nodes), "Nodes are different")
+
+    def test_agent_store(self):
+        """Test if agent store is created from compiled columns like from agents"""
+        store = AgentStore.from_compiled(self.grid_elements_path, scenarios=2)
+        expected = AgentStore.from_agents(self.agents, scenarios=2)
+        self.assertEqual(store.names, expected.names, "Names are different")
+        for column, values in expected.columns.items():
+            np.testing.assert_array_equal(store[column], values, "Column {} is different".format(column))
+
+    def test_load_simulation_elements(self):
+        """Test if config referencing compiled files is loaded, agents overrides are validated"""
+        config = Config.load({'grid_elements': self.grid_elements_path, 'topology': self.topology_path})
+        agents, lines, paths, nodes, _ = simulation_loader.load_simulation_elements(
+            config, agents_overrides={'AGENT1': {'power_rating': 42.0}})
+        self.assertEqual(agents['AGENT1'].power_rating, 42.0, "Agents overrides are not applied")
+        self.assertEqual(documents(nodes), documents(self.nodes), "Nodes are different")
+        self.assertRaises(ValidationError, simulation_loader.load_simulation_elements, config,
+                          agents_overrides={'AGENT1': {'power_rating': 'high'}})
+
+    def test_vectorized_simulation(self):
+        """Test if vectorized simulation of compiled files reads agent store from compiled columns"""
+        config = Config.load({'grid_elements': self.grid_elements_path, 'topology': self.topology_path,
+                              'vectorized': True, 'poll_events': False})
+        with mock.patch.object(AgentStore, 'from_agents', side_effect=AssertionError("Store is built from agents")):
+            simulation = simulation_loader.build_simulation(config, mongodb_client=MemoryMongoClient())
+        expected = AgentStore.from_agents(self.agents)
+        self.assertEqual(simulation.agent_store.names, expected.names, "Names are different")
+        for column, values in expected.columns.items():
+            np.testing.assert_array_equal(simulation.agent_store[column], values,
+                                          "Column {} is different".format(column))
+        simulation = simulation_loader.build_simulation(config, agents_overrides={'AGENT1': {'power_rating': 42.0}},
+                                                        mongodb_client=MemoryMongoClient())
+        self.assertEqual(simulation.agent_store['power_rating'][simulation.agent_store.index['AGENT1']], 42.0,
+                         "Agents overrides are not in agent store")
+
+    def test_wrong_files_are_refused(self):
+        """Test if json, files of other kind and files of other format version are refused"""
+        self.assertFalse(grid_compiler.is_compiled(os.path.join(self.path, 'missing.aries')),
+                         "Missing file is compiled")
+        self.assertRaises(ValidationError, grid_compiler.load_topology, self.grid_elements_path)
+        with open(self.topology_path, 'r+b') as f:
+            f.seek(len(grid_compiler.MAGIC))
+            f.write(struct.pack('<I', grid_compiler.FORMAT_VERSION + 1))
+        self.assertTrue(grid_compiler.is_compiled(self.topology_path), "Compiled file is not recognized")
+        self.assertRaises(ValidationError, grid_compiler.load_topology, self.topology_path)
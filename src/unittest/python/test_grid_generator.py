@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from aries.controller import cluster_utils
+from aries.core.exceptions import ValidationError
+from aries.core.grid import grid_generator, grid_utils
+from aries.simulation import simulation
+from aries.simulation.solver.linear_solver import LinearSolver
+from aries.simulation.solver.sweep_solver import SweepSolver
+
+NUMBER_OF_AGENTS = 200
+BRANCHING_FACTOR = 3
+DEPTH = 6
+DER_PENETRATION = 0.25
+CLUSTER_SIZE = 16
+SEED = 42
+# Small impedances of short lines, so that sweep power flow converges with all agents
+RESISTANCE = (0.0005, 0.002)
+REACTANCE = (0.0, 0.0005)
+POWER_RATING = (500, 3000)
+
+
+class TestGridGenerator(unittest.TestCase):
+    """Tests for generating synthetic radial feeders"""
+
+    def setUp(self):
+        self.topology, self.grid_elements, self.clusters = grid_generator.generate_radial_grid(
+            NUMBER_OF_AGENTS, branching_factor=BRANCHING_FACTOR, depth=DEPTH, der_penetration=DER_PENETRATION,
+            resistance=RESISTANCE, reactance=REACTANCE, power_rating=POWER_RATING, cluster_size=CLUSTER_SIZE,
+            seed=SEED)
+
+    def test_grid_is_valid(self):
+        """Test if generated grid is loaded by grid utils and solved by solvers"""
+        agents, lines = grid_utils.create_grid_elements(self.grid_elements)
+        paths, nodes = grid_utils.create_topology(self.topology)
+        clusters = cluster_utils.create_clusters(self.clusters)
+        self.assertEqual(len(agents), NUMBER_OF_AGENTS, "Number of agents is different")
+        self.assertEqual(len(clusters), -(-NUMBER_OF_AGENTS // CLUSTER_SIZE), "Number of clusters is different")
+        self.assertEqual(sorted(name for cluster in clusters.values() for name in cluster.cluster_agents),
+                         sorted(agents), "Every agent has to be in one cluster")
+        self.assertEqual(sum(agent.pv_panel.is_active() for agent in agents.values()),
+                         NUMBER_OF_AGENTS * DER_PENETRATION, "Number of agents with DER is different")
+
+        agents_states = {}
+        for agent in agents.values():
+            agent_name, impedance, demand_power, inject_power, power_from_battery, _ = \
+                simulation.process_simulation_step(agent=agent, time_scale=1)
+            agents_states[agent_name] = simulation.agent_state(impedance, demand_power, inject_power,
+                                                               power_from_battery)
+        linear_result = LinearSolver(paths=paths, nodes=nodes, lines=lines).solve(agents_states)
+        sweep_result = SweepSolver(paths=paths, nodes=nodes, lines=lines).solve(agents_states)
+        self.assertTrue(np.isfinite(linear_result['power_from_main']['real']), "Linear solution is not finite")
+        self.assertTrue(np.isfinite(sweep_result['power_from_main']['real']), "Sweep solution is not finite")
+
+    def test_paths_follow_adjacency(self):
+        """Test if path of every agent is the chain of branches from SLACK to its bus"""
+        nodes = self.topology['nodes']
+        parents = {}
+        for name, node in nodes.items():
+            self.assertLessEqual(len(node['branches_out']), BRANCHING_FACTOR, "Bus has too many children")
+            for child, branch in node['adjacency']:
+                if branch in node['branches_out']:
+                    parents[child] = (name, branch)
+        for name, node in nodes.items():
+            if 'agent' not in node:
+                continue
+            path = []
+            bus = name
+            while bus != grid_generator.SLACK_NODE:
+                bus, branch = parents[bus]
+                path.insert(0, branch)
+            self.assertEqual(self.topology['paths'][node['agent']], [{'active': 1, 'path': path}],
+                             "Path of {} does not follow adjacency".format(node['agent']))
+            self.assertLessEqual(len(path), DEPTH + 1, "Bus is deeper than depth")
+
+    def test_generation_is_reproducible(self):
+        """Test if the same seed gives the same grid"""
+        self.assertEqual(grid_generator.generate_radial_grid(
+            NUMBER_OF_AGENTS, branching_factor=BRANCHING_FACTOR, depth=DEPTH, der_penetration=DER_PENETRATION,
+            resistance=RESISTANCE, reactance=REACTANCE, power_rating=POWER_RATING, cluster_size=CLUSTER_SIZE,
+            seed=SEED), (self.topology, self.grid_elements, self.clusters), "Grid is different")
+
+    def test_agents_do_not_fit(self):
+        """Test if feeder too small for agents is refused"""
+        self.assertRaises(ValidationError, grid_generator.generate_radial_grid, 15, branching_factor=2, depth=3)
+        topology, _, _ = grid_generator.generate_radial_grid(14, branching_factor=2, depth=3)
+        self.assertEqual(len(topology['paths']), 14, "Full feeder is not generated")
+
+    def test_write_grid(self):
+        """Test if grid is written to directory"""
+        path = tempfile.mkdtemp()
+        try:
+            grid_generator.write_grid(path, self.topology, self.grid_elements, self.clusters)
+            self.assertEqual(sorted(os.listdir(path)), sorted([grid_generator.TOPOLOGY_FILE,
+                                                               grid_generator.GRID_ELEMENTS_FILE,
+                                                               grid_generator.CLUSTERS_FILE]), "Files are different")
+        finally:
+            shutil.rmtree(path)
@@ -0,0 +1,71 @@
+import copy
+import unittest
+
+from aries.core.exceptions import ValidationError
+from aries.core.grid import grid_generator, grid_loader
+from aries.core.grid.agent import Agent
+from aries.core.grid.line import Line
+from aries.core.grid.topology import Path, Node
+
+NUMBER_OF_AGENTS = 20
+SEED = 3
+
+
+class TestGridLoader(unittest.TestCase):
+    """Tests for bulk loading and validation of grid elements and topology"""
+
+    def setUp(self):
+        self.topology, self.grid_elements, _ = grid_generator.generate_radial_grid(
+            NUMBER_OF_AGENTS, der_penetration=0.5, seed=SEED)
+
+    def test_load_grid_elements(self):
+        """Test if bulk loaded agents and lines are the same as loaded one by one"""
+        agents, lines = grid_loader.load_grid_elements(self.grid_elements)
+        self.assertEqual({name: agent.to_dict() for name, agent in agents.items()},
+                         {name: Agent.load(name, j).to_dict() for name, j in self.grid_elements['agents'].items()},
+                         "Agents are different")
+        self.assertEqual({name: line.to_dict() for name, line in lines.items()},
+                         {name: Line.load(name, j).to_dict() for name, j in self.grid_elements['lines'].items()},
+                         "Lines are different")
+
+    def test_load_topology(self):
+        """Test if bulk loaded paths and nodes are the same as loaded one by one"""
+        paths, nodes = grid_loader.load_topology(self.topology)
+        self.assertEqual({name: path.to_dict() for name, path in paths.items()},
+                         {name: Path.load(j).to_dict() for name, j in self.topology['paths'].items()},
+                         "Paths are different")
+        self.assertEqual({name: node.to_dict() for name, node in nodes.items()},
+                         {name: Node.load(j).to_dict() for name, j in self.topology['nodes'].items()},
+                         "Nodes are different")
+
+    def test_all_errors_are_reported(self):
+        """Test if errors of all agents and lines are reported together"""
+        grid_elements = copy.deepcopy(self.grid_elements)
+        grid_elements['agents']['AGENT1']['power_rating'] = 'high'
+        grid_elements['agents']['AGENT7']['battery']['contribution_active'] = 2.0
+        del grid_elements['agents']['AGENT9']['voltage_rating']
+        grid_elements['lines']['B3']['resistance'] = None
+        grid_elements['lines']['B4']['length'] = 1.0
+        with self.assertRaises(ValidationError) as context:
+            grid_loader.load_grid_elements(grid_elements)
+        message = str(context.exception)
+        self.assertIn('5 error(s)', message, "Number of errors is different")
+        for error in ['agents.AGENT1.power_rating : must be of float type',
+                      'agents.AGENT7.battery.contribution_active : max value is 1',
+                      'agents.AGENT9.voltage_rating : required field',
+                      'lines.B3.resistance : required field',
+                      'lines.B4.length : unknown field']:
+            self.assertIn(error, message, "Error is not reported")
+
+    def test_topology_errors_are_reported(self):
+        """Test if errors of paths and nodes are reported with their position"""
+        topology = copy.deepcopy(self.topology)
+        topology['paths']['AGENT2'][0]['path'].append(3)
+        topology['nodes']['N5']['adjacency'] = [['N6']] + topology['nodes']['N5']['adjacency'] + [['N7', 8]]
+        with self.assertRaises(ValidationError) as context:
+            grid_loader.load_topology(topology)
+        message = str(context.exception)
+        self.assertIn('paths.AGENT2.0.path.{} : must be of string type'.format(
+            len(topology['paths']['AGENT2'][0]['path']) - 1), message, "Path error is not reported")
+        self.assertIn('nodes.N5.adjacency.{}.1 : must be of string type'.format(
+            len(topology['nodes']['N5']['adjacency']) - 1), message, "Node error is not reported")
@@ -31,3 +31,10 @@ class TestLine(unittest.TestCase):
             j = json.load(f)
             agents,lines = grid_utils.create_grid_elements(j)
             self.assertEqual(len(lines), 4, 'Number of lines is not equal')
+
+    def test_line_without_shunt_is_dumped(self):
+        """Test if line loaded without shunt is dumped with empty shunt like before"""
+        line = Line.load(NAME, {'resistance': RESISTANCE, 'reactance': REACTANCE})
+        self.assertEqual(json.loads(line.dump()), {
+            'name': NAME, 'resistance': RESISTANCE, 'reactance': REACTANCE, 'shunt_resistance': None,
+            'shunt_reactance': None}, "Line is dumped differently")
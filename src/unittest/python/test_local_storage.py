@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import unittest_utils
+from aries.core.db.async_writer import AsyncWriter
+from aries.core.db.local_storage import LocalStorage, LocalStorageReader, SIMULATION_STEP, SIMULATION_RESULT, \
+    AGENTS, flatten
+from aries.core.grid import grid_utils
+from aries.simulation.run_simulation import run_simulation
+from aries.simulation.simulation import Simulation
+from aries.simulation.step_timer import PHASES
+from aries.simulation.solver.linear_solver import LinearSolver
+
+LOCAL_STORAGE_TEST_GRID_ELEMENTS = 'local_storage_test_grid_elements.json'
+LOCAL_STORAGE_TEST_TOPOLOGY = 'local_storage_test_topology.json'
+NUMBER_OF_STEPS = 7
+
+
+class EventQueue(object):
+    """Event queue without events"""
+
+    def read_all_states(self):
+        return []
+
+    def read_all_clusters(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class SkippingPacer(object):
+    """Pacer of simulation whose every step overruns so that skipped_steps steps are skipped"""
+
+    def __init__(self, skipped_steps):
+        self.skipped_steps = skipped_steps
+
+    def start(self):
+        pass
+
+    def wait(self):
+        return self.skipped_steps + 1
+
+    def report(self):
+        return {}
+
+
+class StepTimingsStorage(LocalStorage):
+    """Local storage which records number of stored steps at every writing of step timings"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.stored_steps = 0
+        self.step_timings_writes = []
+
+    def write_simulation_results(self, simulation_results):
+        super().write_simulation_results(simulation_results)
+        self.stored_steps += len(simulation_results)
+
+    def write_step_timings(self, simulation_id, step_timings):
+        super().write_step_timings(simulation_id, step_timings)
+        self.step_timings_writes.append((self.stored_steps, step_timings['step']['count']))
+
+
+class TestLocalStorage(unittest.TestCase):
+    """Tests for storing simulation into local columnar files"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def run_simulation(self, storage, writer=None, pacer=None, number_of_steps=NUMBER_OF_STEPS):
+        with unittest_utils.readfile(LOCAL_STORAGE_TEST_GRID_ELEMENTS, __file__) as f:
+            agents, lines = grid_utils.create_grid_elements(json.load(f))
+        with unittest_utils.readfile(LOCAL_STORAGE_TEST_TOPOLOGY, __file__) as f:
+            paths, nodes = grid_utils.create_topology(json.load(f))
+        solver = LinearSolver(paths=paths, nodes=nodes, lines=lines)
+        simulation_id = storage.write_simulation(agents=agents, lines=lines, paths=paths, nodes=nodes,
+                                                 solver=solver.type)
+        simulation = Simulation(agents=agents, lines=lines, nodes=nodes, paths=paths, storage=storage,
+                                latency=0, simulation_id=simulation_id, event_queue=EventQueue(), solver=solver,
+                                writer=writer, pacer=pacer)
+        run_simulation(simulation=simulation, number_of_steps=number_of_steps)
+        return LocalStorageReader(os.path.join(self.path, str(simulation_id))), agents
+
+    def test_flatten(self):
+        """Test if nested dictionary is flattened to numeric fields"""
+        flat = flatten({'a': {'b': 1, 'c': 'text', 'd': {'e': True}}, 'f': complex(1, 2), 'g': None})
+        self.assertEqual(flat, {'a/b': 1.0, 'a/d/e': 1.0, 'f/real': 1.0, 'f/imag': 2.0}, "Flattened dict is different")
+
+    def test_simulation_is_stored_in_chunks(self):
+        """Test if all simulation steps are stored and read back"""
+        reader, agents = self.run_simulation(LocalStorage(self.path, chunk_size=3))
+        self.assertEqual(reader.steps, NUMBER_OF_STEPS, "Number of stored steps is different")
+        np.testing.assert_array_equal(reader.read_field(SIMULATION_STEP, 'simulation_step'),
+                                      np.arange(NUMBER_OF_STEPS), "Simulation steps are different")
+        self.assertEqual(reader.read_table(SIMULATION_RESULT).shape,
+                         (NUMBER_OF_STEPS, len(reader.fields(SIMULATION_RESULT))), "Shape of table is different")
+        self.assertIn('power_from_main/real', reader.fields(SIMULATION_RESULT), "Solver result is not stored")
+        self.assertEqual(reader.read_field(AGENTS, 'AGENT0/battery/status')[-1], agents['AGENT0'].battery.status,
+                         "Agent state of last step is different")
+        self.assertEqual(set(reader.read_simulation()['agents'].keys()), set(agents.keys()),
+                         "Grid of simulation is not stored")
+
+    def test_simulation_is_stored_by_writer(self):
+        """Test if background writer stores the same simulation"""
+        reader, _ = self.run_simulation(LocalStorage(self.path, chunk_size=3))
+        storage = LocalStorage(self.path, chunk_size=3)
+        writer_reader, _ = self.run_simulation(storage, writer=AsyncWriter(storage, batch_size=2))
+        self.assertEqual(writer_reader.steps, NUMBER_OF_STEPS, "Number of stored steps is different")
+        for table in [SIMULATION_STEP, SIMULATION_RESULT, AGENTS]:
+            self.assertEqual(writer_reader.fields(table), reader.fields(table), "Fields are different")
+            np.testing.assert_allclose(writer_reader.read_table(table), reader.read_table(table))
+
+    def test_step_timings_are_stored(self):
+        """Test if every phase of every step is timed"""
+        reader, _ = self.run_simulation(LocalStorage(self.path, chunk_size=3))
+        step_timings = reader.read_step_timings()
+        self.assertEqual(set(step_timings), set(PHASES), "Phases are different")
+        for phase, summary in step_timings.items():
+            self.assertEqual(summary['count'], NUMBER_OF_STEPS, "Phase {} is not timed every step".format(phase))
+
+    def test_fields_appearing_later_are_stored(self):
+        """Test if fields missing in earlier steps are added as columns which are NaN in those steps"""
+        storage = LocalStorage(self.path, chunk_size=2)
+        simulation_id = storage.write_simulation(agents={}, lines={}, paths={}, nodes={}, solver='linear')
+        for step in range(5):
+            result = {'power': float(step)}
+            if step >= 1:
+                result['loss'] = float(step)
+            if step >= 3:
+                result['iterations'] = step
+            storage.write_simulation_results([{'simulation_step': step, 'total_pv_power': 0.0,
+                                               'simulation_result': result, 'agents_states': {},
+                                               'agents': {'AGENT0': {'status': float(step)}} if step >= 2 else {}}])
+        storage.close()
+
+        reader = LocalStorageReader(os.path.join(self.path, str(simulation_id)))
+        self.assertEqual(reader.fields(SIMULATION_RESULT), ['power', 'loss', 'iterations'], "Fields are different")
+        np.testing.assert_array_equal(reader.read_field(SIMULATION_RESULT, 'power'), np.arange(5.0))
+        np.testing.assert_array_equal(reader.read_field(SIMULATION_RESULT, 'loss'), [np.nan, 1, 2, 3, 4])
+        np.testing.assert_array_equal(reader.read_field(SIMULATION_RESULT, 'iterations'),
+                                      [np.nan, np.nan, np.nan, 3, 4])
+        np.testing.assert_array_equal(reader.read_field(AGENTS, 'AGENT0/status'), [np.nan, np.nan, 2, 3, 4])
+
+    def test_step_timings_are_written_by_writer(self):
+        """Test if step timings are written by writer after earlier steps, also if pacer skips steps"""
+        storage = StepTimingsStorage(self.path)
+        with mock.patch('aries.simulation.simulation.STEP_TIMINGS_INTERVAL', 4):
+            self.run_simulation(storage, writer=AsyncWriter(storage, batch_size=2), pacer=SkippingPacer(2),
+                                number_of_steps=30)
+        # Steps 0, 3, 6, ..., 27 are run, timings are written at steps 3, 9, 15, 21, 27 and when simulation is closed
+        self.assertEqual(storage.step_timings_writes, [(2, 2), (4, 4), (6, 6), (8, 8), (10, 10), (10, 10)],
+                         "Step timings are written differently")
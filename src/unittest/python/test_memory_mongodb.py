@@ -0,0 +1,97 @@
+import time
+import unittest
+
+import pymongo
+
+from aries.core.db.memory_mongodb import MemoryMongoClient
+from aries.core.db.mongodb import MongoDB, DATABASE, AGENTS, SIMULATION_STEP, DELTA_INDEXES
+from aries.core.event.event_queue import EventQueue
+from aries.core.event.memory_redis import MemoryRedis
+from aries.core.grid import grid_generator, grid_utils
+from aries.simulation.run_simulation import run_simulation
+from aries.simulation.simulation import Simulation
+from aries.simulation.solver.linear_solver import LinearSolver
+
+NUMBER_OF_AGENTS = 5
+NUMBER_OF_STEPS = 7
+KEYFRAME_INTERVAL = 3
+LATENCY = 0.01
+
+
+class TestMemoryMongoDB(unittest.TestCase):
+    """Tests for running MongoDB storage against in-process MongoDB stand-in"""
+
+    def setUp(self):
+        self.client = MemoryMongoClient()
+
+    def test_queries(self):
+        """Test if documents are filtered, projected, sorted, limited, updated and deleted like by MongoDB"""
+        collection = self.client[DATABASE][SIMULATION_STEP]
+        collection.insert_many([{'simulation_id': i % 2, 'simulation_step': i, 'valid': False} for i in range(6)])
+        steps = collection.find({'simulation_id': 1, 'simulation_step': {'$lte': 4}}, {'simulation_step': 1}).sort(
+            'simulation_step', pymongo.DESCENDING).limit(1)
+        self.assertEqual([(step['simulation_step'], 'valid' in step, '_id' in step) for step in steps],
+                         [(3, False, True)], "Found documents are different")
+
+        collection.update_many({'simulation_step': {'$in': [0, 1]}}, {'$set': {'valid': True}})
+        self.assertEqual(sorted(step['simulation_step'] for step in collection.find({'valid': True})), [0, 1],
+                         "Updated documents are different")
+        self.assertEqual(collection.delete_many({'simulation_id': 0}).deleted_count, 3, "Deleted count is different")
+        self.assertIsNone(collection.find_one({'simulation_id': 0}), "Documents are not deleted")
+
+    def test_delta_indexes(self):
+        """Test if indexes of delta encoded agents are created only with delta encoding"""
+        MongoDB(client=self.client).create_indexes()
+        delta_keys = [keys for _, keys in DELTA_INDEXES]
+        agents_indexes = self.client[DATABASE][AGENTS].indexes
+        self.assertFalse([keys for keys in agents_indexes if keys in delta_keys], "Delta indexes are created")
+        MongoDB(client=self.client, keyframe_interval=KEYFRAME_INTERVAL).create_indexes()
+        self.assertEqual([keys for keys in agents_indexes if keys in delta_keys], delta_keys,
+                         "Delta indexes are not created")
+
+    def test_documents_are_copied(self):
+        """Test if stored documents are not changed through inserted or found documents"""
+        document = {'agent': {'power_rating': 1.0}}
+        self.client[DATABASE][AGENTS].insert_one(document)
+        document['agent']['power_rating'] = 2.0
+        self.client[DATABASE][AGENTS].find_one()['agent']['power_rating'] = 3.0
+        self.assertEqual(self.client[DATABASE][AGENTS].find_one({'_id': document['_id']})['agent'],
+                         {'power_rating': 1.0}, "Stored document is changed")
+
+    def test_simulation(self):
+        """Test if simulation with storage and event queue stand-ins stores steps and rebuilds delta encoded agents"""
+        topology, grid_elements, _ = grid_generator.generate_radial_grid(NUMBER_OF_AGENTS, der_penetration=0.4,
+                                                                         seed=0)
+        agents, lines = grid_utils.create_grid_elements(grid_elements)
+        paths, nodes = grid_utils.create_topology(topology)
+        storage = MongoDB(client=self.client, keyframe_interval=KEYFRAME_INTERVAL)
+        storage.create_indexes()
+        event_queue = EventQueue(redis=MemoryRedis())
+        simulation_id = storage.write_simulation(agents=agents, lines=lines, paths=paths, nodes=nodes, solver='linear')
+        simulation = Simulation(agents=agents, lines=lines, paths=paths, nodes=nodes, storage=storage,
+                                event_queue=event_queue, solver=LinearSolver(paths=paths, nodes=nodes, lines=lines),
+                                simulation_id=simulation_id, latency=0)
+        agent_name = next(iter(agents))
+        event_queue.write_states({'states': {agent_name: {'power_rating': 123.0}}})
+        run_simulation(simulation=simulation, number_of_steps=NUMBER_OF_STEPS)
+
+        steps = list(storage.get_simulation_step_by_simulation(simulation_id))
+        self.assertEqual([step['simulation_step'] for step in steps], list(range(NUMBER_OF_STEPS)),
+                         "Simulation steps are different")
+        self.assertTrue(all(step['valid'] for step in steps), "Simulation steps are not finalized")
+        self.assertEqual(len(list(storage.read_states(simulation_id))), 1, "State event is not stored")
+        last_agents = {agent['name']: agent['agent']
+                       for agent in storage.get_agents_by_simulation_step(steps[-1]['_id'])}
+        self.assertEqual(last_agents, {name: agent.to_dict() for name, agent in agents.items()},
+                         "Rebuilt agents are different")
+        self.assertEqual(last_agents[agent_name]['power_rating'], 123.0, "State event is not applied")
+        self.assertIsNotNone(storage.get_step_timings(simulation_id), "Step timings are not stored")
+
+    def test_latency(self):
+        """Test if every operation is one round trip delayed by latency"""
+        client = MemoryMongoClient(latency=LATENCY)
+        start = time.perf_counter()
+        client[DATABASE][AGENTS].insert_many([{'name': 'AGENT0'}, {'name': 'AGENT1'}])
+        list(client[DATABASE][AGENTS].find().sort('name').limit(1))
+        self.assertGreaterEqual(time.perf_counter() - start, 2 * LATENCY, "Latency is not injected")
+        self.assertEqual(client.round_trips, 2, "Number of round trips is different")
@@ -1,5 +1,6 @@
 import json
 import unittest
+from unittest import mock
 
 import numpy as np
 import pandapower as pp
@@ -109,3 +110,84 @@ class TestNonLinearSolver(unittest.TestCase):
         solution_dict_test = self.solver.solve(agents_state=agents_states)
 
         self.assertEqual(solution_dict, solution_dict_test, 'Solutions do not match')
+
+    def test_solver_updates_network_in_place(self):
+        """Solving on the same network has to give the same result as solving on the new one"""
+        agents_states_1 = {
+            'AGENT0': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                       'demand_power': {'active_power': 1000, 'reactive_power': 100}},
+            'AGENT1': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                       'demand_power': {'active_power': 2000, 'reactive_power': 0}}}
+        agents_states_2 = {
+            'AGENT0': {'inject_power': {'active_power': 500, 'reactive_power': 0},
+                       'demand_power': {'active_power': 200, 'reactive_power': 0}},
+            'AGENT1': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                       'demand_power': {'active_power': 3000, 'reactive_power': 300}}}
+
+        net = self.solver.net
+        self.solver.solve(agents_state=agents_states_1)
+        solution_dict = self.solver.solve(agents_state=agents_states_2)
+        self.assertIs(net, self.solver.net, 'Network was rebuilt')
+
+        new_solver = NonLinearSolver(paths=self.solver.paths, nodes=self.solver.nodes, lines=self.lines)
+        expected_solution_dict = new_solver.solve(agents_state=agents_states_2)
+        for bus_name in expected_solution_dict['buses'].keys():
+            self.assertAlmostEqual(expected_solution_dict['buses'][bus_name]['vm_pu'],
+                                   solution_dict['buses'][bus_name]['vm_pu'], 6, 'Bus voltages do not match')
+        self.assertAlmostEqual(expected_solution_dict['distribution_loss']['real'],
+                               solution_dict['distribution_loss']['real'], 6, 'Losses do not match')
+
+    def test_warm_start(self):
+        """Warm started solver has to give the same result as flat started one"""
+        warm_solver = NonLinearSolver(paths=self.solver.paths, nodes=self.solver.nodes, lines=self.lines,
+                                      warm_start=True)
+        for active_power in [1000, 1100, 1200]:
+            agents_states = {
+                'AGENT0': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                           'demand_power': {'active_power': active_power, 'reactive_power': 100}},
+                'AGENT1': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                           'demand_power': {'active_power': 2 * active_power, 'reactive_power': 0}}}
+            expected_solution_dict = self.solver.solve(agents_state=agents_states)
+            solution_dict = warm_solver.solve(agents_state=agents_states)
+            for bus_name in expected_solution_dict['buses'].keys():
+                self.assertAlmostEqual(expected_solution_dict['buses'][bus_name]['vm_pu'],
+                                       solution_dict['buses'][bus_name]['vm_pu'], 6, 'Bus voltages do not match')
+
+        self.assertEqual(warm_solver.statistics['flat_starts'], 1, 'Only first step has to be flat started')
+        self.assertEqual(warm_solver.statistics['warm_starts'], 2, 'Next steps have to be warm started')
+        self.assertEqual(self.solver.statistics['warm_starts'], 0, 'Warm start is disabled by default')
+
+    def test_warm_start_fallback(self):
+        """Warm started solver has to return flat started result when warm start does not converge"""
+        warm_solver = NonLinearSolver(paths=self.solver.paths, nodes=self.solver.nodes, lines=self.lines,
+                                      warm_start=True)
+        runpp = pp.runpp
+
+        def runpp_not_converging_from_results(net, **kwargs):
+            if kwargs.get('init') == 'results':
+                net['converged'] = False
+                raise pp.LoadflowNotConverged('Power Flow did not converge!')
+            runpp(net, **kwargs)
+
+        solution_dict = None
+        expected_solution_dict = None
+        for active_power in [1000, 1500]:
+            agents_states = {
+                'AGENT0': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                           'demand_power': {'active_power': active_power, 'reactive_power': 100}},
+                'AGENT1': {'inject_power': {'active_power': 0, 'reactive_power': 0},
+                           'demand_power': {'active_power': 2 * active_power, 'reactive_power': 0}}}
+            expected_solution_dict = self.solver.solve(agents_state=agents_states)
+            with mock.patch.object(pp, 'runpp', side_effect=runpp_not_converging_from_results) as mock_runpp:
+                solution_dict = warm_solver.solve(agents_state=agents_states)
+
+        self.assertEqual([call[1].get('init') for call in mock_runpp.call_args_list], ['results', None],
+                         'Flat start is not retried after warm start')
+        for bus_name in expected_solution_dict['buses'].keys():
+            self.assertAlmostEqual(expected_solution_dict['buses'][bus_name]['vm_pu'],
+                                   solution_dict['buses'][bus_name]['vm_pu'], 6, 'Bus voltages do not match')
+        self.assertAlmostEqual(expected_solution_dict['distribution_loss']['real'],
+                               solution_dict['distribution_loss']['real'], 6, 'Losses do not match')
+        self.assertEqual(warm_solver.statistics['fallbacks'], 1, 'Fallback is not counted')
+        self.assertEqual(warm_solver.statistics['flat_starts'], 2, 'Not converged step has to be flat started')
+        self.assertEqual(warm_solver.statistics['warm_starts'], 0, 'Not converged warm start is counted')
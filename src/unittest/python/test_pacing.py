@@ -0,0 +1,68 @@
+import unittest
+
+from aries.core.constants import SKIP_POLICY, CATCH_UP_POLICY
+from aries.simulation.pacing import Pacer, create_pacer
+
+
+class Clock(object):
+    """Wall clock advanced only by sleeping and by computing steps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestPacing(unittest.TestCase):
+    """Tests for pacing simulation steps to wall clock"""
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def run_steps(self, pacer, compute_times):
+        """Run steps taking compute_times and return number of steps simulation time advances after each step"""
+        pacer.start()
+        advances = []
+        for compute_time in compute_times:
+            self.clock.now += compute_time
+            advances.append(pacer.wait())
+        return advances
+
+    def test_compute_time_is_subtracted(self):
+        """Test if steps are paced without drift"""
+        pacer = Pacer(period=1.0, clock=self.clock, sleep=self.clock.sleep)
+        advances = self.run_steps(pacer, [0.25] * 10)
+        self.assertEqual(advances, [1] * 10, "Simulation time does not advance step by step")
+        self.assertEqual(self.clock.sleeps, [0.75] * 10, "Compute time is not subtracted")
+        self.assertEqual(self.clock.now, 10.0, "Steps drift")
+        self.assertEqual(pacer.overruns, 0, "Overruns are reported")
+
+    def test_catch_up(self):
+        """Test if steps after overrun are run at once until simulation is on time"""
+        pacer = Pacer(period=1.0, overrun_policy=CATCH_UP_POLICY, clock=self.clock, sleep=self.clock.sleep)
+        advances = self.run_steps(pacer, [0.5, 2.75, 0.25, 0.25, 0.25])
+        self.assertEqual(advances, [1] * 5, "Steps are skipped")
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5], "Missed periods are not caught up")
+        self.assertEqual(self.clock.now, 5.0, "Steps drift after overrun")
+        self.assertEqual(pacer.report(), {'overruns': 3, 'skipped_steps': 0, 'max_lateness': 1.75},
+                         "Overruns are not reported")
+
+    def test_skip(self):
+        """Test if missed steps are skipped and simulation time follows wall clock"""
+        pacer = Pacer(period=1.0, overrun_policy=SKIP_POLICY, clock=self.clock, sleep=self.clock.sleep)
+        advances = self.run_steps(pacer, [0.5, 2.75, 0.25])
+        self.assertEqual(advances, [1, 2, 1], "Missed steps are not skipped")
+        self.assertEqual(self.clock.now, sum(advances), "Simulation time does not follow wall clock")
+        self.assertEqual(pacer.report(), {'overruns': 1, 'skipped_steps': 1, 'max_lateness': 1.75},
+                         "Overruns are not reported")
+
+    def test_create_pacer(self):
+        """Test if pacing is disabled by zero real-time factor"""
+        self.assertIsNone(create_pacer(0), "Pacer is created")
+        self.assertEqual(create_pacer(4, SKIP_POLICY).period, 0.25, "Period is different")
@@ -0,0 +1,89 @@
+import json
+import unittest
+from unittest import mock
+
+import unittest_utils
+from aries.core.config.config import Config
+from aries.core.exceptions import SimulationError, ValidationError
+from aries.simulation import parameter_sweep, simulation_loader
+
+GRID_ELEMENTS = 'parameter_sweep_test_grid_elements.json'
+TOPOLOGY = 'parameter_sweep_test_topology.json'
+SWEEP = 'parameter_sweep_test_sweep.json'
+
+
+class TestParameterSweep(unittest.TestCase):
+    """Tests for expanding parameter grid of sweep and loading of its runs"""
+
+    def setUp(self):
+        self.config_json = {'topology': unittest_utils.resource_path(TOPOLOGY, __file__),
+                            'grid_elements': unittest_utils.resource_path(GRID_ELEMENTS, __file__),
+                            'simulation_steps': 10}
+        with unittest_utils.readfile(SWEEP, __file__) as f:
+            self.sweep_json = json.load(f)
+
+    def test_expand_parameter_grid(self):
+        """Test if every combination of parameters is generated once"""
+        grid = parameter_sweep.expand_parameter_grid({'solver_type': ['linear', 'sweep'], 'latency': [0, 10, 100]})
+        self.assertEqual(len(grid), 6, "Number of combinations is different")
+        self.assertIn({'solver_type': 'sweep', 'latency': 10}, grid, "Combination is missed")
+        self.assertRaises(ValidationError, parameter_sweep.expand_parameter_grid, {'latency': []})
+        self.assertRaises(ValidationError, parameter_sweep.expand_parameter_grid, {'latency': 10})
+
+    def test_create_sweep_configurations(self):
+        """Test if configurations are created from base config and parameters"""
+        configurations = parameter_sweep.create_sweep_configurations(self.config_json, self.sweep_json)
+        self.assertEqual(len(configurations), 12, "Number of configurations is different")
+        for config_json, agents_overrides, parameters in configurations:
+            config = Config.load(config_json)
+            self.assertEqual(config.solver_type, parameters['solver_type'], "Solver type is not applied")
+            self.assertEqual(config.latency, parameters['latency'], "Latency is not applied")
+            self.assertEqual(config.simulation_steps, 10, "Base config parameter is lost")
+            self.assertEqual(agents_overrides, parameters['agents'], "Agents overrides are not passed")
+        self.assertNotIn('solver_type', self.config_json, "Base config is modified")
+
+        wrong_sweep_json = {'parameters': {'solver_type': ['linear', 'unknown']}}
+        self.assertRaises(ValidationError, parameter_sweep.create_sweep_configurations, self.config_json,
+                          wrong_sweep_json)
+
+    def test_load_simulation_elements_with_agent_overrides(self):
+        """Test if agent overrides are applied to all and to named agents"""
+        config = Config.load(self.config_json)
+        overrides = self.sweep_json['parameters']['agents'][1]
+        agents, lines, paths, nodes, clusters = simulation_loader.load_simulation_elements(
+            config, agents_overrides=overrides)
+        original_agents, _, _, _, _ = simulation_loader.load_simulation_elements(config)
+
+        for name, agent in agents.items():
+            self.assertEqual(agent.battery.status, 0, "Override of all agents is not applied")
+            self.assertEqual(agent.battery.capacity, original_agents[name].battery.capacity,
+                             "Not overridden parameter is changed")
+        self.assertEqual(agents['AGENT0'].power_rating, 2000, "Override of agent is not applied")
+        self.assertEqual(agents['AGENT1'].power_rating, original_agents['AGENT1'].power_rating,
+                         "Override of another agent is applied")
+        self.assertIsNone(clusters, "Clusters are loaded without config")
+
+        self.assertRaises(ValidationError, simulation_loader.load_simulation_elements, config,
+                          {'UNKNOWN': {'power_rating': 1}})
+        self.assertRaises(ValidationError, simulation_loader.load_simulation_elements, config,
+                          {'*': {'battery': {'status': 'full'}}})
+
+    def test_run_sweep(self):
+        """Test if every configuration is run in process pool with MongoDB and Redis stand-ins"""
+        sweep_json = {'parameters': {'solver_type': self.sweep_json['parameters']['solver_type'],
+                                     'agents': self.sweep_json['parameters']['agents']}}
+        summary = parameter_sweep.run_sweep(self.config_json, sweep_json, workers=2, offline=True)
+        self.assertEqual(summary['failed'], 0, "Runs failed: {}".format([run['error'] for run in summary['runs']]))
+        self.assertEqual(summary['succeeded'], 4, "Number of runs is different")
+        self.assertEqual(summary['steps'], 4 * self.config_json['simulation_steps'], "Number of steps is different")
+        self.assertEqual([run['parameters'] for run in summary['runs']],
+                         parameter_sweep.expand_parameter_grid(sweep_json['parameters']), "Order of runs is different")
+
+    def test_failed_run_is_reported(self):
+        """Test if configuration whose solver raises is reported as failed run"""
+        solver = mock.Mock(type='linear', solve=mock.Mock(side_effect=SimulationError("Solver failed")))
+        with mock.patch('aries.simulation.simulation_utils.create_solver', return_value=solver):
+            run = parameter_sweep.run_configuration(self.config_json, name='failing', offline=True)
+        self.assertEqual(run['error'], "Solver failed", "Error of run is different")
+        summary = parameter_sweep.summarize_runs([run], elapsed=run['elapsed'])
+        self.assertEqual((summary['succeeded'], summary['failed']), (0, 1), "Failed run is reported as succeeded")
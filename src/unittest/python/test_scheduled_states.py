@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import unittest_utils
+from aries.core.db.local_storage import LocalStorage, LocalStorageReader, AGENTS, AGENTS_STATES
+from aries.core.exceptions import ValidationError
+from aries.core.grid import grid_utils
+from aries.simulation.run_simulation import run_simulation
+from aries.simulation.simulation import Simulation
+from aries.simulation.solver.linear_solver import LinearSolver
+
+SCHEDULED_STATES_TEST_GRID_ELEMENTS = 'scheduled_states_test_grid_elements.json'
+SCHEDULED_STATES_TEST_TOPOLOGY = 'scheduled_states_test_topology.json'
+SCHEDULED_STATES_TEST_STATES = 'scheduled_states_test_states.json'
+NUMBER_OF_STEPS = 7
+
+
+class EventQueue(object):
+    """Event queue returning given events at first reads"""
+
+    def __init__(self, events, clusters_events=()):
+        self.events = list(events)
+        self.clusters_events = list(clusters_events)
+
+    def read_all_states(self):
+        return self.events.pop(0) if self.events else []
+
+    def read_all_clusters(self):
+        return self.clusters_events.pop(0) if self.clusters_events else []
+
+    def close(self):
+        pass
+
+
+class TestScheduledStates(unittest.TestCase):
+    """Tests for states applied at scheduled simulation step"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def run_simulation(self, event_queue, scheduled_states, vectorized=False):
+        with unittest_utils.readfile(SCHEDULED_STATES_TEST_GRID_ELEMENTS, __file__) as f:
+            agents, lines = grid_utils.create_grid_elements(json.load(f))
+        with unittest_utils.readfile(SCHEDULED_STATES_TEST_TOPOLOGY, __file__) as f:
+            paths, nodes = grid_utils.create_topology(json.load(f))
+        storage = LocalStorage(self.path)
+        solver = LinearSolver(paths=paths, nodes=nodes, lines=lines)
+        simulation_id = storage.write_simulation(agents=agents, lines=lines, paths=paths, nodes=nodes,
+                                                 solver=solver.type)
+        simulation = Simulation(agents=agents, lines=lines, nodes=nodes, paths=paths, storage=storage,
+                                latency=0, simulation_id=simulation_id, event_queue=event_queue, solver=solver,
+                                vectorized=vectorized)
+        for step, states in scheduled_states.items():
+            simulation.schedule_states(states, apply_at_step=step)
+        run_simulation(simulation=simulation, number_of_steps=NUMBER_OF_STEPS)
+        return LocalStorageReader(os.path.join(self.path, str(simulation_id)))
+
+    def test_create_scheduled_states(self):
+        """Test if i-th state of agent is scheduled at step i unless it has apply_at_step"""
+        with unittest_utils.readfile(SCHEDULED_STATES_TEST_STATES, __file__) as f:
+            scheduled_states = grid_utils.create_scheduled_states(json.load(f))
+        self.assertEqual(sorted(scheduled_states), [0, 1, 5], "Steps of states are different")
+        self.assertEqual(scheduled_states[5], {'AGENT0': {'power_rating': 1500}}, "State of step 5 is different")
+        self.assertRaises(ValidationError, grid_utils.create_scheduled_states,
+                          {'AGENT0': [{'power_rating': 'high'}]})
+
+    def test_states_are_applied_at_scheduled_step(self):
+        """Test if preloaded and queued states are applied at their step"""
+        with unittest_utils.readfile(SCHEDULED_STATES_TEST_STATES, __file__) as f:
+            scheduled_states = grid_utils.create_scheduled_states(json.load(f))
+        event_queue = EventQueue([
+            [{'states': {'AGENT1': {'power_rating': 700}}, 'apply_at_step': 3},
+             {'states': {'AGENT1': {'power_rating': 600}}}],
+            [{'states': {'AGENT1': {'power_rating': 800}}, 'apply_at_step': 1}],
+        ])
+        reader = self.run_simulation(event_queue, scheduled_states)
+
+        np.testing.assert_array_equal(reader.read_field(AGENTS, 'AGENT0/power_rating'),
+                                      [1100, 1200, 1200, 1200, 1200, 1500, 1500], "Scripted states are not on time")
+        np.testing.assert_array_equal(reader.read_field(AGENTS, 'AGENT1/power_rating'),
+                                      [600, 800, 800, 700, 700, 700, 700], "Queued states are not on time")
+        events = reader.read_events()
+        self.assertEqual([event['simulation_step'] for event in events], [0, 1, 3, 5], "Steps of events are different")
+        self.assertEqual(events[0]['states'], [{'AGENT0': {'power_rating': 1100, 'battery': {'active': 1}}},
+                                               {'AGENT1': {'power_rating': 600}}], "Order of states is different")
+
+    def test_scheduled_states_without_event_queue(self):
+        """Test if scheduled states are applied when events are not polled"""
+        reader = self.run_simulation(None, {2: {'AGENT0': {'power_rating': 900}}})
+        np.testing.assert_array_equal(reader.read_field(AGENTS, 'AGENT0/power_rating'),
+                                      [1000, 1000, 900, 900, 900, 900, 900], "Scheduled state is not applied")
+
+    def test_all_clusters_events_are_stored(self):
+        """Test if clusters events superseded by the last event of the step are stored as not applied"""
+        reader = self.run_simulation(EventQueue([], [[{'clusters': {'first': None}}, {'clusters': {}}]]), {})
+        events = reader.read_events()
+        self.assertEqual([(event['clusters'], event['simulation_step'], event['is_applied']) for event in events],
+                         [({'first': None}, 0, False), ({}, 0, True)], "Clusters events are different")
+
+    def test_removed_clusters_reset_requests_of_vectorized_agents(self):
+        """Test if requests reset by clusters event without clusters are used by vectorized simulation step"""
+        clusters_events = [[{'clusters': {'cluster0': {'cluster_agents': ['AGENT0', 'AGENT1'],
+                                                       'controller': 'LoadSharingCluster',
+                                                       'priority': 1, 'delay': 0}}}],
+                           [{'clusters': {}}]]
+        # Battery of AGENT1 supplies power requested by cluster
+        scheduled_states = {0: {'AGENT1': {'battery': {'active': 1}}}}
+        reader = self.run_simulation(EventQueue([], clusters_events), scheduled_states)
+        vectorized_reader = self.run_simulation(EventQueue([], clusters_events), scheduled_states, vectorized=True)
+        self.assertGreater(reader.read_field(AGENTS_STATES, 'AGENT1/inject_power/active_power')[0], 0,
+                           "Cluster does not request power")
+        np.testing.assert_array_equal(vectorized_reader.read_field(AGENTS, 'AGENT1/request_inject_power'),
+                                      reader.read_field(AGENTS, 'AGENT1/request_inject_power'),
+                                      "Requests of agents are different")
+        self.assertEqual(vectorized_reader.fields(AGENTS_STATES), reader.fields(AGENTS_STATES),
+                         "Fields of agents states are different")
+        np.testing.assert_allclose(vectorized_reader.read_table(AGENTS_STATES), reader.read_table(AGENTS_STATES),
+                                   err_msg="Vectorized agents states are different")
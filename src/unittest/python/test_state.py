@@ -88,3 +88,9 @@ class TestState(unittest.TestCase):
         agent.update_state(modified_state)
 
         unittest_utils.check_if_properties_is_set(test=self, obj=agent, object_name="Agent")
+
+    def test_partial_state_is_dumped(self):
+        """Test if state is dumped with its given properties only, like before it was stored in slots"""
+        with unittest_utils.readfile(MODIFIED_STATE_TEST, __file__) as f:
+            j = json.load(f)
+        self.assertEqual(json.loads(State(j).dump()), j, "State is dumped differently")
@@ -0,0 +1,44 @@
+import unittest
+
+from aries.simulation.step_timer import StepTimer, PhaseTimer, BUCKETS, PHASES, SOLVER_PHASE
+
+
+class TestStepTimer(unittest.TestCase):
+    """Tests for timing of phases of simulation step"""
+
+    def test_phase_summary(self):
+        """Test if totals are kept for all steps and percentiles for rolling window"""
+        timer = PhaseTimer(window=100)
+        for duration in range(1, 201):
+            timer.record(duration / 1000)
+        summary = timer.summary()
+        self.assertEqual(summary['count'], 200, "Count is different")
+        self.assertAlmostEqual(summary['total'], 20.1, 9, "Total is different")
+        self.assertAlmostEqual(summary['mean'], 0.1005, 9, "Mean is different")
+        self.assertEqual(summary['max'], 0.2, "Max is different")
+        self.assertEqual(summary['last'], 0.2, "Last duration is different")
+        self.assertEqual(summary['p50'], 0.151, "Median of window is different")
+        self.assertEqual(summary['p99'], 0.2, "99th percentile of window is different")
+
+    def test_histogram(self):
+        """Test if histogram counts durations of rolling window in buckets"""
+        timer = PhaseTimer(window=3)
+        for duration in [100, 1e-6, 2e-5, 2e-5, 20]:
+            timer.record(duration)
+        histogram = timer.histogram()
+        self.assertEqual(len(histogram), len(BUCKETS) + 1, "Number of buckets is different")
+        self.assertEqual(sum(bucket['count'] for bucket in histogram), 3, "Histogram is not of rolling window")
+        self.assertEqual(histogram[1], {'le': BUCKETS[1], 'count': 2}, "Bucket of short durations is different")
+        self.assertEqual(histogram[-1], {'le': None, 'count': 1}, "Bucket of long durations is different")
+
+    def test_measure(self):
+        """Test if with block is measured as phase"""
+        timer = StepTimer()
+        for _ in range(3):
+            with timer.measure(SOLVER_PHASE):
+                pass
+        summary = timer.summary()
+        self.assertEqual(list(summary), PHASES, "Phases are different")
+        self.assertEqual(summary[SOLVER_PHASE]['count'], 3, "Number of measurements is different")
+        self.assertEqual(list(timer.last()), [SOLVER_PHASE], "Last step is different")
+        self.assertEqual(len(timer.format_summary().splitlines()), len(PHASES) + 1, "Summary table is different")
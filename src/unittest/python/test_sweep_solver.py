@@ -0,0 +1,69 @@
+import json
+import unittest
+
+import unittest_utils
+from aries.core.exceptions import SimulationError
+from aries.core.grid import grid_utils
+from aries.core.grid.topology import Node
+from aries.simulation.solver.non_linear_solver import NonLinearSolver
+from aries.simulation.solver.sweep_solver import SweepSolver
+
+SWEEP_SOLVER_TEST_GRID_ELEMENTS = 'sweep_solver_test_grid_elements.json'
+SWEEP_SOLVER_TEST_TOPOLOGY = 'sweep_solver_test_topology.json'
+
+
+class TestSweepSolver(unittest.TestCase):
+    def setUp(self):
+        with unittest_utils.readfile(SWEEP_SOLVER_TEST_GRID_ELEMENTS, __file__) as f:
+            j = json.load(f)
+            self.agents, self.lines = grid_utils.create_grid_elements(j)
+
+        with unittest_utils.readfile(SWEEP_SOLVER_TEST_TOPOLOGY, __file__) as f:
+            j = json.load(f)
+            self.paths, self.nodes = grid_utils.create_topology(j)
+
+        self.agents_states = {
+            'AGENT0': {'inject_power': {'active_power': 100, 'reactive_power': 200},
+                       'demand_power': {'active_power': 200, 'reactive_power': 100}},
+            'AGENT1': {'inject_power': {'active_power': 1000, 'reactive_power': 50},
+                       'demand_power': {'active_power': 10000, 'reactive_power': 50}}}
+
+    def test_solver(self):
+        """Sweep solver has to match pandapower solution"""
+        expected = NonLinearSolver(paths=self.paths, nodes=self.nodes, lines=self.lines).solve(self.agents_states)
+        solution = SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines).solve(self.agents_states)
+
+        for bus_name, bus in expected['buses'].items():
+            for key in ['vm_pu', 'va_degree', 'p_kw', 'q_kvar']:
+                self.assertAlmostEqual(bus[key], solution['buses'][bus_name][key], 5,
+                                       'Solution for {} {} does not match'.format(bus_name, key))
+        for line_name, line in expected['lines'].items():
+            for key in ['pl_kw', 'ql_kvar', 'i_ka', 'p_from_kw', 'q_from_kvar', 'p_to_kw', 'q_to_kvar']:
+                self.assertAlmostEqual(line[key], solution['lines'][line_name][key], 5,
+                                       'Solution for {} {} does not match'.format(line_name, key))
+        for key in ['power_from_main', 'distribution_loss']:
+            self.assertAlmostEqual(expected[key]['real'], solution[key]['real'], 3,
+                                   'Solution for {} does not match (real part)'.format(key))
+            self.assertAlmostEqual(expected[key]['imag'], solution[key]['imag'], 3,
+                                   'Solution for {} does not match (imag part)'.format(key))
+
+    def test_warm_start(self):
+        """Warm started sweep has to converge faster to the same solution"""
+        solver = SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines)
+        warm_solver = SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines, warm_start=True)
+        warm_solver.solve(self.agents_states)
+
+        expected = solver.solve(self.agents_states)
+        solution = warm_solver.solve(self.agents_states)
+        self.assertLess(warm_solver.statistics['iterations'], solver.statistics['iterations'],
+                        'Warm start does not reduce number of iterations')
+        for bus_name, bus in expected['buses'].items():
+            self.assertAlmostEqual(bus['vm_pu'], solution['buses'][bus_name]['vm_pu'], 8,
+                                   'Solution for {} does not match'.format(bus_name))
+
+    def test_unreachable_nodes(self):
+        """Nodes which are not reachable from SLACK are refused instead of dropping their load"""
+        self.nodes['N3'] = Node.from_properties(branches_in=[], branches_out=[], adjacency=[], agent='AGENT2')
+        with self.assertRaises(SimulationError) as context:
+            SweepSolver(paths=self.paths, nodes=self.nodes, lines=self.lines)
+        self.assertIn("['N3']", str(context.exception), "Unreachable node is not reported")
@@ -4,6 +4,7 @@ import unittest
 import numpy as np
 
 import unittest_utils
+from aries.core import utils
 from aries.core.grid import grid_utils
 from aries.core.grid.agent import Agent
 from aries.simulation import simulation_utils
@@ -99,3 +100,20 @@ class TestGridUtils(unittest.TestCase):
             p = path.paths[0]
             self.assertEqual(p['active'], 1, 'path.active is not equal')
             self.assertEqual(p['path'], ['B0', 'B1'], 'path.active is not equal')
+
+    def test_diff_and_merge_dict(self):
+        """Test if merging the diff of agents into the old agent gives the new agent"""
+        with unittest_utils.readfile(GRID_ELEMENTS_TEST_1, __file__) as f:
+            j = json.load(f)
+            agents, lines = grid_utils.create_grid_elements(j)
+        agent = next(iter(agents.values()))
+        old = json.loads(agent.dump())
+        agent.battery.status = agent.battery.status / 2
+        agent.request_inject_power = 100
+        new = json.loads(agent.dump())
+
+        diff = utils.diff_dict(old, new)
+        self.assertEqual(diff, {'battery': {'status': new['battery']['status']}, 'request_inject_power': 100},
+                         "Diff contains not changed fields")
+        self.assertEqual(utils.merge_dict(old, diff), new, "Merged diff is different from new")
+        self.assertEqual(utils.diff_dict(new, new), {}, "Diff of the same dict is not empty")
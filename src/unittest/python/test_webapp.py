@@ -0,0 +1,29 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from aries.api import webapp
+from aries.core.constants import IN_PROCESS_TRANSPORT
+from aries.core.exceptions import ValidationError
+
+
+class TestWebapp(unittest.TestCase):
+    """Tests for loading config of webapp"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_in_process_transport_is_refused(self):
+        """Test if webapp refuses in-process transport, its events would never reach simulation"""
+        config_path = os.path.join(self.path, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump({'grid_elements': 'grid_elements.json', 'topology': 'topology.json',
+                       'event_transport': IN_PROCESS_TRANSPORT}, f)
+        with mock.patch.dict(os.environ, {'ARIES_CONF': config_path}):
+            self.assertRaises(ValidationError, webapp.load_config)
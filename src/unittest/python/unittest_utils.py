@@ -1,10 +1,13 @@
 import os
 
 
-def readfile(resource_filename, script_filename):
+def resource_path(resource_filename, script_filename):
     script_name, ext = os.path.splitext(os.path.basename(script_filename))
-    return open(
-        os.path.join(os.path.dirname(script_filename), 'resources/{}/{}'.format(script_name, resource_filename)))
+    return os.path.join(os.path.dirname(script_filename), 'resources/{}/{}'.format(script_name, resource_filename))
+
+
+def readfile(resource_filename, script_filename):
+    return open(resource_path(resource_filename, script_filename))
 
 
 def check_if_properties_is_set(test, object_name, obj):